@@ -52,7 +52,8 @@ while True:
     if spells:  # check if any spells are off CD
         Misc.reclaim_ngu(True)  # take all magic from magic NGUs
         for spell in spells:
-            BloodMagic.cast_spell(spell)
+            BloodMagic.cast_spell(spell, wait=False)
+        BloodMagic.cast_scheduled(wait=True)
         Misc.reclaim_bm()
         NGU.assign_ngu(Misc.get_idle_cap(1), range(1, 7), True)
         BloodMagic.toggle_auto_spells()  # retoggle autospells
@@ -0,0 +1,107 @@
+"""Backends that replace how Inputs talks to the game window."""
+import threading
+import time
+
+from classes.inputs import Inputs
+
+
+class Backend:
+    """Replaces the primitives of Inputs that talk to the game window.
+
+    Everything else in Inputs, and every feature, is built on these, so
+    a backend that implements them can record, replay or simulate a run.
+    A subclass defines methods with the names and signatures of the
+    primitives it replaces, the others keep talking to the window.
+
+    A backend with a clock runs on virtual time: while it's installed
+    time.monotonic(), time.time() and time.sleep() use self.clock, and
+    sleeping advances it instead of waiting. That holds in the thread that
+    installed it and the threads that call follow_clock(), like the input
+    and CPU channels of Runtime, other threads like the Discord worker keep
+    real time. Runtime.start() runs its event loop on the clock too, so a
+    clocked backend has to be installed before it starts.
+
+    Usage: with SomeBackend():
+               FightBoss.nuke()
+    """
+
+    PRIMITIVES = ("get_bitmap", "get_pixel_color", "click", "click_drag",
+                  "ctrl_click", "send_arrow_press", "send_string")
+
+    window = {name: getattr(Inputs, name) for name in PRIMITIVES}  # the primitives of Inputs
+    active = None
+    real_time = None  # (monotonic, time, sleep) of the time module while a clock is installed
+
+    loops = 0  # event loops of Runtime.start() running
+
+    clock = None  # virtual seconds, None to keep the real clock
+    epoch = 0  # time.time() when the virtual clock started
+    threads = frozenset()  # idents of the threads on the virtual clock
+    lock = threading.Lock()
+
+    def install(self) -> None:
+        """Make Inputs use this backend, replacing the active one."""
+        if self.clock is not None and Backend.loops:
+            raise RuntimeError("A backend with a clock can't be installed while a Runtime is running, "
+                               "install it before Runtime.start()")
+        if Backend.active is not None:
+            Backend.active.uninstall()
+        for name in Backend.PRIMITIVES:
+            method = getattr(self, name, None)
+            if method is not None:
+                setattr(Inputs, name, staticmethod(method))
+        if self.clock is not None:
+            Backend.real_time = (time.monotonic, time.time, time.sleep)
+            self.epoch = time.time() - self.clock
+            self.threads = {threading.get_ident()}
+            time.monotonic, time.time, time.sleep = self.monotonic, self.wall_time, self.sleep
+        Backend.active = self
+
+    def uninstall(self) -> None:
+        """Make Inputs talk to the game window again."""
+        if Backend.active is not self:
+            return
+        for name, fn in Backend.window.items():
+            setattr(Inputs, name, staticmethod(fn))
+        if Backend.real_time is not None:
+            time.monotonic, time.time, time.sleep = Backend.real_time
+            Backend.real_time = None
+        Backend.active = None
+
+    @staticmethod
+    def follow_clock() -> None:
+        """Put the calling thread on the virtual clock of the installed backend, if it has one."""
+        if Backend.active is not None and Backend.active.clock is not None:
+            Backend.active.threads.add(threading.get_ident())
+
+    def advance(self, seconds :float) -> None:
+        """Move the virtual clock forward."""
+        with Backend.lock:
+            self.clock += max(seconds, 0)
+
+    def monotonic(self) -> float:
+        if threading.get_ident() not in self.threads:
+            return Backend.real_time[0]()
+        return self.clock
+
+    def wall_time(self) -> float:
+        if threading.get_ident() not in self.threads:
+            return Backend.real_time[1]()
+        return self.epoch + self.clock
+
+    def sleep(self, seconds :float) -> None:
+        if threading.get_ident() not in self.threads:
+            return Backend.real_time[2](seconds)
+        self.advance(seconds)
+
+    def __enter__(self) -> "Backend":
+        self.install()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release what the backend holds and uninstall it."""
+        self.uninstall()
+
@@ -1,6 +1,6 @@
 """Handles different challenges"""
 
-from classes.features   import BloodMagic, Rebirth
+from classes.features   import BloodMagic, FightBoss, Rebirth
 from classes.navigation import Navigation
 from classes.inputs     import Inputs
 from classes.discord    import Discord
@@ -88,6 +88,8 @@ class Challenge:
             Inputs.click(x, y)
             time.sleep(userset.LONG_SLEEP)
             Navigation.confirm()
+            Rebirth.reset_clock()
+            FightBoss.record_boss(1, read=False)
         
         chall = ChList[challenge-1]
         print(f"Starting {chall.name} Challenge script.")
@@ -39,7 +39,7 @@ def speedrun(duration):
     Adventure.adventure(highest=True)
     update_gamestate()
 
-    while current_boss < 18 and minutes_elapsed < duration:  # augs unlocks after 17
+    while not FightBoss.wait_for_boss(18) and minutes_elapsed < duration:  # augs unlocks after 17
         Wandoos.wandoos(True, True)
         FightBoss.nuke()
         FightBoss.fight()
@@ -50,7 +50,7 @@ def speedrun(duration):
         update_gamestate()
     Adventure.adventure(highest=True)
 
-    while current_boss < 29 and minutes_elapsed < duration:  # buster unlocks after 28
+    while not FightBoss.wait_for_boss(29) and minutes_elapsed < duration:  # buster unlocks after 28
         Augmentation.augments({"SS": 1}, Misc.get_idle_cap(1))
         Wandoos.wandoos(True, True)
         FightBoss.nuke()
@@ -66,7 +66,7 @@ def speedrun(duration):
     if minutes_elapsed < duration:  # only reclaim if we're not out of time
         Misc.reclaim_aug()
 
-    while current_boss < 31 and minutes_elapsed < duration:  # TM unlocks after 31
+    while not FightBoss.wait_for_boss(31) and minutes_elapsed < duration:  # TM unlocks after 31
         Augmentation.augments({"EB": 1}, Misc.get_idle_cap(1))
         Wandoos.wandoos(True, True)
         FightBoss.nuke()
@@ -84,7 +84,7 @@ def speedrun(duration):
         Misc.reclaim_res(magic=True)  # get all magic back from wandoos
         TimeMachine.time_machine(Misc.get_idle_cap(1) * 0.05, m=Misc.get_idle_cap(2) * 0.05)
 
-    while current_boss < 38 and minutes_elapsed < duration:  # BM unlocks after 37
+    while not FightBoss.wait_for_boss(38) and minutes_elapsed < duration:  # BM unlocks after 37
         GoldDiggers.gold_diggers(diggers)
         Augmentation.augments({"EB": 1}, Misc.get_idle_cap(1))
         Wandoos.wandoos(True, True)
@@ -105,7 +105,7 @@ def speedrun(duration):
         print("waiting 10 seconds for gold ritual")
         BloodMagic.toggle_auto_spells(drop=False, gold=False)
 
-    while current_boss < 49 and minutes_elapsed < duration:
+    while not FightBoss.wait_for_boss(49) and minutes_elapsed < duration:
         GoldDiggers.gold_diggers(diggers)
         Wandoos.wandoos(True, True)
         Augmentation.augments({"EB": 1}, Misc.get_idle_cap(1))
@@ -145,11 +145,7 @@ def update_gamestate():
 
     rb_time = Rebirth.get_rebirth_time()
     minutes_elapsed = int(rb_time.timestamp.tm_min)
-    try:
-        current_boss = int(FightBoss.get_current_boss())
-    except ValueError:
-        current_boss = 1
-        print("couldn't get current boss")
+    current_boss = FightBoss.current_boss()
 
     if advanced_training_locked:
         advanced_training_locked = Inputs.check_pixel_color(*coords.COLOR_ADV_TRAINING_LOCKED)
@@ -12,7 +12,7 @@ def speedrun(duration):
     FightBoss.fight()
     diggers = [2, 3, 11, 12]
     Adventure.adventure(highest=True)
-    current_boss = int(FightBoss.get_current_boss())
+    current_boss = FightBoss.current_boss()
     if current_boss > 48:
         Augmentation.augments({"EB": 0.66, "CS": 0.34}, Misc.get_idle_cap(1))
     else:
@@ -47,27 +47,21 @@ def first_rebirth():
         Wandoos.wandoos(True, True)
         FightBoss.nuke()
         time.sleep(2)
-        try:
-            current_boss = int(FightBoss.get_current_boss())
-            if current_boss > 36:
-                Augmentation.augments({"SS": 0.67, "DS": 0.33}, Misc.get_idle_cap(1))
-        except ValueError:
-            print("couldn't get current boss")
+        current_boss = FightBoss.current_boss()
+        if current_boss > 36:
+            Augmentation.augments({"SS": 0.67, "DS": 0.33}, Misc.get_idle_cap(1))
         GoldDiggers.gold_diggers()
 
     while True:
         Wandoos.wandoos(True, True)
         FightBoss.nuke()
         time.sleep(1)
-        try:
-            current_boss = int(FightBoss.get_current_boss())
-            if current_boss > 45:
-                if not final_aug:
-                    Misc.reclaim_aug()
-                    final_aug = True
-                Augmentation.augments({"SM": 0.67, "AA": 0.33}, Misc.get_idle_cap(1))
-        except ValueError:
-            print("couldn't get current boss")
+        current_boss = FightBoss.current_boss()
+        if current_boss > 45:
+            if not final_aug:
+                Misc.reclaim_aug()
+                final_aug = True
+            Augmentation.augments({"SM": 0.67, "AA": 0.33}, Misc.get_idle_cap(1))
         FightBoss.fight()
         GoldDiggers.gold_diggers()
 
@@ -48,25 +48,22 @@ def first_rebirth(duration):
         FightBoss.nuke()
         FightBoss.fight()
         time.sleep(2)
-        try:
-            current_boss = int(FightBoss.get_current_boss())
-            if current_boss > 28 and current_boss < 49:
-                if not buster_assigned:
-                    Misc.reclaim_aug()
-                    buster_assigned = True
-                Augmentation.augments({"EB": 1}, Misc.get_idle_cap(1))
-
-            elif current_boss >= 49:
-                if not final_aug:
-                    Misc.reclaim_aug()
-                    final_aug = True
-                    time.sleep(1)
-                Augmentation.augments({"EB": 0.66, "CS": 0.34}, Misc.get_idle_cap(1))
-            if current_boss > 58 and not adventure_pushed:
-                Adventure.adventure(highest=True)
-                adventure_pushed = True
-        except ValueError:
-            print("couldn't get current boss")
+        current_boss = FightBoss.current_boss()
+        if current_boss > 28 and current_boss < 49:
+            if not buster_assigned:
+                Misc.reclaim_aug()
+                buster_assigned = True
+            Augmentation.augments({"EB": 1}, Misc.get_idle_cap(1))
+
+        elif current_boss >= 49:
+            if not final_aug:
+                Misc.reclaim_aug()
+                final_aug = True
+                time.sleep(1)
+            Augmentation.augments({"EB": 0.66, "CS": 0.34}, Misc.get_idle_cap(1))
+        if current_boss > 58 and not adventure_pushed:
+            Adventure.adventure(highest=True)
+            adventure_pushed = True
         rb_time = Rebirth.get_rebirth_time()
 
 def speedrun(duration):
@@ -83,14 +80,11 @@ def speedrun(duration):
     time.sleep(2)
     Adventure.adventure(highest=True)
 
-    try:
-        current_boss = int(FightBoss.get_current_boss())
-        if current_boss > 28 and current_boss < 49:
-            Augmentation.augments({"EB": 1}, Misc.get_idle_cap(1))
-        elif current_boss >= 49:
-            Augmentation.augments({"EB": 0.66, "CS": 0.34}, Misc.get_idle_cap(1))
-    except ValueError:
-        print("couldn't get current boss")
+    current_boss = FightBoss.current_boss()
+    if current_boss > 28 and current_boss < 49:
+        Augmentation.augments({"EB": 1}, Misc.get_idle_cap(1))
+    elif current_boss >= 49:
+        Augmentation.augments({"EB": 0.66, "CS": 0.34}, Misc.get_idle_cap(1))
 
     while Inputs.check_pixel_color(*coords.COLOR_TM_LOCKED):
         FightBoss.nuke()
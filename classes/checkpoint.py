@@ -0,0 +1,160 @@
+"""Checkpoints of script state so restarts resume where they left off."""
+import atexit
+import datetime
+import os
+import pickle
+import time
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from classes.features  import Adventure, Questing, Rebirth
+from classes.inventory import InventoryModel
+
+
+class Checkpoint:
+    """Stores script state on disk and restores it after a restart.
+
+    Features and scripts keep their state on class attributes. A
+    checkpoint holds the tracked attributes, see track(), and the objects
+    a script keeps, see keep(). save() writes it to a temporary file and
+    replaces the checkpoint with it, so a crash while saving leaves the
+    previous checkpoint intact.
+
+    State that mirrors the screen is volatile, it's only restored if the
+    game kept running in the same rebirth: the rebirth time on screen
+    has to match the saved one plus the time that passed since. Caches
+    that verify themselves, like the inventory slot hashes, and
+    bookkeeping, like run counters, are always restored.
+
+    Checkpoints are pickles, only restore files you wrote yourself.
+
+    Usage: Helper.init()
+           Checkpoint.restore("guffin.checkpoint")
+           while True:
+               ...
+               Checkpoint.save()
+    """
+
+    VERSION = 1
+
+    state = {
+        Adventure: ["itopod_ap_gained", "itopod_kills"],
+        InventoryModel: ["pages", "handled", "known"],
+    }
+    volatile = {
+        Questing: ["inventory_cleaned"],
+        InventoryModel: ["current_page"],
+    }
+    objects = {}  # name -> object kept by a script
+    restored = {}  # name -> object restored for keep()
+
+    path = None
+    interval = 60  # seconds between checkpoints
+    tolerance = 60  # seconds the rebirth time may be off for volatile state to be restored
+    saved_at = None  # time.monotonic() of the last checkpoint
+
+    @staticmethod
+    def track(cls :type, names :Iterable[str], volatile :bool =False) -> None:
+        """Keep attributes of a class in the checkpoint."""
+        (Checkpoint.volatile if volatile else Checkpoint.state).setdefault(cls, []).extend(names)
+
+    @staticmethod
+    def keep(name :str, factory :Callable[[], Any]) -> Any:
+        """Return the object restored under name, or a new one from factory, and keep it in the checkpoint.
+
+        Usage: tracker = Checkpoint.keep("tracker", lambda: Tracker(5))
+        """
+        obj = Checkpoint.restored.pop(name, None)
+        if obj is None:
+            obj = factory()
+        Checkpoint.objects[name] = obj
+        return obj
+
+    @staticmethod
+    def rebirth_time() -> Optional[float]:
+        """Return the rebirth time from the rebirth clock, None if it was never read."""
+        if Rebirth.clock_seconds is None:
+            return None
+        return Rebirth.clock_seconds + time.monotonic() - Rebirth.clock_synced_at
+
+    @staticmethod
+    def __key(cls :type) -> str:
+        return f"{cls.__module__}.{cls.__qualname__}"
+
+    @staticmethod
+    def __collect(tracked :Dict[type, List[str]]) -> Dict[str, Dict[str, Any]]:
+        return {Checkpoint.__key(cls): {name: getattr(cls, name) for name in names}
+                for cls, names in tracked.items()}
+
+    @staticmethod
+    def __apply(tracked :Dict[type, List[str]], values :Dict[str, Dict[str, Any]]) -> None:
+        """Set the saved values of the attributes that are still tracked."""
+        for cls, names in tracked.items():
+            saved = values.get(Checkpoint.__key(cls), {})
+            for name in names:
+                if name in saved:
+                    setattr(cls, name, saved[name])
+
+    @staticmethod
+    def save(force :bool =False) -> bool:
+        """Write a checkpoint if interval seconds passed since the last one, returns True if it did.
+
+        Keyword arguments
+        force -- Write it regardless of the interval.
+        """
+        if Checkpoint.path is None:
+            return False
+        if not force and Checkpoint.saved_at is not None and time.monotonic() - Checkpoint.saved_at < Checkpoint.interval:
+            return False
+        data = {
+            "version": Checkpoint.VERSION,
+            "time": time.time(),
+            "rebirth_time": Checkpoint.rebirth_time(),
+            "state": Checkpoint.__collect(Checkpoint.state),
+            "volatile": Checkpoint.__collect(Checkpoint.volatile),
+            "objects": Checkpoint.objects,
+        }
+        tmp = Checkpoint.path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, Checkpoint.path)
+        Checkpoint.saved_at = time.monotonic()
+        return True
+
+    @staticmethod
+    def restore(path :str) -> bool:
+        """Restore the checkpoint in path and keep saving to it, also when the script exits.
+
+        Requires Helper.init(), the rebirth time is read to check whether the
+        volatile state still holds. Returns True if the volatile state was
+        restored too.
+        """
+        if Checkpoint.path is None:
+            atexit.register(Checkpoint.save, True)
+        Checkpoint.path = path
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError) as e:
+            print(f"Ignoring checkpoint {path}: {e}")
+            return False
+        if not isinstance(data, dict) or data.get("version") != Checkpoint.VERSION:
+            print(f"Ignoring checkpoint {path}: unknown version")
+            return False
+
+        Checkpoint.__apply(Checkpoint.state, data["state"])
+        Checkpoint.restored = dict(data["objects"])
+        age = time.time() - data["time"]
+        current = data["rebirth_time"] is not None and any(data["volatile"].values())
+        if current:
+            expected = data["rebirth_time"] + age
+            current = abs(Rebirth.rt_to_seconds(sync=True) - expected) <= Checkpoint.tolerance
+        if current:
+            Checkpoint.__apply(Checkpoint.volatile, data["volatile"])
+        print(f"Restored checkpoint from {datetime.timedelta(seconds=round(age))} ago"
+              + ("" if current else ", the game changed since so the screen will be checked again"))
+        return current
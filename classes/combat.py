@@ -0,0 +1,175 @@
+"""Frame driven adventure combat and ability cooldown tracking."""
+from __future__ import annotations
+
+import time
+
+from collections import namedtuple
+from typing      import Callable, Iterable, Optional
+
+from classes.inputs import Inputs
+from classes.lazy   import LazyModule
+
+import constants   as const
+import coordinates as coords
+
+
+numpy = LazyModule("numpy")
+
+CombatFlags = namedtuple("CombatFlags", "dead enemy_alive boss attack_ready idle")
+
+
+class Combat:
+    """Runs adventure combat one captured frame per tick.
+
+    Every tick grabs a single frame, decodes all combat flags from it and
+    issues at most one action. Kills and idle ticks are recorded so the
+    tick rate can be tuned for XP/PP per hour against CPU usage.
+
+    Usage: engine = Combat(rate=20)
+           engine.run(duration, decide)
+    where decide(flags) returns a callable to run this tick, or None.
+    """
+
+    # Ticks per second used when no rate is passed to Combat().
+    tick_rate = 20
+
+    def __init__(self, rate :float =None) -> None:
+        self.rate = rate or Combat.tick_rate
+        self.ticks = 0
+        self.idle_ticks = 0
+        self.actions = 0
+        self.kills = 0
+        self.elapsed = 0
+        self.stopped = False
+        self.__enemy_alive = False
+
+    @staticmethod
+    def read_flags(frame :numpy.ndarray) -> CombatFlags:
+        """Decode all combat flags from one frame."""
+        return CombatFlags(
+            dead=Inputs.check_frame_color(frame, *coords.IS_DEAD),
+            enemy_alive=Inputs.check_frame_color(frame, *coords.IS_ENEMY_ALIVE),
+            boss=Inputs.check_frame_color(frame, *coords.IS_BOSS_CROWN),
+            attack_ready=Inputs.check_frame_color(frame, *coords.COLOR_REGULAR_ATTACK_READY),
+            idle=Inputs.check_frame_color(frame, *coords.IS_IDLE),
+        )
+
+    def stop(self) -> None:
+        """Stop the engine after the current tick."""
+        self.stopped = True
+
+    def tick(self, decide :Callable[[CombatFlags], Optional[Callable[[], None]]]) -> CombatFlags:
+        """Read one frame, run at most one action and update the counters."""
+        flags = Combat.read_flags(Inputs.get_frame())
+        self.ticks += 1
+        if self.__enemy_alive and flags.dead:
+            self.kills += 1
+        self.__enemy_alive = flags.enemy_alive
+
+        action = decide(flags)
+        if action is None:
+            self.idle_ticks += 1
+        else:
+            action()
+            self.actions += 1
+        return flags
+
+    def run(self, duration :float, decide :Callable[[CombatFlags], Optional[Callable[[], None]]]) -> None:
+        """Tick at the configured rate for duration seconds or until stop() is called."""
+        start = time.monotonic()
+        end = start + duration
+        interval = 1 / self.rate
+        next_tick = start
+        self.stopped = False
+        while not self.stopped and time.monotonic() < end:
+            self.tick(decide)
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:  # an action took longer than a tick, don't try to catch up
+                next_tick = time.monotonic()
+        self.elapsed += time.monotonic() - start
+
+    def kills_per_minute(self) -> float:
+        """Return the average kills per minute over all runs."""
+        if not self.elapsed:
+            return 0
+        return self.kills / self.elapsed * 60
+
+    def report(self) -> str:
+        """Return a one line summary of the recorded counters."""
+        idle = self.idle_ticks / self.ticks * 100 if self.ticks else 0
+        return (f"{self.kills} kills ({self.kills_per_minute():.1f}/min) | "
+                f"{self.ticks} ticks at {self.rate}/s, {idle:.0f}% idle")
+
+
+class AbilityModel:
+    """Predicts ability cooldowns so combat sleeps until the next cast instead of polling.
+
+    The model is updated from a single batched probe of the ability bar
+    after each cast. Cooldowns start from const.ABILITY_COOLDOWNS and are
+    lowered whenever an ability is seen ready earlier than predicted.
+    """
+
+    def __init__(self) -> None:
+        self.cooldowns = dict(const.ABILITY_COOLDOWNS)
+        self.ready_at = {}  # ability -> time.monotonic() it's predicted ready, missing if unknown
+        self.last_cast = {}
+        self.global_ready = 0
+
+    def cast(self, ability :int, now :float =None) -> None:
+        """Record that ability was cast."""
+        now = time.monotonic() if now is None else now
+        self.global_ready = now + const.ABILITY_GLOBAL_COOLDOWN
+        if ability == 0:  # regular attack isn't part of the probe
+            return
+        self.last_cast[ability] = now
+        cooldown = max(self.cooldowns.get(ability, 0), const.ABILITY_GLOBAL_COOLDOWN)
+        self.ready_at[ability] = now + cooldown
+
+    def update(self, ready :Iterable[int], now :float =None) -> bool:
+        """Update the model from the abilities a probe found ready.
+
+        Returns True if the probe differs from the prediction, which means
+        the ability queue should be rebuilt.
+        """
+        now = time.monotonic() if now is None else now
+        ready = set(ready)
+        changed = False
+        for ability in ready:
+            predicted = self.ready_at.get(ability)
+            if predicted is None or predicted > now:
+                changed = True
+                if predicted is not None and ability in self.last_cast:
+                    self.cooldowns[ability] = max(now - self.last_cast[ability],
+                                                  const.ABILITY_GLOBAL_COOLDOWN)
+                self.ready_at[ability] = now
+        for ability, predicted in list(self.ready_at.items()):
+            if ability not in ready and predicted <= now:
+                # Took longer than predicted, wait for a probe to see it ready again.
+                changed = True
+                del self.ready_at[ability]
+        return changed
+
+    def is_ready(self, ability :int, now :float =None) -> bool:
+        """Return True if ability is predicted to be off cooldown."""
+        now = time.monotonic() if now is None else now
+        predicted = self.ready_at.get(ability)
+        return predicted is not None and predicted <= now
+
+    def wait_global(self) -> None:
+        """Sleep until the global cooldown is predicted to be over."""
+        delay = self.global_ready - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def wait_for(self, abilities :Iterable[int]) -> None:
+        """Sleep until all abilities are predicted to be off cooldown.
+
+        Abilities without a prediction are ignored, verify with a probe.
+        """
+        known = [self.ready_at[a] for a in abilities if a in self.ready_at]
+        delay = max(known + [self.global_ready]) - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
@@ -1,7 +1,20 @@
 """Handles messages to discord."""
-from discord_webhook import DiscordWebhook, DiscordEmbed
+from __future__ import annotations
+
+import atexit
+import datetime
+import queue
+import threading
+import time
+
+from typing import Dict, List, Optional
+
 import usersettings as userset
 
+from classes.lazy import LazyModule
+
+requests = LazyModule("requests")  # only the worker posts, see LazyModule
+
 
 class Discord:
     """Handles messages to discord.
@@ -11,15 +24,40 @@ class Discord:
     https://support.discordapp.com/hc/en-us/articles/228383668-Intro-to-Webhooks
 
     Add your webhooks to the usersettings.py file.
+
+    Messages are sent from a background thread so a slow or unreachable
+    webhook never stalls the script. Messages that arrive close together
+    are sent as one message with several embeds, the rate limit headers of
+    the webhook are honored and failed posts are retried with an
+    exponential backoff. The queue is bounded, messages are dropped when
+    it's full, and it's flushed when the script exits.
     """
 
     INFO = 0
     ERROR = 1
 
+    MAX_QUEUE = 100
+    MAX_EMBEDS = 10  # per message, the limit of the Discord API
+    BATCH_DELAY = 1  # seconds to wait for more messages before sending
+    MAX_RETRIES = 5
+    BACKOFF = 1  # seconds before the first retry, doubled after every retry
+    MAX_BACKOFF = 60
+    TIMEOUT = 10
+
+    messages = queue.Queue(MAX_QUEUE)
+    worker = None
+    lock = threading.Lock()
+    rate_limited_until = 0  # time.monotonic() when the webhook accepts messages again
+
+    sent = 0
+    dropped = 0
+    failed = 0
+    retries = 0
+
     @staticmethod
     def send_message(text :str, level :int =INFO) -> None:
-        """Send message to webhook.
-        
+        """Queue a message for the webhook, returns without waiting for it to be sent.
+
         Keyword arguments
         text  -- Text of the message to send to the Discord webhook.
         level -- Whether to send an info message or error message.
@@ -39,9 +77,125 @@ class Discord:
         if not url:
             return
 
-        webhook = DiscordWebhook(url=url)
-        embed = DiscordEmbed(title=title, description=text, color=color)
-        embed.set_timestamp()
-        webhook.add_embed(embed)
-        webhook.execute()
-        return
+        embed = {"title": title, "description": text, "color": color,
+                 "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()}
+        Discord.start()
+        try:
+            Discord.messages.put_nowait((url, embed))
+        except queue.Full:
+            Discord.dropped += 1
+
+    @staticmethod
+    def start() -> None:
+        """Start the sender thread if it isn't running."""
+        with Discord.lock:
+            if Discord.worker is not None and Discord.worker.is_alive():
+                return
+            Discord.worker = threading.Thread(target=Discord.__work, name="discord", daemon=True)
+            Discord.worker.start()
+            atexit.register(Discord.flush)
+
+    @staticmethod
+    def flush(timeout :float =30) -> bool:
+        """Send every queued message and stop the sender thread.
+
+        Returns False if the messages couldn't be sent within timeout
+        seconds, send_message() starts the thread again.
+        """
+        with Discord.lock:
+            worker = Discord.worker
+            if worker is None or not worker.is_alive():
+                return Discord.messages.empty()
+            atexit.unregister(Discord.flush)
+        try:
+            Discord.messages.put(None, timeout=timeout)
+        except queue.Full:
+            return False
+        worker.join(timeout)
+        return not worker.is_alive()
+
+    @staticmethod
+    def report() -> Dict[str, int]:
+        """Return the counters of the sender."""
+        return {"queue depth": Discord.messages.qsize(),
+                "sent": Discord.sent,
+                "dropped": Discord.dropped,
+                "failed": Discord.failed,
+                "retries": Discord.retries}
+
+    @staticmethod
+    def __work() -> None:
+        """Send queued messages until flush() queues None."""
+        while True:
+            item = Discord.messages.get()
+            if item is None:
+                return
+            batch = {item[0]: [item[1]]}
+            stop = False
+            end = time.monotonic() + Discord.BATCH_DELAY
+            while not stop:
+                try:
+                    item = Discord.messages.get(timeout=max(end - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.setdefault(item[0], []).append(item[1])
+            for url, embeds in batch.items():
+                for i in range(0, len(embeds), Discord.MAX_EMBEDS):
+                    Discord.__post(url, embeds[i:i + Discord.MAX_EMBEDS])
+            if stop:
+                return
+
+    @staticmethod
+    def __post(url :str, embeds :List[dict]) -> None:
+        """Post embeds as one message, retrying until it's sent or retries run out."""
+        delay = Discord.BACKOFF
+        for attempt in range(Discord.MAX_RETRIES + 1):
+            wait = Discord.rate_limited_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = requests.post(url, json={"embeds": embeds}, timeout=Discord.TIMEOUT)
+            except requests.RequestException:
+                response = None
+            if response is not None:
+                Discord.__rate_limit(response)
+                if response.status_code < 400:
+                    Discord.sent += len(embeds)
+                    return
+                if response.status_code != 429 and response.status_code < 500:
+                    break  # the request itself is wrong, retrying won't help
+            if attempt < Discord.MAX_RETRIES:
+                Discord.retries += 1
+                if response is None or response.status_code != 429:
+                    time.sleep(delay)
+                    delay = min(delay * 2, Discord.MAX_BACKOFF)
+        Discord.failed += len(embeds)
+        print(f"Couldn't send {len(embeds)} message(s) to Discord.")
+
+    @staticmethod
+    def __rate_limit(response :requests.Response) -> None:
+        """Remember when the webhook accepts messages again."""
+        wait = None
+        if response.status_code == 429:
+            wait = Discord.__seconds(response.headers.get("Retry-After"))
+            if wait is None:
+                try:
+                    wait = Discord.__seconds(response.json().get("retry_after"))
+                except ValueError:
+                    pass
+            if wait is None:
+                wait = Discord.BACKOFF
+        elif response.headers.get("X-RateLimit-Remaining") == "0":
+            wait = Discord.__seconds(response.headers.get("X-RateLimit-Reset-After"))
+        if wait is not None:
+            Discord.rate_limited_until = time.monotonic() + wait
+
+    @staticmethod
+    def __seconds(value :Optional[str]) -> Optional[float]:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
@@ -1,32 +1,118 @@
 """Feature classes handle the different features in the game."""
+from __future__ import annotations
 
 import datetime
+import heapq
+import json
 import math
+import os
 import re
 import time
 
 from collections import deque, namedtuple
-from typing      import Dict, List, Tuple
-from PIL.Image   import Image as PILImage
-
-from deprecated import deprecated
+from typing      import TYPE_CHECKING, Dict, List, Tuple
 
 import constants    as const
 import coordinates  as coords
 import usersettings as userset
 
+from classes.combat     import AbilityModel, Combat
 from classes.inputs     import Inputs
+from classes.inventory  import InventoryModel
+from classes.itopod     import ItopodPlanner
+from classes.lazy       import LazyModule, deprecated
 from classes.navigation import Navigation
 from classes.window     import Window
 
+if TYPE_CHECKING:
+    from PIL.Image import Image as PILImage
+
+numpy = LazyModule("numpy")
+
 
 class FightBoss:
+    # Boss tracker. The last boss read is a lower bound until the next
+    # rebirth, every fight click raises the upper bound by one and a nuke
+    # makes it unknown. The boss is only read again when the bounds can't
+    # answer a question and the last read is older than boss_ttl seconds.
+    boss = 0
+    boss_max = 0  # highest boss possible since the last read, None if unknown
+    boss_read_at = 0
+    boss_ttl = 10
+
     @staticmethod
-    def get_current_boss() -> int:
+    def get_current_boss() -> str:
         """Go to fight and read current boss number."""
         Navigation.menu("fight")
-        boss = Inputs.ocr(*coords.OCR_BOSS, debug=False)
-        return Inputs.remove_letters(boss)
+        boss = Inputs.ocr_digits(*coords.OCR_BOSS)
+        if boss:
+            FightBoss.record_boss(int(boss))
+        return boss
+
+    @staticmethod
+    def record_boss(boss :int, read :bool =True) -> None:
+        """Record the current boss.
+
+        Keyword arguments
+        boss -- The current boss, 0 if unknown.
+        read -- False if the boss is known without reading it, like 1 after
+                a rebirth. It's trusted until the next fight or nuke, after
+                which current_boss() reads it without waiting for boss_ttl.
+        """
+        FightBoss.boss = boss
+        FightBoss.boss_max = boss if boss else None
+        FightBoss.boss_read_at = time.monotonic() if read else 0
+
+    @staticmethod
+    def current_boss(max_age :float =None) -> int:
+        """Return the current boss, read again if it's older than max_age seconds.
+
+        Keyword arguments
+        max_age -- Defaults to FightBoss.boss_ttl.
+        """
+        if FightBoss.boss_stale(max_age):
+            FightBoss.get_current_boss()
+        return FightBoss.boss or 1
+
+    @staticmethod
+    def boss_stale(max_age :float =None) -> bool:
+        """Return True if current_boss() would read the boss again.
+        
+        Keyword arguments
+        max_age -- Defaults to FightBoss.boss_ttl.
+        """
+        max_age = FightBoss.boss_ttl if max_age is None else max_age
+        if FightBoss.boss and FightBoss.boss_max == FightBoss.boss:
+            return False  # no fights since the last read
+        return not FightBoss.boss or time.monotonic() - FightBoss.boss_read_at >= max_age
+
+    @staticmethod
+    def wait_for_boss(target :int, timeout :float =0) -> bool:
+        """Return True if the current boss is at least target.
+
+        Keyword arguments
+        target  -- The boss to wait for.
+        timeout -- Seconds to keep nuking until target is reached. With the
+                   default of 0 the boss is checked once.
+        """
+        end = time.monotonic() + timeout
+        while True:
+            if FightBoss.boss >= target:
+                return True
+            if FightBoss.boss_max is not None and FightBoss.boss_max < target and timeout <= 0:
+                return False
+            if FightBoss.current_boss() >= target:
+                return True
+            if time.monotonic() >= end:
+                return False
+            FightBoss.nuke()
+            time.sleep(userset.MEDIUM_SLEEP)
+
+    @staticmethod
+    def __fought(clicks :int) -> None:
+        """Raise the upper bound of the boss after fight clicks."""
+        if FightBoss.boss_max is not None:
+            FightBoss.boss_max += clicks
 
     @staticmethod
     def nuke(boss :int =None) -> None:
@@ -36,10 +122,13 @@ class FightBoss:
         boss -- If provided, will fight until reached
                 If omitted, will hit nuke instead.
         """
+        if boss and FightBoss.boss >= boss:
+            return
         Navigation.menu("fight")
         if boss:
             for _ in range(boss):
                 Inputs.click(*coords.FIGHT, fast=True)
+            FightBoss.__fought(boss)
             time.sleep(userset.SHORT_SLEEP)
             try:
                 current_boss = int(FightBoss.get_current_boss())
@@ -50,6 +139,7 @@ class FightBoss:
                 bossdiff = boss - current_boss
                 for _ in range(0, bossdiff):
                     Inputs.click(*coords.FIGHT, fast=True)
+                FightBoss.__fought(bossdiff)
                 time.sleep(userset.SHORT_SLEEP)
                 try:
                     current_boss = int(FightBoss.get_current_boss())
@@ -61,12 +151,14 @@ class FightBoss:
                     break
         else:
             Inputs.click(*coords.NUKE)
+            FightBoss.boss_max = None
 
     @staticmethod
     def fight() ->None:
         """Navigate to Fight Boss and click fight."""
         Navigation.menu("fight")
         Inputs.click(*coords.FIGHT)
+        FightBoss.__fought(1)
 
 class MoneyPit:
     @staticmethod
@@ -122,6 +214,13 @@ class Adventure:
     }
     itopod_ap_gained = 0
     itopod_kills = 0
+    combat = None  # Combat engine of the last snipe, holds kill and tick counters
+    abilities = AbilityModel()  # Ability cooldowns, kept between fights
+    itopod_planner = None
+    titan_schedule = []  # heap of (time.time() the titan is due, titan id)
+    titan_synced_at = 0
+    titan_resync_interval = 1800
+    itopod_ap_file = "itopod_ap.json"
 
     mega_buff_unlocked = False
     oh_shit_unlocked = False
@@ -176,7 +275,8 @@ class Adventure:
         highest :bool =False,
         bosses :bool =False,
         manual :bool =False,
-        fast :bool =False) -> None:
+        fast :bool =False,
+        rate :float =None) -> None:
         """Go to adventure and snipe bosses in specified zone.
 
         Keyword arguments
@@ -194,6 +294,7 @@ class Adventure:
                   this to remove the overhead from check_pixel_color().
                   It should give you higher xp/h. Remember that move CD
                   is capped at 0.8s, so there's no reason to go lower.
+        rate   -- Frames read per second, defaults to Combat.tick_rate.
         """
         Navigation.menu("adventure")
         if highest:
@@ -209,43 +310,47 @@ class Adventure:
         if Inputs.check_pixel_color(*coords.IS_IDLE):
             Inputs.click(*coords.ABILITY_IDLE_MODE)
         
-        end = time.time() + duration * 60
-        while time.time() < end:
-            if fast:
+        if fast:
+            end = time.time() + duration * 60
+            while time.time() < end:
                 Inputs.click(*coords.ABILITY_REGULAR_ATTACK, fast=True)
-                continue
-
-            Inputs.click(625, 500)  # click somewhere to move tooltip
-            if not Inputs.check_pixel_color(*coords.IS_DEAD):
-                if bosses:
-                    if Inputs.check_pixel_color(*coords.IS_BOSS_CROWN):
-                        enemy_alive = True
-                        if manual:
-                            Adventure.kill_enemy()
-                        else:
-                            while enemy_alive:
-                                enemy_alive = not Inputs.check_pixel_color(*coords.IS_DEAD)
-                                if Inputs.check_pixel_color(*coords.COLOR_REGULAR_ATTACK_READY):
-                                    Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
-                                time.sleep(0.1)
-                        if once:
-                            break
-                    else:
-                        # Send left arrow and right arrow to refresh monster.
-                        Inputs.send_arrow_press(left=True)
-                        Inputs.send_arrow_press(left=False)
-                else:
-                    if manual:
-                        Adventure.kill_enemy()
-                        return
-                    else:
-                        Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
-            time.sleep(0.01)
+            Inputs.click(*coords.ABILITY_IDLE_MODE)
+            return
+        
+        engine = Combat(rate)
+        boss_engaged = False
+        
+        def decide(flags):
+            nonlocal boss_engaged
+            if flags.dead:
+                if boss_engaged and once:
+                    engine.stop()
+                boss_engaged = False
+                return None
+            if not flags.enemy_alive:  # health bar is hidden, most likely by a tooltip
+                return lambda: Inputs.click(625, 500)
+            if bosses and not flags.boss:
+                # Send left arrow and right arrow to refresh monster.
+                return lambda: (Inputs.send_arrow_press(left=True), Inputs.send_arrow_press(left=False))
+            boss_engaged = bosses
+            if manual:
+                if not bosses:
+                    engine.stop()
+                return Adventure.kill_enemy
+            if flags.attack_ready:
+                return lambda: Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
+            return None
+        
+        engine.run(duration * 60, decide)
+        Adventure.combat = engine
+        print(f"Snipe: {engine.report()}")
+        if manual and not bosses:
+            return
         
         Inputs.click(*coords.ABILITY_IDLE_MODE)
     
     @staticmethod
-    def itopod_snipe(duration :int, auto :bool =False, fast :bool =False) -> None:
+    def itopod_snipe(duration :int, auto :bool =False, fast :bool =False, rate :float =None) -> None:
         """Manually snipes ITOPOD for increased speed PP/h.
         
         Keyword arguments:
@@ -257,6 +362,7 @@ class Adventure:
                     this to remove the overhead from check_pixel_color().
                     It should give you higher xp/h. Remember that move CD
                     is capped at 0.8s, so there's no reason to go lower.
+        rate     -- Frames read per second, defaults to Combat.tick_rate.
         """
         end = time.time() + duration
         Adventure.current_adventure_zone = 0
@@ -276,15 +382,21 @@ class Adventure:
         if Inputs.check_pixel_color(*coords.IS_IDLE):
             Inputs.click(*coords.ABILITY_IDLE_MODE)
         
-        while time.time() < end:
-            if fast:
+        if fast:
+            while time.time() < end:
                 Inputs.click(*coords.ABILITY_REGULAR_ATTACK, fast=True)
-                continue
-            if (Inputs.check_pixel_color(*coords.IS_ENEMY_ALIVE) and
-               Inputs.check_pixel_color(*coords.COLOR_REGULAR_ATTACK_READY)):
-                Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
-            else:
-                time.sleep(0.01)
+            Inputs.click(*coords.ABILITY_IDLE_MODE)
+            return
+        
+        def decide(flags):
+            if flags.enemy_alive and flags.attack_ready:
+                return lambda: Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
+            return None
+        
+        engine = Combat(rate)
+        engine.run(end - time.time(), decide)
+        Adventure.combat = engine
+        print(f"ITOPOD snipe: {engine.report()}")
         
         Inputs.click(*coords.ABILITY_IDLE_MODE)
     
@@ -299,48 +411,93 @@ class Adventure:
             if time.time() > start + 5:
                 print("Couldn't detect enemy in kill_enemy()")
                 return
-        queue = deque(Adventure.get_ability_queue())
-        while not Inputs.check_pixel_color(*coords.IS_DEAD):
+        Adventure.__fight()
+    
+    @staticmethod
+    def __fight() -> None:
+        """Use abilities until the enemy is dead.
+        
+        Casts are scheduled from Adventure.abilities instead of polling the
+        global cooldown, and the ability bar is probed once per cast. The
+        queue is only rebuilt when the probe disagrees with the model or
+        the heal threshold changes.
+        """
+        model = Adventure.abilities
+        frame = Inputs.get_frame()
+        model.update(Adventure.get_ready_abilities(frame))
+        heal = Inputs.check_frame_color(frame, *coords.PLAYER_HEAL_THRESHOLD)
+        queue = deque(Adventure.get_ability_queue(frame))
+        while not Inputs.check_frame_color(frame, *coords.IS_DEAD):
             if not queue:
-                queue = deque(Adventure.get_ability_queue())
+                queue = deque(Adventure.get_ability_queue(frame))
             ability = queue.popleft()
-            if ability <= 4:
-                x = coords.ABILITY_ROW1X + ability * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW1Y
+            Inputs.click(*Adventure.get_ability_coords(ability))
+            model.cast(ability)
+            model.wait_global()
             
-            if ability >= 5 and ability <= 10:
-                x = coords.ABILITY_ROW2X + (ability - 5) * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW2Y
-            
-            if ability > 10:
-                x = coords.ABILITY_ROW3X + (ability - 11) * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW3Y
-            
-            Inputs.click(x, y)
-            time.sleep(userset.LONG_SLEEP)
-            color = Inputs.get_pixel_color(coords.ABILITY_ROW1X,
-                                           coords.ABILITY_ROW1Y)
+            frame = Inputs.get_frame()
+            # Only poll if the global cooldown outlasted the prediction.
+            start = time.time()
+            while (not Inputs.check_frame_color(frame, coords.ABILITY_ROW1X, coords.ABILITY_ROW1Y,
+                                                coords.ABILITY_ROW1_READY_COLOR)
+                   and not Inputs.check_frame_color(frame, *coords.IS_DEAD)
+                   and time.time() < start + 2):
+                time.sleep(0.05)
+                frame = Inputs.get_frame()
             
-            while color != coords.ABILITY_ROW1_READY_COLOR:
-                time.sleep(0.03)
-                color = Inputs.get_pixel_color(coords.ABILITY_ROW1X,
-                                               coords.ABILITY_ROW1Y)
+            changed = model.update(Adventure.get_ready_abilities(frame))
+            heal_now = Inputs.check_frame_color(frame, *coords.PLAYER_HEAL_THRESHOLD)
+            if changed or heal_now != heal:
+                heal = heal_now
+                queue = deque(Adventure.get_ability_queue(frame))
     
     @staticmethod
-    def check_titan_status() -> List[int]:
-        """Check to see if any titans are ready."""
+    def get_titan_respawns() -> Dict[int, int]:
+        """Read the titan respawn timers.
+        
+        Returns a dictionary of titan id to seconds left until it spawns,
+        0 means the titan is ready. Titans without a readable timer are
+        left out.
+        """
         Inputs.click(*coords.MENU_ITEMS["adventure"], button="right")
         text = Inputs.ocr(*coords.OCR_TITAN_RESPAWN).lower()
-        ready = []
+        respawns = {}
         i = 1
         for line in text.split('\n'):
             if line == '' or line == '\n':
                 continue
             if "ready" in line:
-                ready.append(i)
+                respawns[i] = 0
+            else:
+                match = re.search(r"(?:(\d+):)?(\d+):(\d+)", line)
+                if match:
+                    hours, minutes, seconds = (int(x) if x else 0 for x in match.groups())
+                    respawns[i] = (hours * 60 + minutes) * 60 + seconds
             if "spawn" in line:
                 i += 1
-        return ready
+        return respawns
+    
+    @staticmethod
+    def check_titan_status() -> List[int]:
+        """Check to see if any titans are ready.
+        
+        The respawn timers are only read when a titan is due according to
+        the last reading, or when the last reading is older than
+        Adventure.titan_resync_interval seconds. Otherwise this returns an
+        empty list without touching the game. A reading without any titan
+        is read again on the next call.
+        """
+        now = time.time()
+        schedule = Adventure.titan_schedule
+        if (Adventure.titan_synced_at and now < Adventure.titan_synced_at + Adventure.titan_resync_interval
+                and (not schedule or schedule[0][0] > now)):
+            return []
+        
+        respawns = Adventure.get_titan_respawns()
+        Adventure.titan_schedule = [(now + seconds, titan) for titan, seconds in respawns.items()]
+        heapq.heapify(Adventure.titan_schedule)
+        Adventure.titan_synced_at = now if respawns else 0
+        return [titan for titan, seconds in respawns.items() if seconds == 0]
     
     @staticmethod
     def kill_titan(target :int, mega :bool =True) -> None:
@@ -357,46 +514,35 @@ class Adventure:
             Inputs.click(*coords.ABILITY_IDLE_MODE)
         
         Inputs.click(*coords.LEFT_ARROW, button="right")
+        model = Adventure.abilities
         charge = False
         parry = False
         if mega:
-            while not Inputs.check_pixel_color(*coords.COLOR_MEGA_BUFF_READY) or not charge or not parry:
-                queue = Adventure.get_ability_queue()
-                Inputs.click(625, 600)
-                if 2 in queue and not parry:
-                    x = coords.ABILITY_ROW1X + 2 * coords.ABILITY_OFFSETX
-                    y = coords.ABILITY_ROW1Y
-                    Inputs.click(x, y)
-                    parry = True
-                    time.sleep(1)  # wait for global cooldown
-                if 9 in queue and not charge:
-                    x = coords.ABILITY_ROW2X + (9 - 5) * coords.ABILITY_OFFSETX
-                    y = coords.ABILITY_ROW2Y
-                    Inputs.click(x, y)
-                    charge = True
-                    time.sleep(1)  # wait for global cooldown
-                time.sleep(userset.MEDIUM_SLEEP)
-        
+            buff_ready = coords.COLOR_MEGA_BUFF_READY
         else:
-            while not Inputs.check_pixel_color(*coords.COLOR_ULTIMATE_BUFF_READY) or not charge or not parry:
-                queue = Adventure.get_ability_queue()
-                Inputs.click(625, 600)
-                if 2 in queue and not parry:
-                    x = coords.ABILITY_ROW1X + 2 * coords.ABILITY_OFFSETX
-                    y = coords.ABILITY_ROW1Y
-                    Inputs.click(x, y)
-                    parry = True
-                    time.sleep(1)  # wait for global cooldown
-                if 9 in queue and not charge:
-                    x = coords.ABILITY_ROW2X + 4 * coords.ABILITY_OFFSETX
-                    y = coords.ABILITY_ROW2Y
-                    Inputs.click(x, y)
-                    charge = True
-                    time.sleep(1)  # wait for global cooldown
-                time.sleep(userset.MEDIUM_SLEEP)
+            buff_ready = coords.COLOR_ULTIMATE_BUFF_READY
+        
+        frame = Inputs.get_frame()
+        while not Inputs.check_frame_color(frame, *buff_ready) or not charge or not parry:
+            queue = Adventure.get_ability_queue(frame)
+            model.update(Adventure.get_ready_abilities(frame))
+            Inputs.click(625, 600)
+            if 2 in queue and not parry:
+                Inputs.click(*Adventure.get_ability_coords(2))
+                model.cast(2)
+                parry = True
+                model.wait_global()
+            if 9 in queue and not charge:
+                Inputs.click(*Adventure.get_ability_coords(9))
+                model.cast(9)
+                charge = True
+                model.wait_global()
+            time.sleep(userset.MEDIUM_SLEEP)
+            frame = Inputs.get_frame()
         
         buffs = [2, 9]
         print("Waiting for charge and parry to be ready")
+        model.wait_for(buffs)
         while not all(x in Adventure.get_ability_queue() for x in buffs):
             time.sleep(.5)
         
@@ -411,69 +557,56 @@ class Adventure:
                 print("Couldn't detect enemy in kill_titan()")
                 return
         
-        queue = deque(Adventure.get_ability_queue())
-        while not Inputs.check_pixel_color(*coords.IS_DEAD):
-            if not queue:
-                queue = deque(Adventure.get_ability_queue())
-            
-            ability = queue.popleft()
-            if ability <= 4:
-                x = coords.ABILITY_ROW1X + ability * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW1Y
-            
-            if ability >= 5 and ability <= 10:
-                x = coords.ABILITY_ROW2X + (ability - 5) * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW2Y
-            
-            if ability > 10:
-                x = coords.ABILITY_ROW3X + (ability - 11) * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW3Y
-            
-            Inputs.click(x, y)
-            time.sleep(userset.LONG_SLEEP)
-            color = Inputs.get_pixel_color(coords.ABILITY_ROW1X,
-                                           coords.ABILITY_ROW1Y)
-            
-            while color != coords.ABILITY_ROW1_READY_COLOR:
-                time.sleep(0.05)
-                color = Inputs.get_pixel_color(coords.ABILITY_ROW1X,
-                                               coords.ABILITY_ROW1Y)
+        Adventure.__fight()
+        # The titan's next spawn is unknown until the timers are read again.
+        heapq.heappush(Adventure.titan_schedule, (time.time(), target))
     
     @staticmethod
-    def get_ability_queue() -> List[int]:
-        """Return a queue of usable abilities."""
+    def get_ability_coords(ability :int) -> coords.Pixel:
+        """Return the coordinates of an ability, 0 is regular attack."""
+        if ability <= 4:
+            x = coords.ABILITY_ROW1X + ability * coords.ABILITY_OFFSETX
+            y = coords.ABILITY_ROW1Y
+        elif ability <= 10:
+            x = coords.ABILITY_ROW2X + (ability - 5) * coords.ABILITY_OFFSETX
+            y = coords.ABILITY_ROW2Y
+        else:
+            x = coords.ABILITY_ROW3X + (ability - 11) * coords.ABILITY_OFFSETX
+            y = coords.ABILITY_ROW3Y
+        return coords.Pixel(x, y)
+    
+    @staticmethod
+    def get_ready_abilities(frame :numpy.ndarray =None) -> List[int]:
+        """Return the abilities that are ready, read from a single frame."""
+        if frame is None: frame = Inputs.get_frame()
         ready = []
-        queue = []
-        
-        # Add all abilities that are ready to the ready array
         for i in range(1, 16):
-            if i <= 4:
-                x = coords.ABILITY_ROW1X + i * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW1Y
-                color = Inputs.get_pixel_color(x, y)
-                if color == coords.ABILITY_ROW1_READY_COLOR:
-                    ready.append(i)
-            if i >= 5 and i <= 10:
-                if Adventure.mega_buff_unlocked and i == 6:
-                    continue
-                x = coords.ABILITY_ROW2X + (i - 5) * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW2Y
-                color = Inputs.get_pixel_color(x, y)
-                if color == coords.ABILITY_ROW2_READY_COLOR:
-                    ready.append(i)
-            if i > 10:
-                x = coords.ABILITY_ROW3X + (i - 11) * coords.ABILITY_OFFSETX
-                y = coords.ABILITY_ROW3Y
-                color = Inputs.get_pixel_color(x, y)
-                if color == coords.ABILITY_ROW3_READY_COLOR:
-                    ready.append(i)
+            if Adventure.mega_buff_unlocked and i == 6:
+                continue
+            if i <= 4: color = coords.ABILITY_ROW1_READY_COLOR
+            elif i <= 10: color = coords.ABILITY_ROW2_READY_COLOR
+            else: color = coords.ABILITY_ROW3_READY_COLOR
+            if Inputs.check_frame_color(frame, *Adventure.get_ability_coords(i), color):
+                ready.append(i)
+        return ready
+    
+    @staticmethod
+    def get_ability_queue(frame :numpy.ndarray =None) -> List[int]:
+        """Return a queue of usable abilities.
+        
+        Keyword arguments
+        frame -- A frame from Inputs.get_frame(). If omitted, a new frame is captured.
+        """
+        if frame is None: frame = Inputs.get_frame()
+        ready = Adventure.get_ready_abilities(frame)
+        queue = []
         
         if 15 in ready:
             Adventure.oh_shit_unlocked = True
         if 14 in ready:
             Adventure.mega_buff_unlocked = True
         # heal if we need to heal
-        if Inputs.check_pixel_color(*coords.PLAYER_HEAL_THRESHOLD):
+        if Inputs.check_frame_color(frame, *coords.PLAYER_HEAL_THRESHOLD):
             if 15 in ready:
                 queue.append(15)
             elif 12 in ready:
@@ -499,15 +632,46 @@ class Adventure:
             queue.append(0)
         return queue
     
+    @staticmethod
+    def itopod_enter(floor :int) -> None:
+        """Enter the ITOPOD at the given floor."""
+        Inputs.click(*coords.ITOPOD)
+        Inputs.click(*coords.ITOPOD_START)
+        Inputs.send_string(floor)
+        # set end to 0 in case it's higher than start
+        Inputs.click(*coords.ITOPOD_ENTER)
+    
+    @staticmethod
+    def itopod_ap_kill_count() -> int:
+        """Read the kills left until AP on the current ITOPOD floor, -1 if it can't be read."""
+        Inputs.click(*coords.ADVENTURE_TOOLTIP)
+        count = Inputs.remove_letters(Inputs.ocr(*coords.OCR_AP_KILL_COUNT))
+        try:
+            return int(count)
+        except ValueError:
+            print(f"couldn't convert '{count}' to int")
+            return -1
+    
+    @staticmethod
+    def reset_itopod_ap() -> None:
+        """Forget the ITOPOD AP kill counters, the next itopod_ap() call rescans all tiers."""
+        Adventure.itopod_planner = None
+        Adventure.itopod_tier_counts = {}
+        if os.path.exists(Adventure.itopod_ap_file):
+            os.remove(Adventure.itopod_ap_file)
+    
     @staticmethod
     def itopod_ap(duration :int) -> None:
         """Abuse an oversight in the kill counter for AP rewards for mucher higher AP/h in ITOPOD.
         If you use this method, make sure you do not retoggle idle mode in adventure in other parts
-        of your script. If you have to, make sure to empty itopod_tier_counts with:
-        itopod_tier_counts = {}
+        of your script. If you have to, make sure to reset the counters with:
+        Adventure.reset_itopod_ap()
+        
+        The counters are stored in Adventure.itopod_ap_file after every AP, so a restart only
+        verifies a single tier instead of rescanning all of them.
         
         Keyword arguments:
-        duration -- Duration in seconds to run, before toggling idle mode
+        duration -- Duration in minutes to run, before toggling idle mode
                     back on and returning.
         """
         print("WARNING: itopod_ap() is largely untested")
@@ -517,48 +681,56 @@ class Adventure:
         Inputs.click(625, 500)  # click somewhere to move tooltip
         if Inputs.check_pixel_color(*coords.IS_IDLE):
             Inputs.click(*coords.ABILITY_IDLE_MODE)
-        # check if we're already in ITOPOD, otherwise enter
-        if not Adventure.itopod_tier_counts:
+        
+        planner = Adventure.itopod_planner
+        if planner is None:
+            planner = ItopodPlanner.load(Adventure.itopod_ap_file)
+            if planner is not None:
+                # Verify the stored counters on the tier we're going to anyway.
+                tier, _ = planner.next_visit()
+                Adventure.itopod_enter(Adventure.itopod_tier_map[tier])
+                planner.tier = tier
+                if Adventure.itopod_ap_kill_count() != planner.count(tier):
+                    print("Stored ITOPOD counters are out of date, rescanning all tiers")
+                    planner = None
+        
+        if planner is None:
+            counts = {}
             for tier, floor in Adventure.itopod_tier_map.items():
-                Inputs.click(*coords.ITOPOD)
-                Inputs.click(*coords.ITOPOD_START)
-                Inputs.send_string(floor)
-                # set end to 0 in case it's higher than start
-                Inputs.click(*coords.ITOPOD_ENTER)
-                Inputs.click(*coords.ADVENTURE_TOOLTIP)
-                count = Inputs.remove_letters(Inputs.ocr(*coords.OCR_AP_KILL_COUNT))
+                Adventure.itopod_enter(floor)
+                count = Adventure.itopod_ap_kill_count()
                 print(f"Tier {tier}: {count}")
-                try:
-                    count = int(count)
-                except ValueError:
-                    print(f"couldn't convert '{count}' to int")
-                Adventure.itopod_tier_counts[tier] = count
+                if count < 1:
+                    count = ItopodPlanner.period(tier)
+                counts[tier] = count
+            planner = ItopodPlanner(counts)
+            planner.tier = 20
+        
+        Adventure.itopod_planner = planner
+        Adventure.itopod_tier_counts = planner.current_counts()
         print(Adventure.itopod_tier_counts)
+        print(f"Expected AP/h: {planner.ap_per_hour():.0f}")
         while time.time() < end:
-            next_tier = min(Adventure.itopod_tier_counts, key=Adventure.itopod_tier_counts.get)
-            print(f"going to itopod tier {next_tier}")
-            Inputs.click(*coords.ITOPOD)
-            Inputs.click(*coords.ITOPOD_START)
-            Inputs.send_string(Adventure.itopod_tier_map[next_tier])
-            # set end to 0 in case it's higher than start
-            Inputs.click(*coords.ITOPOD_ENTER)
-            time.sleep(userset.LONG_SLEEP)
-            kc = Adventure.itopod_tier_counts[next_tier]
+            next_tier, kc = planner.next_visit()
+            if next_tier != planner.tier:
+                print(f"going to itopod tier {next_tier}")
+                Adventure.itopod_enter(Adventure.itopod_tier_map[next_tier])
+                time.sleep(userset.LONG_SLEEP)
+                planner.tier = next_tier
             while kc > 0:
                 if Inputs.check_pixel_color(*coords.IS_ENEMY_ALIVE):
                     Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
                     
                     Adventure.itopod_kills += 1
                     kc -= 1
+                    planner.record_kills(1, next_tier)
                     if kc > 0:
                         time.sleep(.7 - userset.MEDIUM_SLEEP)  # Make sure we wait long enough
-                    for tier, count in Adventure.itopod_tier_counts.items():
-                        Adventure.itopod_tier_counts[tier] -= 1
-                        if Adventure.itopod_tier_counts[tier] < 1:
-                            Adventure.itopod_tier_counts[tier] = 40 - tier
                 else:
                     time.sleep(0.06)
             Adventure.itopod_ap_gained += 1
+            Adventure.itopod_tier_counts = planner.current_counts()
+            planner.save(Adventure.itopod_ap_file)
             print(f"Kills: {Adventure.itopod_kills}\nAP gained: {Adventure.itopod_ap_gained}")
         return
 
@@ -607,22 +779,9 @@ class Inventory:
         Inputs.click(*coords.LOADOUT[target])
     
     @staticmethod
-    def get_inventory_slots(slots :int) -> None:
+    def get_inventory_slots(slots :int) -> List[coords.Pixel]:
         """Get coords for inventory slots from 1 to slots."""
-        point = namedtuple("p", ("x", "y"))
-        i = 1
-        row = 1
-        x_pos, y_pos = coords.INVENTORY_SLOTS
-        res = []
-        
-        while i <= slots:
-            x = x_pos + (i - (12 * (row - 1))) * 50
-            y = y_pos + ((row - 1) * 50)
-            res.append(point(x, y))
-            if i % 12 == 0:
-                row += 1
-            i += 1
-        return res
+        return [InventoryModel.slot_coords(i) for i in range(1, slots + 1)]
     
     @staticmethod
     def merge_inventory(slots :int) -> None:
@@ -632,23 +791,23 @@ class Inventory:
         slots -- The amount of slots you wish to merge
         """
         Navigation.menu("inventory")
-        coord = Inventory.get_inventory_slots(slots)
-        for slot in coord:
-            Inputs.click(*slot)
+        for slot in InventoryModel.needs_action("merge", slots):
+            Inputs.click(*InventoryModel.slot_coords(slot))
             Inputs.send_string("d")
+        InventoryModel.handled_action("merge")
     
     @staticmethod
     def boost_inventory(slots :int) -> None:
-        """Merge all inventory slots starting from 1 to slots.
+        """Boost all inventory slots starting from 1 to slots.
         
         Keyword arguments:
-        slots -- The amount of slots you wish to merge
+        slots -- The amount of slots you wish to boost
         """
         Navigation.menu("inventory")
-        coord = Inventory.get_inventory_slots(slots)
-        for slot in coord:
-            Inputs.click(*slot)
+        for slot in InventoryModel.needs_action("boost", slots):
+            Inputs.click(*InventoryModel.slot_coords(slot))
             Inputs.send_string("a")
+        InventoryModel.handled_action("boost")
     
     @staticmethod
     def transform_slot(slot :int, threshold :float =0.8, consume :bool =False) -> None:
@@ -793,6 +952,11 @@ class TimeMachine:
             Inputs.click(*coords.TM_MULT)
 
 class BloodMagic:
+    spell_coords = {1: coords.BM_PILL, 2: coords.BM_GUFFIN_A, 3: coords.BM_GUFFIN_B}
+    spell_ready_at = {}  # spell -> time.monotonic() it's ready, missing if unknown
+    spell_queue = []  # spells waiting for spell_cast_at
+    spell_cast_at = 0
+    
     @staticmethod
     def blood_magic(target :int) -> None:
         """Assign magic to BM.
@@ -849,68 +1013,104 @@ class BloodMagic:
             if (gold and not gold_active) or (not gold and gold_active):
                 Inputs.click(*coords.BM_AUTO_GOLD)
     
+    @staticmethod
+    def get_spell_cooldown(text :str) -> float:
+        """Return the cooldown in seconds from a spell tooltip, -1 if it couldn't be read."""
+        match = re.search(r"cooldown: *([0-9.,]+) *s", text.lower())
+        if match is None:
+            return -1
+        try:
+            return float(match.group(1).replace(",", ""))
+        except ValueError:
+            return -1
+    
     @staticmethod
     def check_spells_ready() -> List[int]:
         """Check which spells are ready to cast.
         
+        The cooldown of every spell read is remembered, so a spell's tooltip
+        is only read again once the spell is predicted to be ready.
+        
         Returns a list with integers corresponding to which spell is ready. The values on the
         list can be:
             1 - Iron pill
             2 - MacGuffin alpha
             3 - MacGuffin beta
         """
-        if Inputs.check_pixel_color(*coords.COLOR_SPELL_READY):
-            Navigation.spells()
-            Inputs.click(*coords.BM_PILL, button="right")
-            spells = []
-            res = Inputs.ocr(*coords.OCR_BM_SPELL_TEXT)
-            if "cooldown: 0.0s" in res.lower():
-                spells.append(1)
-            
-            Inputs.click(*coords.BM_GUFFIN_A, button="right")
-            res = Inputs.ocr(*coords.OCR_BM_SPELL_TEXT)
-            if "cooldown: 0.0s" in res.lower():
-                spells.append(2)
-            
-            Inputs.click(*coords.BM_GUFFIN_B, button="right")
-            res = Inputs.ocr(*coords.OCR_BM_SPELL_TEXT)
-            if "cooldown: 0.0s" in res.lower():
-                spells.append(3)
-            
-            return spells
-        else:
+        if not Inputs.check_pixel_color(*coords.COLOR_SPELL_READY):
             return []
+        
+        spells = []
+        now = time.monotonic()
+        for spell, coord in BloodMagic.spell_coords.items():
+            if BloodMagic.spell_ready_at.get(spell, 0) > now:
+                continue
+            Navigation.spells()
+            Inputs.click(*coord, button="right")
+            cooldown = BloodMagic.get_spell_cooldown(Inputs.ocr(*coords.OCR_BM_SPELL_TEXT))
+            if cooldown < 0:
+                BloodMagic.spell_ready_at.pop(spell, None)
+                continue
+            BloodMagic.spell_ready_at[spell] = now + cooldown
+            if cooldown == 0:
+                spells.append(spell)
+        return spells
     
     @staticmethod
-    def cast_spell(target :int) -> None:
+    def cast_spell(target :int, wait :bool =True) -> None:
         """Cast target spell.
         
-        This method will allocate any idle magic into BM and wait for the
-        time set in usersettings.py. Remember to re-enable auto spells after
-        calling this method, using toggle_auto_spells().
+        This method will allocate any idle magic into BM and cast the spell
+        after the time set in usersettings.py. Remember to re-enable auto
+        spells after calling this method, using toggle_auto_spells().
         
         Keyword arguments
         number -- The spell to be cast. Possible values are:
             1 - Iron pill
             2 - MacGuffin alpha
             3 - MacGuffin beta
+        wait   -- If True, snipe itopod until the spell is cast. If False,
+                  the cast is scheduled and done by cast_scheduled().
         """
-        if Inputs.check_pixel_color(*coords.COLOR_SPELL_READY):
-            targets = [0, coords.BM_PILL, coords.BM_GUFFIN_A, coords.BM_GUFFIN_B]
-            start = time.time()
-            BloodMagic.blood_magic(8)
-            BloodMagic.toggle_auto_spells(False, False, False)  # disable all auto spells
-            
-            if userset.SPELL == 0:  # Default to 5 mins if not set
-                duration = 300
-            else:
-                duration = userset.SPELL
-            
-            while time.time() < start + duration:
-                print(f"Sniping itopod for {duration} seconds while waiting to cast spell.")
-                Adventure.itopod_snipe(duration)
+        if target not in BloodMagic.spell_queue and Inputs.check_pixel_color(*coords.COLOR_SPELL_READY):
+            if not BloodMagic.spell_queue:
+                BloodMagic.blood_magic(8)
+                BloodMagic.toggle_auto_spells(False, False, False)  # disable all auto spells
+                # Default to 5 mins if not set
+                BloodMagic.spell_cast_at = time.time() + (userset.SPELL or 300)
+            BloodMagic.spell_queue.append(target)
+        if wait:
+            BloodMagic.cast_scheduled(wait=True)
+    
+    @staticmethod
+    def cast_scheduled(wait :bool =False) -> List[int]:
+        """Cast the spells scheduled by cast_spell() once they're due.
+        
+        A cast uses up the blood gathered for it, so every spell waits the
+        time set in usersettings.py after the previous one.
+        
+        Keyword arguments
+        wait -- If True, snipe itopod until every spell is cast.
+                If False, only cast the spell that is due, if any.
+        
+        Returns the spells that were cast.
+        """
+        spells = []
+        while BloodMagic.spell_queue:
+            remaining = BloodMagic.spell_cast_at - time.time()
+            if remaining > 0:
+                if not wait:
+                    break
+                print(f"Sniping itopod for {remaining:.0f} seconds while waiting to cast spell.")
+                Adventure.itopod_snipe(remaining)
+                continue
             Navigation.spells()
-            Inputs.click(*targets[target])
+            spell = BloodMagic.spell_queue.pop(0)
+            Inputs.click(*BloodMagic.spell_coords[spell])
+            BloodMagic.spell_ready_at.pop(spell, None)
+            BloodMagic.spell_cast_at = time.time() + (userset.SPELL or 300)
+            spells.append(spell)
+        return spells
 
 class Wandoos:
     @staticmethod
@@ -942,7 +1142,7 @@ class Wandoos:
         Navigation.confirm()
     
     @staticmethod
-    def check_wandoos_bb_status(magic :bool =False) -> None:
+    def check_wandoos_bb_status(magic :bool =False) -> bool:
         """Check if wandoos is currently fully BB'd.
         
         Keyword arguments
@@ -951,8 +1151,8 @@ class Wandoos:
         """
         Navigation.menu("wandoos")
         if magic:
-            return Inputs.check_pixel_color(*coords.COLOR_WANDOOS_MAGIC_BB)
-        return Inputs.check_pixel_color(*coords.COLOR_WANDOOS_ENERGY_BB)
+            return Inputs.read_bar(coords.WANDOOS_MAGIC_BAR, fill=coords.COLOR_WANDOOS_MAGIC_BB.color) >= 1
+        return Inputs.read_bar(coords.WANDOOS_ENERGY_BAR, fill=coords.COLOR_WANDOOS_ENERGY_BB.color) >= 1
 
 class NGU:
     @staticmethod
@@ -1002,18 +1202,14 @@ class NGU:
             NGU = coords.Pixel(coords.NGU_PLUS.x, coords.NGU_PLUS.y + target * 35)
             Inputs.click(*NGU)
         
+        frame = Inputs.get_frame()
         for target in targets:
             energy = 0
-            for x in range(198):
-                color = Inputs.get_pixel_color(coords.NGU_BAR_MIN.x + x,
-                                               coords.NGU_BAR_MIN.y +
-                                               coords.NGU_BAR_OFFSET_Y * target,
-                                               )
-                if color == coords.NGU_BAR_WHITE:
-                    pixel_coefficient = x / 198
-                    value_coefficient = overcap / pixel_coefficient
-                    energy = (value_coefficient * value) - value
-                    break
+            bar = coords.NGU_BAR._replace(y=coords.NGU_BAR.y + coords.NGU_BAR_OFFSET_Y * target)
+            pixel_coefficient = Inputs.read_bar(bar, frame, empty=coords.NGU_BAR_WHITE)
+            if 0 < pixel_coefficient < 1:
+                value_coefficient = overcap / pixel_coefficient
+                energy = (value_coefficient * value) - value
             if energy == 0:
                 if magic:
                     print(f"Warning: You might be overcapping magic NGU #{target}")
@@ -1078,20 +1274,23 @@ class GoldDiggers:
     def gold_diggers(targets :List[int] =const.DEFAULT_DIGGER_ORDER, deactivate :bool =False) -> None:
         """Activate diggers.
         
+        Targets on the same page are clicked in one visit of the page. When
+        capping, the order of targets is kept so the gold goes to the
+        diggers with the highest priority first.
+        
         Keyword arguments:
         targets -- Array of diggers to use from 1-12. Example: [1, 2, 3, 4, 9].
         deactivate -- Set to True if you wish to deactivate these
                     diggers otherwise it will just try to up the cap.
         """
         Navigation.menu("digger")
-        for i in targets:
-            page = ((i - 1) // 4)
-            item = i - (page * 4)
-            Inputs.click(*coords.DIG_PAGE[page])
-            if deactivate:
-                Inputs.click(*coords.DIG_ACTIVE[item])
-            else:
-                Inputs.click(*coords.DIG_CAP[item])
+        for page, items in Navigation.group_by_page(targets, 4, reorder=deactivate):
+            Navigation.page("digger", coords.DIG_PAGE, page)
+            for item in items:
+                if deactivate:
+                    Inputs.click(*coords.DIG_ACTIVE[item])
+                else:
+                    Inputs.click(*coords.DIG_CAP[item])
     
     @staticmethod
     def deactivate_all_diggers() -> None:
@@ -1106,13 +1305,18 @@ class GoldDiggers:
         Inputs.click(*coords.DIG_CAP_ALL)
     
     @staticmethod
-    def level_diggers() -> None:
-        """Level all diggers."""
+    def level_diggers(targets :List[int] =None) -> None:
+        """Level diggers.
+        
+        Keyword arguments:
+        targets -- Array of diggers to level from 1-12, defaults to all diggers.
+        """
+        targets = targets or range(1, len(coords.DIG_PAGE) * 4 + 1)
         Navigation.menu("digger")
-        for page in coords.DIG_PAGE:
-            Inputs.click(*page)
-            for digger in coords.DIG_LEVEL:
-                Inputs.click(*digger, button="right")
+        for page, items in Navigation.group_by_page(targets, 4):
+            Navigation.page("digger", coords.DIG_PAGE, page)
+            for item in items:
+                Inputs.click(*coords.DIG_LEVEL[item - 1], button="right")
 
 class BeardsOfPower:
     """Probably the most useful class ever. -- 4G"""
@@ -1161,17 +1365,15 @@ class Questing:
     def questing_consume_items(cleanup :bool =False) -> None:
         """Check for items in inventory that can be turned in."""
         Navigation.menu("inventory")
-        Inputs.click(*coords.INVENTORY_PAGE[0])
-        bmp = Inputs.get_bitmap()
-        for item in coords.QUESTING_FILENAMES:
-            path = Inputs.get_file_path("images", item)
-            loc = Inputs.image_search(Window.x, Window.y, Window.x + 960, Window.y + 600, path, 0.91, bmp=bmp)
-            if loc:
-                Inputs.click(*loc, button="right")
-                if cleanup:
-                    Inputs.send_string("d")
-                    Inputs.ctrl_click(*loc)
-                time.sleep(3)  # Need to wait for tooltip to disappear after consuming
+        InventoryModel.open_page(0)
+        InventoryModel.update(0)
+        for _, slot, _ in InventoryModel.find(coords.QUESTING_FILENAMES, pages=[0]):
+            loc = InventoryModel.slot_coords(slot)
+            Inputs.click(*loc, button="right")
+            if cleanup:
+                Inputs.send_string("d")
+                Inputs.ctrl_click(*loc)
+            time.sleep(3)  # Need to wait for tooltip to disappear after consuming
     
     @staticmethod
     def questing(duration :int =30, major :bool =False, subcontract :bool =False, force :int =0, adv_duration :int =2, butter :bool =False) -> None:
@@ -1319,6 +1521,25 @@ class Questing:
         Navigation.menu("questing")
         if Questing.get_use_majors() != set:  # Toggle if only one is True
             Questing.toggle_use_majors()
+    
+    @staticmethod
+    def majors_or_force(zone :int, butter :bool =False, duration :int =2) -> None:
+        """Do major quests while there are any, otherwise quest in zone.
+        
+        Keyword arguments
+        zone     -- The zone to force when no major quest is available, see
+                    QUEST_ZONE_MAP in constants.py.
+        butter   -- Use butter for major quests.
+        duration -- The duration in minutes to quest, see questing().
+        """
+        text = Questing.get_quest_text().lower()
+        majors = Questing.get_available_majors()
+        if majors == 0 and (coords.QUESTING_MINOR_QUEST in text or coords.QUESTING_NO_QUEST_ACTIVE in text):
+            Questing.questing(duration=duration, force=zone)
+        else:
+            if not Inputs.check_pixel_color(*coords.COLOR_QUESTING_USE_MAJOR):
+                Inputs.click(*coords.QUESTING_USE_MAJOR)
+            Questing.questing(duration=duration, butter=butter)
 
 class Hacks:
     @staticmethod
@@ -1332,11 +1553,10 @@ class Hacks:
         targets = targets or []
         Misc.set_input(value // len(targets))
         Navigation.menu("hacks")
-        for i in targets:
-            page = ((i - 1) // 8)
-            item = i - (page * 8)
-            Inputs.click(*coords.HACK_PAGE[page])
-            Inputs.click(*coords.HACKS[item])
+        for page, items in Navigation.group_by_page(targets, 8):
+            Navigation.page("hacks", coords.HACK_PAGE, page)
+            for item in items:
+                Inputs.click(*coords.HACKS[item])
 
 class Wishes:
     completed_wishes = []
@@ -1371,6 +1591,19 @@ class SelloutShop:
         print(f"Used MacGuffin Muffin at: {datetime.datetime.now()}")
 
 class Rebirth:
+    # The rebirth clock is read with OCR now and then and extrapolated with
+    # time.monotonic() in between. The resync interval halves when the
+    # reading drifted more than clock_drift_threshold seconds from the
+    # prediction and doubles when it didn't.
+    clock_seconds = None
+    clock_synced_at = 0
+    clock_interval = 60
+    clock_min_interval = 30
+    clock_max_interval = 300
+    clock_drift_threshold = 5
+    challenge_signatures = None  # pixels of a challenge name -> challenge number, loaded on first use
+    challenge_signatures_file = "challenge_signatures.json"
+
     @staticmethod
     def do_rebirth() -> None:
         """Start a rebirth or challenge."""
@@ -1381,6 +1614,8 @@ class Rebirth:
         Inputs.click(*coords.REBIRTH)
         Inputs.click(*coords.REBIRTH_BUTTON)
         Inputs.click(*coords.CONFIRM)
+        Rebirth.reset_clock()
+        FightBoss.record_boss(1, read=False)
         return
     
     @staticmethod
@@ -1395,14 +1630,54 @@ class Rebirth:
         Navigation.rebirth()
         Inputs.click(*coords.CHALLENGE_BUTTON)
         time.sleep(userset.LONG_SLEEP)
-        active = Inputs.check_pixel_color(*coords.COLOR_CHALLENGE_ACTIVE)
+        frame = Inputs.get_frame()
+        active = Inputs.check_frame_color(frame, *coords.COLOR_CHALLENGE_ACTIVE)
         
         if not active:
             return False
         if not getNum:
             return True
         
-        text = Inputs.ocr(*coords.OCR_CHALLENGE_NAME)
+        # The name is drawn the same way every time, so once OCR has read a
+        # name its pixels are enough to recognize it, also after a restart.
+        if Rebirth.challenge_signatures is None:
+            Rebirth.challenge_signatures = Rebirth.load_challenge_signatures(Rebirth.challenge_signatures_file)
+        signature = Rebirth.get_challenge_signature(frame)
+        if signature in Rebirth.challenge_signatures:
+            return Rebirth.challenge_signatures[signature]
+        
+        challenge = Rebirth.get_challenge_number(Inputs.ocr(*coords.OCR_CHALLENGE_NAME))
+        if challenge != -1:
+            Rebirth.challenge_signatures[signature] = challenge
+            Rebirth.save_challenge_signatures(Rebirth.challenge_signatures_file)
+        return challenge
+    
+    @staticmethod
+    def load_challenge_signatures(path :str) -> Dict[bytes, int]:
+        """Load the challenge signatures stored with save_challenge_signatures(), empty if there are none."""
+        try:
+            with open(path) as f:
+                return {bytes.fromhex(signature): int(challenge) for signature, challenge in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+    
+    @staticmethod
+    def save_challenge_signatures(path :str) -> None:
+        """Store the challenge signatures learned so far on disk."""
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({signature.hex(): challenge for signature, challenge in Rebirth.challenge_signatures.items()}, f)
+        os.replace(tmp, path)
+    
+    @staticmethod
+    def get_challenge_signature(frame :numpy.ndarray) -> bytes:
+        """Return the dark pixels of the active challenge name as bytes."""
+        x1, y1, x2, y2 = coords.OCR_CHALLENGE_NAME
+        return numpy.packbits(frame[y1:y2, x1:x2].min(axis=2) < 128).tobytes()
+    
+    @staticmethod
+    def get_challenge_number(text :str) -> int:
+        """Return the number of the challenge named in text, -1 if unknown."""
         if "basic" in text.lower():
             return 1
         elif "augs" in text.lower():
@@ -1430,47 +1705,86 @@ class Rebirth:
             return -1
     
     @staticmethod
-    def get_rebirth_time() -> Tuple[int, time.struct_time]:
+    def read_rebirth_time() -> int:
+        """Read the rebirth time with OCR, returns seconds or -1 if it couldn't be read."""
+        return Rebirth.parse_rebirth_time(Inputs.ocr(*coords.OCR_REBIRTH_TIME))
+    
+    @staticmethod
+    def parse_rebirth_time(t :str) -> int:
+        """Return the seconds in an OCR of the rebirth time, or -1 if there are none."""
+        x = re.search(r"((?P<days>[0-9]+) days? )?((?P<hours>[0-9]+):)?(?P<minutes>[0-9]+):(?P<seconds>[0-9]+)", t)
+        if x is None:
+            return -1
+        days = int(x.group('days') or 0)
+        hours = int(x.group('hours') or 0)
+        minutes = int(x.group('minutes'))
+        seconds = int(x.group('seconds'))
+        return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+    
+    @staticmethod
+    def reset_clock(seconds :int =0) -> None:
+        """Set the rebirth clock when the rebirth time is known, like right after a rebirth."""
+        Rebirth.clock_seconds = seconds
+        Rebirth.clock_synced_at = time.monotonic()
+        Rebirth.clock_interval = Rebirth.clock_min_interval  # verify it soon
+    
+    @staticmethod
+    def sync_clock(seconds :int =None, read_at :float =None) -> None:
+        """Read the rebirth time with OCR and adjust the resync interval to the drift.
+        
+        Keyword arguments
+        seconds -- A rebirth time that was already read, from parse_rebirth_time().
+        read_at -- The time.monotonic() when the screen holding seconds was captured.
+        """
+        if seconds is None:
+            seconds = Rebirth.read_rebirth_time()
+        now = time.monotonic() if read_at is None else read_at
+        if seconds < 0:
+            if Rebirth.clock_seconds is None:
+                Rebirth.reset_clock()
+            return
+        if Rebirth.clock_seconds is not None:
+            drift = abs(seconds - (Rebirth.clock_seconds + now - Rebirth.clock_synced_at))
+            if seconds < Rebirth.clock_seconds - Rebirth.clock_drift_threshold:
+                FightBoss.record_boss(0)  # rebirthed without us, the boss is unknown
+            if drift > Rebirth.clock_drift_threshold:
+                Rebirth.clock_interval = max(Rebirth.clock_interval // 2, Rebirth.clock_min_interval)
+            else:
+                Rebirth.clock_interval = min(Rebirth.clock_interval * 2, Rebirth.clock_max_interval)
+        Rebirth.clock_seconds = seconds
+        Rebirth.clock_synced_at = now
+    
+    @staticmethod
+    def get_rebirth_time(sync :bool =False) -> Tuple[int, time.struct_time]:
         """Get the current rebirth time.
         returns a namedtuple(days, timestamp) where days is the number
         of days displayed in the rebirth time text and timestamp is a
         time.struct_time object.
+        
+        Keyword arguments
+        sync -- If True, read the time with OCR instead of the rebirth clock.
         """
         Rebirth_time = namedtuple('Rebirth_time', 'days timestamp')
-        t = Inputs.ocr(*coords.OCR_REBIRTH_TIME)
-        x = re.search(r"((?P<days>[0-9]+) days? )?((?P<hours>[0-9]+):)?(?P<minutes>[0-9]+):(?P<seconds>[0-9]+)", t)
-        days = 0
-        if x is None:
-            timestamp = time.strptime("0:0:0", "%H:%M:%S")
-        else:
-            if x.group('days') is None:
-                days = 0
-            else:
-                days = int(x.group('days'))
-            
-            if x.group('hours') is None:
-                hours = "0"
-            else:
-                hours = x.group('hours')
-            
-            if x.group('minutes') is None:
-                minutes = "0"
-            else:
-                minutes = x.group('minutes')
-            
-            if x.group('seconds') is None:
-                seconds = "0"
-            else:
-                seconds = x.group('seconds')
-            timestamp = time.strptime(f"{hours}:{minutes}:{seconds}", "%H:%M:%S")
+        days, seconds = divmod(Rebirth.rt_to_seconds(sync), 86400)
+        timestamp = time.gmtime(seconds)
         return Rebirth_time(days, timestamp)
     
     @staticmethod
-    def rt_to_seconds() -> int:
-        """Get the Rebirth time in seconds"""
-        rt = Rebirth.get_rebirth_time()
-        seconds = ((rt.days * 24 + rt.timestamp.tm_hour) * 60 + rt.timestamp.tm_min) * 60 + rt.timestamp.tm_sec
-        return seconds
+    def rt_to_seconds(sync :bool =False) -> int:
+        """Get the Rebirth time in seconds.
+        
+        Keyword arguments
+        sync -- If True, read the time with OCR instead of the rebirth clock.
+        """
+        if sync or Rebirth.clock_due():
+            Rebirth.sync_clock()
+        return int(Rebirth.clock_seconds + time.monotonic() - Rebirth.clock_synced_at)
+    
+    @staticmethod
+    def clock_due() -> bool:
+        """Return True if the rebirth clock should be synced with OCR."""
+        return (Rebirth.clock_seconds is None or
+                time.monotonic() - Rebirth.clock_synced_at >= Rebirth.clock_interval)
 
 class Misc:
     @staticmethod
@@ -1692,12 +2006,20 @@ class Misc:
         """Sets a value in the input box.
         Requires the current menu to have an imput box.
         
+        Nothing is done if the box already holds value. The box is shared by
+        every menu, the cached value is dropped when anything else is typed
+        or the box is clicked.
+        
         Keyword arguments
         value -- The value to be set
         """
+        value = int(value)
+        if Navigation.input_value == (value, Inputs.keys_sent):
+            return
         Navigation.input_box()
         Inputs.send_string(value)
         Misc.waste_click()
+        Navigation.input_value = (value, Inputs.keys_sent)
     
     @staticmethod
     def waste_click() -> None:
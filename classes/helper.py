@@ -1,10 +1,19 @@
 """Helper functions."""
+from __future__ import annotations
+
+import functools
+
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
 from classes.window     import Window
 from classes.inputs     import Inputs
 from classes.features   import Inventory, MoneyPit, Adventure, Yggdrasil, GoldDiggers, Questing
 
 import coordinates as coords
 
+if TYPE_CHECKING:
+    from classes.runtime import Runtime  # asyncio is slow to import, only loop_async() needs it
+
 
 class Helper:
     def init(printCoords :bool =False) -> None:
@@ -12,12 +21,10 @@ class Helper:
         Helper.init() should go at the very top of any script, straight after imports.
         """
         rects = Window.init()
+        cds = None
         for window_id, rect in rects.items():
             if printCoords: print(f"Scanning window id: {window_id}")
-            w = rect[2] - rect[0]
-            h = rect[3] - rect[1]
-            Window.id = window_id
-            cds = Inputs.pixel_search(coords.TOP_LEFT_COLOR, 0, 0, w, h)
+            cds = Helper.locate(window_id, rect)
             if cds:
                 Window.setPos(*cds)
                 break
@@ -28,6 +35,12 @@ class Helper:
         
         if printCoords: print(f"Top left found at: {Window.x}, {Window.y}")
 
+    def locate(window_id :int, rect :Tuple[int, int, int, int]) -> Optional[Tuple[int, int]]:
+        """Return the top left of the game inside a window, or None if it isn't there.
+        Sets Window.id to window_id."""
+        Window.id = window_id
+        return Inputs.pixel_search(coords.TOP_LEFT_COLOR, 0, 0, rect[2] - rect[0], rect[3] - rect[1])
+
     def requirements() -> None:
         """Set everything to the proper requirements to run the script.
         It's strongly recommended to run this straight after init()."""
@@ -39,6 +52,18 @@ class Helper:
         Inputs.click(*coords.SETTINGS_PAGE_2)
         Inputs.click(*coords.SIMPLE_INVENTORY_SHORTCUT_ON)
 
+    def idle_steps() -> List[Callable[[], None]]:
+        """Return the steps of one pass of the idle loop, in order."""
+        return [
+            functools.partial(Questing.questing, subcontract=True),  # Questing first, as we are already there
+            MoneyPit.pit,
+            MoneyPit.spin,
+            Inventory.boost_cube,
+            GoldDiggers.gold_diggers,
+            Yggdrasil.ygg,
+            functools.partial(Adventure.itopod_snipe, 300),
+        ]
+
     def loop(idle_majors :bool =False) -> None:
         """Run infinite loop to prevent idling after task is complete.
         
@@ -50,13 +75,23 @@ class Helper:
         Questing.set_use_majors(idle_majors)
         print("Engaging idle loop")
         while True:  # main loop
-            Questing.questing(subcontract=True)  # Questing first, as we are already there
-            MoneyPit.pit()
-            MoneyPit.spin()
-            Inventory.boost_cube()
-            GoldDiggers.gold_diggers()
-            Yggdrasil.ygg()
-            Adventure.itopod_snipe(300)
+            for step in Helper.idle_steps():
+                step()
+
+    async def loop_async(rt :Runtime, idle_majors :bool =False) -> None:
+        """Run the idle loop on the asyncio runtime, see loop().
+        
+        Every step runs on the input channel, background tasks spawned on
+        the runtime, and other sessions of a Scheduler, run between them.
+        
+        Usage: Runtime.start(Helper.loop_async, idle_majors=True)
+        """
+        Questing.set_use_majors(idle_majors)
+        print("Engaging idle loop")
+        while True:
+            for step in Helper.idle_steps():
+                await rt.call(step)
+                await rt.sleep(0)
 
     def human_format(num :float) -> str:
         """Convert large numbers into something readable."""
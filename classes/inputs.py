@@ -1,9 +1,10 @@
 """Input class contains functions for mouse and keyboard input."""
-from ctypes import windll
-import win32api
-import win32con as wcon
-import win32gui
-import win32ui
+from __future__ import annotations
+
+try:
+    from ctypes import windll
+except ImportError:  # Not on Windows, only a replay backend can drive Inputs
+    windll = None
 
 import datetime
 import os
@@ -12,19 +13,27 @@ import time
 
 from typing import Iterable, Optional, Tuple
 
-from PIL import Image as image
-from PIL import ImageFilter
-import cv2
-import numpy
-
-import pytesseract
-
 import usersettings as userset
+from classes.lazy   import LazyModule
 from classes.window import Window
 
+# imported on first use, see LazyModule
+image = LazyModule("PIL.Image")
+ImageFilter = LazyModule("PIL.ImageFilter")
+cv2 = LazyModule("cv2")
+numpy = LazyModule("numpy")
+pytesseract = LazyModule("pytesseract")
+win32api = LazyModule("win32api")
+wcon = LazyModule("win32con")
+win32gui = LazyModule("win32gui")
+win32ui = LazyModule("win32ui")
+
 class Inputs:
     """This class handles inputs."""
 
+    keys_sent = 0  # send_string calls, lets callers tell if anything was typed since
+    digit_cache = {}  # OCR box -> (pixels, digits) of the last ocr_digits() read
+
     @staticmethod
     def click(x :int, y :int, button :str ="left", fast :bool =False) -> None:
         """Click at pixel xy."""
@@ -110,6 +119,7 @@ class Inputs:
     @staticmethod
     def send_string(string :str) -> None:
         """Send one or multiple characters to the Window."""
+        Inputs.keys_sent += 1
         # Ensure it's a string by converting it to a string
         if isinstance(string, float):
             string = int(string)
@@ -254,6 +264,65 @@ class Inputs:
             lst.append((loc[0] + w // 2, loc[1] + h // 2))
         return lst
 
+    @staticmethod
+    def get_frame(bmp :image =None) -> numpy.ndarray:
+        """Return the game area as an RGB array indexed as frame[y, x].
+
+        Use this when many pixels are needed from the same screen, one
+        capture replaces a get_pixel_color() call per pixel.
+
+        Keyword arguments
+        bmp -- A bitmap from the get_bitmap() function. If a bitmap is not
+               passed, the function will get the bitmap itself. (default None)
+        """
+        if bmp is None: bmp = Inputs.get_bitmap()
+        # Bitmaps are created with a 8px border
+        bmp = bmp.crop((Window.x + 8, Window.y + 8, Window.x + 968, Window.y + 608))
+        return numpy.asarray(bmp.convert('RGB'))
+
+    @staticmethod
+    def sample_grid(frame :numpy.ndarray, origin :Tuple[int, int], offset :Tuple[int, int],
+                    cols :int, rows :int) -> numpy.ndarray:
+        """Sample a regular lattice of pixels from a frame.
+
+        Returns an array of shape (rows, cols, 3) with the RGB value of
+        origin + (col * offset.x, row * offset.y) for every cell.
+        """
+        xs = origin[0] + numpy.arange(cols) * offset[0]
+        ys = origin[1] + numpy.arange(rows) * offset[1]
+        return frame[ys[:, None], xs[None, :]]
+
+    @staticmethod
+    def color_mask(pixels :numpy.ndarray, colors :Iterable[str]) -> numpy.ndarray:
+        """Return a boolean mask of the pixels matching one or more hex colors."""
+        if isinstance(colors, str): colors = [colors]
+        targets = numpy.array([Inputs.hex_to_rgb(c) for c in colors], dtype=numpy.uint8)
+        return (pixels[..., None, :] == targets).all(axis=-1).any(axis=-1)
+
+    @staticmethod
+    def read_bar(bar :Tuple[int, int, int], frame :numpy.ndarray =None,
+                 empty :Iterable[str] =None, fill :Iterable[str] =None) -> float:
+        """Return the filled fraction of a horizontal progress bar.
+
+        The whole row is read from one frame. With empty colors the bar is
+        filled up to the first empty pixel, with fill colors it's filled up
+        to the last fill pixel.
+
+        Keyword arguments
+        bar   -- (x1, x2, y) of the bar, x2 is exclusive. See coords.Bar.
+        frame -- A frame from get_frame(), captured if omitted.
+        empty -- One or more colors of the empty part of the bar.
+        fill  -- One or more colors of the filled part of the bar.
+        """
+        if frame is None: frame = Inputs.get_frame()
+        x1, x2, y = bar
+        row = frame[y, x1:x2]
+        if fill is not None:
+            hits = numpy.flatnonzero(Inputs.color_mask(row, fill))
+            return (hits[-1] + 1) / len(row) if hits.size else 0
+        hits = numpy.flatnonzero(Inputs.color_mask(row, empty))
+        return hits[0] / len(row) if hits.size else 1
+
     @staticmethod
     def rgb_equal(a :Tuple[int, int, int], b :Tuple[int, int, int]) -> bool:
         if a[0] != b[0]: return False
@@ -343,6 +412,15 @@ class Inputs:
 
         return color == checks
 
+    @staticmethod
+    def check_frame_color(frame :numpy.ndarray, x :int, y :int, checks :Iterable[str]) -> bool:
+        """Check if coordinate in a frame from get_frame() matches with one or more colors."""
+        color = Inputs.rgb_to_hex(frame[y, x])
+        if isinstance(checks, list):
+            return color in checks
+
+        return color == checks
+
     @staticmethod
     def remove_spaces(s :str) -> str:
         """Remove all spaces from string."""
@@ -384,6 +462,31 @@ class Inputs:
         path = os.path.join(working, directory, file)
         return path
 
+    @staticmethod
+    def ocr_digits(x_1 :int, y_1 :int, x_2 :int, y_2 :int, frame :numpy.ndarray =None) -> str:
+        """Read the digits in a single line of text.
+
+        The pixels of the area are compared to the last read of the same
+        area, so Tesseract only runs when the text changed.
+
+        Keyword arguments
+        frame -- A frame from get_frame(), captured if omitted.
+        """
+        box = (x_1, y_1, x_2, y_2)
+        if frame is None: frame = Inputs.get_frame()
+        crop = frame[y_1:y_2, x_1:x_2]
+        pixels = crop.tobytes()
+        cached = Inputs.digit_cache.get(box)
+        if cached is not None and cached[0] == pixels:
+            return cached[1]
+
+        bmp = image.fromarray(crop).convert('L')
+        bmp = bmp.resize((bmp.width * 4, bmp.height * 4), image.BICUBIC)
+        bmp = bmp.filter(ImageFilter.SHARPEN)
+        digits = Inputs.remove_letters(pytesseract.image_to_string(bmp, config='--psm 7'))
+        Inputs.digit_cache[box] = (pixels, digits)
+        return digits
+
     @staticmethod
     def ocr_number(x_1 :int, y_1 :int, x_2 :int, y_2 :int) -> int:
         """Remove all non-digits."""
@@ -0,0 +1,289 @@
+"""In-memory model of the inventory pages."""
+from __future__ import annotations
+
+import time
+import zlib
+
+from collections import namedtuple
+from typing      import Dict, Iterable, List, Optional, Tuple
+
+from classes.inputs import Inputs
+from classes.lazy   import LazyModule
+
+import coordinates  as coords
+import usersettings as userset
+
+
+cv2 = LazyModule("cv2")
+numpy = LazyModule("numpy")
+
+Slot = namedtuple("Slot", "item hash seen")
+
+
+class SlotRecognizer:
+    """Recognizes items from fixed size patches centered on inventory slots.
+
+    Every patch is reduced to an 8x8 color grid with the mean removed, and
+    compared to an indexed catalog of the same features computed from the
+    item images. All slots of a page are classified with one matrix
+    product per patch size and shift instead of a template search per
+    item, patches are shifted a few pixels so icons don't need to be
+    perfectly centered.
+    """
+
+    GRID = 8
+    MAX_SIZE = 40  # the slot minus its border
+    SHIFT = 3
+
+    def __init__(self, threshold :float =0.9) -> None:
+        self.threshold = threshold
+        self.groups = {}  # patch size -> (names, feature matrix)
+
+    @staticmethod
+    def features(patches :numpy.ndarray) -> numpy.ndarray:
+        """Return the normalized features of n patches shaped (n, size, size, 3)."""
+        n, size = patches.shape[:2]
+        block = size // SlotRecognizer.GRID
+        grid = SlotRecognizer.GRID
+        vec = patches.astype(numpy.float32).reshape(n, grid, block, grid, block, 3).mean(axis=(2, 4)).reshape(n, -1)
+        vec -= vec.mean(axis=1, keepdims=True)
+        norm = numpy.linalg.norm(vec, axis=1, keepdims=True)
+        return vec / numpy.maximum(norm, 1e-6)
+
+    def add(self, name :str, image :numpy.ndarray) -> None:
+        """Add an RGB item image to the catalog."""
+        h, w = image.shape[:2]
+        size = min(h, w, SlotRecognizer.MAX_SIZE) // SlotRecognizer.GRID * SlotRecognizer.GRID
+        y, x = (h - size) // 2, (w - size) // 2
+        feature = SlotRecognizer.features(image[None, y:y + size, x:x + size])
+        names, matrix = self.groups.get(size, ([], numpy.empty((0, feature.shape[1]), numpy.float32)))
+        self.groups[size] = (names + [name], numpy.vstack([matrix, feature]))
+
+    @staticmethod
+    def load(items :Iterable[str], threshold :float =0.9) -> "SlotRecognizer":
+        """Build a recognizer from images in the images folder."""
+        recognizer = SlotRecognizer(threshold)
+        for item in items:
+            image = cv2.imread(Inputs.get_file_path("images", item))
+            recognizer.add(item, image[:, :, ::-1])
+        return recognizer
+
+    @staticmethod
+    def get_patches(frame :numpy.ndarray, centers :numpy.ndarray, size :int) -> numpy.ndarray:
+        """Return the patches of size around centers, an (n, 2) array of x, y."""
+        offsets = numpy.arange(size) - size // 2
+        ys = centers[:, 1, None] + offsets
+        xs = centers[:, 0, None] + offsets
+        return frame[ys[:, :, None], xs[:, None, :]]
+
+    def classify(self, frame :numpy.ndarray, centers :numpy.ndarray) -> List[str]:
+        """Return the item in every patch, "" where nothing matches."""
+        n = len(centers)
+        best = numpy.full(n, self.threshold, numpy.float32)
+        found = numpy.full(n, -1)
+        labels = []
+        shifts = range(-SlotRecognizer.SHIFT, SlotRecognizer.SHIFT + 1)
+        for size, (names, matrix) in self.groups.items():
+            scores = numpy.full((n, len(names)), -1, numpy.float32)
+            for dx in shifts:
+                for dy in shifts:
+                    patches = SlotRecognizer.get_patches(frame, centers + (dx, dy), size)
+                    numpy.maximum(scores, SlotRecognizer.features(patches) @ matrix.T, out=scores)
+            idx = scores.argmax(axis=1)
+            val = scores[numpy.arange(n), idx]
+            better = val >= best
+            best[better] = val[better]
+            found[better] = idx[better] + len(labels)
+            labels.extend(names)
+        return [labels[i] if i >= 0 else "" for i in found]
+
+
+class InventoryModel:
+    """Holds the state of every inventory slot that has been scanned.
+
+    Every page is a fixed 12 column grid of 50px slots starting at
+    coords.INVENTORY_SLOTS. A scan reads the page from one frame and
+    hashes every slot, only slots whose hash changed since the last scan
+    are identified again. Merging, boosting and consuming use the model to
+    skip slots and pages that didn't change since they were last handled.
+
+    Slot.item is the filename of the matching image in the images folder,
+    EMPTY for an empty slot, "" for an unknown item and None if it hasn't
+    been identified.
+    """
+
+    EMPTY = "empty"
+
+    COLUMNS = 12
+    SLOTS_PER_PAGE = 60
+    SLOT_SIZE = 50
+
+    catalog = coords.QUESTING_FILENAMES + coords.GLOP_FILENAMES
+    recognizer = None
+
+    current_page = 0
+    pages = {}  # page -> {slot: Slot}
+    handled = {}  # (page, action) -> (time.time(), {page: slot hashes}) when the action last ran
+    known = {}  # slot hash -> item
+
+    clicks_avoided = 0
+    slots_rescanned = 0
+    slots_skipped = 0
+
+    @staticmethod
+    def slot_coords(slot :int) -> coords.Pixel:
+        """Return the coordinates of a slot on the page, starting from 1."""
+        row, col = divmod(slot - 1, InventoryModel.COLUMNS)
+        return coords.Pixel(coords.INVENTORY_SLOTS.x + (col + 1) * InventoryModel.SLOT_SIZE,
+                            coords.INVENTORY_SLOTS.y + row * InventoryModel.SLOT_SIZE)
+
+    @staticmethod
+    def open_page(page :int) -> None:
+        """Click an inventory page. Requires the inventory to be open."""
+        Inputs.click(*coords.INVENTORY_PAGE[page])
+        time.sleep(userset.LONG_SLEEP)
+        InventoryModel.current_page = page
+
+    @staticmethod
+    def get_patch(frame :numpy.ndarray, slot :int, margin :int =0) -> numpy.ndarray:
+        """Return the pixels of a slot. A negative margin crops the slot border."""
+        x, y = InventoryModel.slot_coords(slot)
+        half = InventoryModel.SLOT_SIZE // 2 + margin
+        return frame[y - half:y + half, x - half:x + half]
+
+    @staticmethod
+    def is_empty(patch :numpy.ndarray) -> bool:
+        """Return True if a slot has no item, empty slots are a single flat color."""
+        return patch.std() < 2
+
+    @staticmethod
+    def scan(page :int =None, frame :numpy.ndarray =None) -> List[int]:
+        """Hash every slot on the displayed page and return the slots that changed.
+
+        Keyword arguments
+        page  -- The page that is displayed, defaults to the last opened page.
+        frame -- A frame from Inputs.get_frame(), captured if omitted.
+        """
+        if page is None: page = InventoryModel.current_page
+        if frame is None: frame = Inputs.get_frame()
+        slots = InventoryModel.pages.setdefault(page, {})
+        now = time.time()
+        changed = []
+        for slot in range(1, InventoryModel.SLOTS_PER_PAGE + 1):
+            patch = InventoryModel.get_patch(frame, slot, margin=-5)
+            h = zlib.crc32(numpy.ascontiguousarray(patch).tobytes())
+            old = slots.get(slot)
+            if old is not None and old.hash == h:
+                slots[slot] = old._replace(seen=now)
+                InventoryModel.slots_skipped += 1
+                continue
+            item = InventoryModel.EMPTY if InventoryModel.is_empty(patch) else InventoryModel.known.get(h)
+            slots[slot] = Slot(item, h, now)
+            changed.append(slot)
+        InventoryModel.slots_rescanned += len(changed)
+        return changed
+
+    @staticmethod
+    def identify(frame :numpy.ndarray, page :int =None) -> None:
+        """Identify the slots on a page that haven't been identified since they changed."""
+        if page is None: page = InventoryModel.current_page
+        if InventoryModel.recognizer is None:
+            InventoryModel.recognizer = SlotRecognizer.load(InventoryModel.catalog)
+        slots = InventoryModel.pages.get(page, {})
+        unknown = [slot for slot, state in slots.items() if state.item is None]
+        if not unknown:
+            return
+        centers = numpy.array([InventoryModel.slot_coords(slot) for slot in unknown])
+        for slot, item in zip(unknown, InventoryModel.recognizer.classify(frame, centers)):
+            InventoryModel.known[slots[slot].hash] = item
+            slots[slot] = slots[slot]._replace(item=item)
+
+    @staticmethod
+    def update(page :int =None) -> List[int]:
+        """Scan and identify the displayed page, returns the slots that changed."""
+        frame = Inputs.get_frame()
+        changed = InventoryModel.scan(page, frame)
+        if changed:
+            InventoryModel.identify(frame, page)
+        return changed
+
+    @staticmethod
+    def find(items :Iterable[str], pages :Iterable[int] =None) -> List[Tuple[int, int, str]]:
+        """Return (page, slot, item) for every known slot holding one of items."""
+        items = set(items)
+        found = []
+        for page, slots in sorted(InventoryModel.pages.items()):
+            if pages is not None and page not in pages:
+                continue
+            for slot, state in sorted(slots.items()):
+                if state.item in items:
+                    found.append((page, slot, state.item))
+        return found
+
+    @staticmethod
+    def hashes(page :int) -> Dict[int, int]:
+        """Return the slot hashes of a page as last scanned."""
+        return {slot: s.hash for slot, s in InventoryModel.pages.get(page, {}).items()}
+
+    @staticmethod
+    def needs_action(action :str, slots :int) -> List[int]:
+        """Return the slots from 1 to slots on the displayed page that an action should handle.
+
+        Boosting and merging use items from the whole inventory, so nothing
+        needs to be done only if no page the items could be on changed
+        since the action last ran on the displayed page. New items go to
+        the first free slot, so while the displayed page has a free slot
+        they can only be on it or an earlier page, and every earlier page
+        has to be scanned again since. Empty slots are always skipped.
+
+        If other code switched the page without open_page(), the displayed
+        page doesn't match the hashes of current_page and the action runs.
+        """
+        page = InventoryModel.current_page
+        InventoryModel.scan(page)
+        state = InventoryModel.pages[page]
+        targets = [slot for slot in range(1, slots + 1) if state[slot].item != InventoryModel.EMPTY]
+        if InventoryModel.unchanged_since(action, page):
+            InventoryModel.clicks_avoided += slots
+            return []
+        InventoryModel.clicks_avoided += slots - len(targets)
+        return targets
+
+    @staticmethod
+    def unchanged_since(action :str, page :int) -> bool:
+        """Return True if no item reached the inventory since action last ran on page."""
+        handled_at, snapshot = InventoryModel.handled.get((page, action), (None, {}))
+        if snapshot.get(page) != InventoryModel.hashes(page):
+            return False
+        if all(s.item != InventoryModel.EMPTY for s in InventoryModel.pages[page].values()):
+            return False  # new items may have gone to a later page
+        for earlier in range(page):
+            slots = InventoryModel.pages.get(earlier)
+            if not slots or min(s.seen for s in slots.values()) < handled_at \
+                    or snapshot.get(earlier) != InventoryModel.hashes(earlier):
+                return False
+        return True
+
+    @staticmethod
+    def handled_action(action :str) -> None:
+        """Record the inventory after an action ran on the displayed page."""
+        page = InventoryModel.current_page
+        InventoryModel.scan(page)
+        InventoryModel.handled[(page, action)] = (time.time(), {p: InventoryModel.hashes(p) for p in InventoryModel.pages})
+
+    @staticmethod
+    def invalidate(page :Optional[int] =None) -> None:
+        """Forget a page, or every page if page is omitted."""
+        if page is None:
+            InventoryModel.pages = {}
+            InventoryModel.handled = {}
+            return
+        InventoryModel.pages.pop(page, None)
+        InventoryModel.handled = {k: v for k, v in InventoryModel.handled.items() if k[0] != page}
+
+    @staticmethod
+    def report() -> Dict[str, int]:
+        """Return the counters of work the model avoided."""
+        return {"clicks avoided": InventoryModel.clicks_avoided,
+                "slots rescanned": InventoryModel.slots_rescanned,
+                "slots skipped": InventoryModel.slots_skipped}
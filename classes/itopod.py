@@ -0,0 +1,137 @@
+"""Plans ITOPOD visits around the AP kill counters."""
+import json
+import os
+
+from typing import Dict, List, Optional, Tuple
+
+
+class ItopodPlanner:
+    """Models the ITOPOD AP kill counters and plans which tier to visit.
+
+    Every kill in the ITOPOD lowers the counter of every tier by one, and
+    a tier resets to 40 - tier after it reaches zero. AP is awarded when
+    the kill that empties a counter happens in that tier. The counters are
+    arithmetic sequences of the global kill count, so they're evaluated in
+    closed form instead of being decremented on every kill.
+
+    Usage: planner = ItopodPlanner(counts)
+           tier, kills = planner.next_visit()
+           ... kill `kills` enemies in `tier` ...
+           planner.record_kills(kills)
+    """
+
+    TIERS = range(1, 21)
+
+    def __init__(self, counts :Dict[int, int], kill_time :float =0.8, switch_time :float =1.5) -> None:
+        """Keyword arguments
+        counts      -- The kills left until AP for every tier, as read from the game.
+        kill_time   -- Seconds per kill.
+        switch_time -- Seconds it takes to enter another ITOPOD tier.
+        """
+        self.counts = {int(tier): int(count) for tier, count in counts.items()}
+        self.kills = 0  # kills since counts were read
+        self.tier = None  # tier we're currently in
+        self.kill_time = kill_time
+        self.switch_time = switch_time
+
+    @staticmethod
+    def period(tier :int) -> int:
+        """Return the kills between two AP rewards in a tier."""
+        return 40 - tier
+
+    def count(self, tier :int, kills :int =None) -> int:
+        """Return the kills left until AP in tier, after kills total kills."""
+        kills = self.kills if kills is None else kills
+        count = self.counts[tier]
+        if kills < count:
+            return count - kills
+        return (count - kills - 1) % ItopodPlanner.period(tier) + 1
+
+    def current_counts(self) -> Dict[int, int]:
+        """Return the kills left until AP for every tier."""
+        return {tier: self.count(tier) for tier in self.counts}
+
+    def record_kills(self, kills :int =1, tier :int =None) -> None:
+        """Record kills made in the ITOPOD."""
+        self.kills += kills
+        if tier is not None:
+            self.tier = tier
+
+    def __visit_time(self, tier :int, kills :int, current :Optional[int]) -> Tuple[float, int]:
+        """Return the seconds and kills needed for the next AP in tier."""
+        needed = self.count(tier, kills)
+        seconds = needed * self.kill_time
+        if tier != current:
+            seconds += self.switch_time
+        return seconds, needed
+
+    def __pick(self, kills :int, current :Optional[int]) -> Tuple[int, float, int]:
+        """Pick the tier giving the next two AP in the shortest time."""
+        best = None
+        for tier in self.counts:
+            seconds, needed = self.__visit_time(tier, kills, current)
+            follow = min(self.__visit_time(t, kills + needed, tier)[0] for t in self.counts)
+            key = (seconds + follow, seconds, tier != current)
+            if best is None or key < best[0]:
+                best = (key, tier, seconds, needed)
+        return best[1], best[2], best[3]
+
+    def next_visit(self) -> Tuple[int, int]:
+        """Return the next tier to visit and the kills to make there."""
+        tier, _, needed = self.__pick(self.kills, self.tier)
+        return tier, needed
+
+    def schedule(self, duration :float) -> List[Tuple[int, int]]:
+        """Return the planned (tier, kills) visits for duration seconds."""
+        visits = []
+        elapsed = 0
+        kills = self.kills
+        current = self.tier
+        while True:
+            tier, seconds, needed = self.__pick(kills, current)
+            if elapsed + seconds > duration:
+                return visits
+            if visits and visits[-1][0] == tier:
+                visits[-1] = (tier, visits[-1][1] + needed)
+            else:
+                visits.append((tier, needed))
+            elapsed += seconds
+            kills += needed
+            current = tier
+
+    def ap_per_hour(self, duration :float =3600) -> float:
+        """Return the AP per hour the schedule is expected to give."""
+        elapsed = 0
+        ap = 0
+        kills = self.kills
+        current = self.tier
+        while True:
+            tier, seconds, needed = self.__pick(kills, current)
+            if elapsed + seconds > duration:
+                break
+            elapsed += seconds
+            kills += needed
+            current = tier
+            ap += 1
+        return ap / elapsed * 3600 if elapsed else 0
+
+    def save(self, path :str) -> None:
+        """Store the counters on disk so a restart doesn't have to rescan all tiers."""
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"counts": self.current_counts(), "tier": self.tier}, f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path :str, kill_time :float =0.8, switch_time :float =1.5) -> Optional["ItopodPlanner"]:
+        """Load counters stored with save(), returns None if there are none."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            planner = ItopodPlanner(data["counts"], kill_time, switch_time)
+            planner.tier = data.get("tier")
+        except (OSError, ValueError, KeyError):
+            return None
+        if set(planner.counts) != set(ItopodPlanner.TIERS):
+            return None
+        return planner
@@ -0,0 +1,47 @@
+"""Heavy dependencies imported on first use, so scripts start fast."""
+import functools
+import importlib
+
+from typing import Any, Callable
+
+
+class LazyModule:
+    """Stands in for a module and imports it when an attribute is first used.
+
+    Importing cv2, numpy, PIL, pytesseract and pywin32 takes a large part
+    of the startup time, while many scripts, and every --help, need few
+    or none of them. Modules using a LazyModule need
+    "from __future__ import annotations" if they annotate with it, so
+    annotations don't trigger the import.
+
+    Usage: cv2 = LazyModule("cv2")
+           cv2.imread(path)  # imports cv2
+    """
+
+    def __init__(self, name :str) -> None:
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attr :str) -> Any:
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__module is not None else "not loaded"
+        return f"<lazy module {self.__name!r}, {state}>"
+
+
+def deprecated(*args, **kwargs) -> Callable[[Callable], Callable]:
+    """deprecated.deprecated, imported when a deprecated function is first called."""
+    def decorate(fn :Callable) -> Callable:
+        wrapped = None
+        @functools.wraps(fn)
+        def call(*fn_args, **fn_kwargs) -> Any:
+            nonlocal wrapped
+            if wrapped is None:
+                from deprecated import deprecated as real
+                wrapped = real(*args, **kwargs)(fn)
+            return wrapped(*fn_args, **fn_kwargs)
+        return call
+    return decorate
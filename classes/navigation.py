@@ -1,5 +1,6 @@
 """Navigation class handles navigation through the menus."""
 import time
+from typing import List, Tuple
 from classes.inputs import Inputs
 import coordinates as coords
 import usersettings as userset
@@ -11,6 +12,8 @@ class Navigation:
     menus = coords.MENU_ITEMS
     # equipment = coords.EQUIPMENT_SLOTS # deprecated?
     current_menu = ''
+    input_value = None  # (value, Inputs.keys_sent) after the input box was last set, the box is shared by all menus
+    page_colors = {}  # tab set -> color of its selected tab, None if it can't be told apart
     
     @staticmethod
     def menu(target :str) -> None:
@@ -20,11 +23,65 @@ class Navigation:
             return
         Inputs.click(*Navigation.menus[target])
         time.sleep(userset.LONG_SLEEP)
+        Navigation.set_menu(target)
+    
+    @staticmethod
+    def set_menu(target :str) -> None:
+        """Record the current menu."""
         Navigation.current_menu = target
     
+    @staticmethod
+    def page(name :str, tabs :List[coords.Pixel], target :int) -> bool:
+        """Select a page tab within the current menu.
+        
+        The tab isn't clicked if a pixel shows it's already selected. The
+        selected color of a tab set is learned the first time one of its
+        tabs is clicked. Returns True if the tab was clicked.
+        
+        Keyword arguments
+        name   -- Name of the tab set, for example "digger".
+        tabs   -- Coordinates of the tabs.
+        target -- Index of the tab to select.
+        """
+        if Navigation.page_colors.get(name) is not None:
+            frame = Inputs.get_frame()
+            if Inputs.check_frame_color(frame, *tabs[target], Navigation.page_colors[name]):
+                return False
+        Inputs.click(*tabs[target])
+        if name not in Navigation.page_colors:
+            time.sleep(userset.SHORT_SLEEP)
+            frame = Inputs.get_frame()
+            colors = [Inputs.rgb_to_hex(frame[y, x]) for x, y in tabs]
+            selected = colors.pop(target)
+            Navigation.page_colors[name] = selected if selected not in colors else None
+        return True
+    
+    @staticmethod
+    def group_by_page(targets :List[int], per_page :int, reorder :bool =True) -> List[Tuple[int, List[int]]]:
+        """Group targets numbered from 1 into (page, items) visits, items numbered from 1.
+        
+        With reorder, pages are visited in the order of their first target
+        and every page is visited once. Without it the priority order of
+        targets is kept and only consecutive targets on a page are grouped.
+        """
+        visits = []
+        for target in targets:
+            page, item = divmod(target - 1, per_page)
+            if visits and visits[-1][0] == page:
+                visits[-1][1].append(item + 1)
+                continue
+            if reorder:
+                visit = next((v for v in visits if v[0] == page), None)
+                if visit is not None:
+                    visit[1].append(item + 1)
+                    continue
+            visits.append((page, [item + 1]))
+        return visits
+    
     @staticmethod
     def input_box() -> None:
-        """Click input box."""
+        """Click input box, which clears it."""
+        Navigation.input_value = None
         Inputs.click(*coords.NUMBER_INPUT_BOX)
         time.sleep(userset.SHORT_SLEEP)
     
@@ -35,7 +92,7 @@ class Navigation:
             return
         Inputs.click(*coords.REBIRTH)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'rebirth'
+        Navigation.set_menu('rebirth')
     
     @staticmethod
     def challenges() -> None:
@@ -66,7 +123,7 @@ class Navigation:
         Navigation.menu('ngu')
         Inputs.click(*coords.NGU_MAGIC)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'ngu_magic'
+        Navigation.set_menu('ngu_magic')
     
     @staticmethod
     def exp() -> None:
@@ -75,7 +132,7 @@ class Navigation:
             return
         Inputs.click(*coords.XP_MENU)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'exp'
+        Navigation.set_menu('exp')
     
     @staticmethod
     def exp_magic() -> None:
@@ -85,7 +142,7 @@ class Navigation:
         Navigation.exp()
         Inputs.click(*coords.MAGIC_MENU)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'exp_magic'
+        Navigation.set_menu('exp_magic')
     
     @staticmethod
     def exp_adventure() -> None:
@@ -95,7 +152,7 @@ class Navigation:
         Navigation.exp()
         Inputs.click(*coords.ADVENTURE_MENU)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "exp_adventure"
+        Navigation.set_menu("exp_adventure")
     
     @staticmethod
     def exp_rich() -> None:
@@ -105,7 +162,7 @@ class Navigation:
         Navigation.exp()
         Inputs.click(*coords.RICH_MENU)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "exp_rich"
+        Navigation.set_menu("exp_rich")
     
     @staticmethod
     def exp_hack() -> None:
@@ -115,7 +172,7 @@ class Navigation:
         Navigation.exp()
         Inputs.click(*coords.EXP_HACK_MENU)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "exp_hack"
+        Navigation.set_menu("exp_hack")
     
     @staticmethod
     def info() -> None:
@@ -124,7 +181,7 @@ class Navigation:
             return
         Inputs.click(*coords.INFO)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'info'
+        Navigation.set_menu('info')
     
     @staticmethod
     def misc() -> None:
@@ -134,7 +191,7 @@ class Navigation:
         Navigation.info()
         Inputs.click(*coords.MISC)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'misc'
+        Navigation.set_menu('misc')
     
     @staticmethod
     def perks() -> None:
@@ -144,7 +201,7 @@ class Navigation:
         Navigation.menu('adventure')
         Inputs.click(*coords.ITOPOD_PERKS)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'perks'
+        Navigation.set_menu('perks')
     
     @staticmethod
     def spells() -> None:
@@ -154,7 +211,7 @@ class Navigation:
         Navigation.menu('bloodmagic')
         Inputs.click(*coords.BM_SPELL)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'spells'
+        Navigation.set_menu('spells')
     
     @staticmethod
     def sellout() -> None:
@@ -163,7 +220,7 @@ class Navigation:
             return
         Inputs.click(*coords.SELLOUT)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "sellout"
+        Navigation.set_menu("sellout")
     
     @staticmethod
     def sellout_boost_2() -> None:
@@ -173,7 +230,7 @@ class Navigation:
         Navigation.sellout()
         Inputs.click(*coords.SELLOUT_BOOST_2)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "boost_2"
+        Navigation.set_menu("boost_2")
     
     @staticmethod
     def stat_breakdown() -> None:
@@ -183,4 +240,4 @@ class Navigation:
         Navigation.misc()
         Inputs.click(*coords.STAT_BREAKDOWN)
         time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = 'stat_breakdown'
+        Navigation.set_menu('stat_breakdown')
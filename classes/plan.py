@@ -0,0 +1,307 @@
+"""Declarative run plans compiled into an action graph."""
+from __future__ import annotations
+
+import json
+import operator
+import time
+
+from collections import namedtuple
+from typing      import TYPE_CHECKING, Any, Callable, Dict, Generator, List, Optional
+
+import constants   as const
+import coordinates as coords
+
+from classes          import features
+from classes.inputs   import Inputs
+
+if TYPE_CHECKING:
+    from classes.runtime import Runtime
+
+
+Action = namedtuple("Action", "name fn args kwargs sleep when")
+Task = namedtuple("Task", "every actions")
+Phase = namedtuple("Phase", "name enter actions tasks until max_time next")
+
+OPERATORS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt,
+             "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+class Plan:
+    """A run plan compiled from JSON.
+
+    A plan is a list of phases, the engine runs them in order, or jumps to
+    the phase named in "next". A phase:
+        name     -- Used for "next" and the timing report.
+        if       -- Condition to enter the phase, it's skipped otherwise.
+        do       -- Actions run once when the phase is entered.
+        repeat   -- Periodic tasks, {"every": seconds, "do": [actions]}, run
+                    until the "until" condition holds. A task without
+                    "every" runs on every pass.
+        until    -- Condition checked before every pass of repeat, no pass
+                    runs if it already holds when the phase is entered.
+        max_time -- Seconds after which repeat stops regardless of until.
+        next     -- Name of the phase to run next, "end" to end the run.
+
+    An action is {"call": "Class.method", "args": [...], "kwargs": {...}}
+    with a class from classes/features.py, or {"sleep": seconds}. Both
+    accept a "when" condition.
+
+    Arguments are JSON values or expressions evaluated when the action runs:
+        {"$setting": name}              -- A value from the plan's settings.
+        {"$coord": name}                -- A constant from coordinates.py.
+        {"$const": name, "key": key}    -- A constant from constants.py.
+        {"$call": "Class.method", "args": [...]} -- The result of a call.
+    An expression can have "times" and "plus" to scale and offset numbers.
+
+    A condition is {"pixel": name} for a color check from coordinates.py,
+    {"value": expression, ">=": expression} with any comparison operator,
+    or {"not": condition}, {"all": [conditions]}, {"any": [conditions]}.
+
+    Every name is resolved when the plan is compiled, so mistakes are
+    reported before the run starts. The engine times every phase and
+    action, see report().
+
+    Usage: plan = Plan.load("plans/guffin.json")
+           plan.run()
+    """
+
+    def __init__(self, spec :Dict[str, Any], targets :Dict[str, type] =None) -> None:
+        """Keyword arguments
+        spec    -- The plan, as loaded from JSON.
+        targets -- Extra classes that actions may call, by name.
+        """
+        self.targets = targets or {}
+        self.name = spec.get("name", "plan")
+        self.settings = spec.get("settings", {})
+        self.repeat = spec.get("repeat", False)
+        self.phases = [self.__phase(p, f"phases[{i}]") for i, p in enumerate(spec["phases"])]
+        self.index = {phase.name: i for i, phase in enumerate(self.phases)}
+        for phase in self.phases:
+            if phase.next not in (None, "end") and phase.next not in self.index:
+                raise ValueError(f"{self.name}: phase {phase.name} has unknown next phase {phase.next}")
+        self.phase_stats = {phase.name: {"runs": 0, "passes": 0, "seconds": 0.0} for phase in self.phases}
+        self.action_stats = {}
+        self.runs = 0
+
+    @staticmethod
+    def load(path :str, targets :Dict[str, type] =None) -> "Plan":
+        """Compile a plan from a JSON file."""
+        with open(path) as f:
+            return Plan(json.load(f), targets)
+
+    def __resolve(self, name :str, where :str) -> Callable:
+        """Return the function for "Class.method"."""
+        cls, _, method = name.partition(".")
+        target = self.targets.get(cls)
+        if target is None and isinstance(getattr(features, cls, None), type):
+            target = getattr(features, cls)
+        fn = getattr(target, method, None) if target is not None and not method.startswith("_") else None
+        if not callable(fn):
+            raise ValueError(f"{self.name}: {where}: unknown action {name}")
+        return fn
+
+    def __expression(self, value :Any, where :str) -> Callable[[], Any]:
+        """Compile a value into a function that evaluates it."""
+        if isinstance(value, list):
+            items = [self.__expression(v, f"{where}[{i}]") for i, v in enumerate(value)]
+            return lambda: [item() for item in items]
+        if not isinstance(value, dict):
+            return lambda: value
+        if not any(key.startswith("$") for key in value):
+            items = {k: self.__expression(v, f"{where}.{k}") for k, v in value.items()}
+            return lambda: {k: item() for k, item in items.items()}
+
+        if "$setting" in value:
+            name = value["$setting"]
+            if name not in self.settings:
+                raise ValueError(f"{self.name}: {where}: unknown setting {name}")
+            get = lambda: self.settings[name]
+        elif "$coord" in value:
+            if not hasattr(coords, value["$coord"]):
+                raise ValueError(f"{self.name}: {where}: unknown coordinate {value['$coord']}")
+            constant = getattr(coords, value["$coord"])
+            get = lambda: constant
+        elif "$const" in value:
+            if not hasattr(const, value["$const"]):
+                raise ValueError(f"{self.name}: {where}: unknown constant {value['$const']}")
+            constant = getattr(const, value["$const"])
+            if "key" in value:
+                key = self.__expression(value["key"], f"{where}.key")
+                get = lambda: constant[key()]
+            else:
+                get = lambda: constant
+        elif "$call" in value:
+            fn = self.__resolve(value["$call"], where)
+            args = self.__expression(value.get("args", []), f"{where}.args")
+            kwargs = self.__expression(value.get("kwargs", {}), f"{where}.kwargs")
+            get = lambda: fn(*args(), **kwargs())
+        else:
+            raise ValueError(f"{self.name}: {where}: unknown expression {value}")
+
+        times, plus = value.get("times"), value.get("plus")
+        if times is None and plus is None:
+            return get
+        return lambda: get() * (1 if times is None else times) + (plus or 0)
+
+    def __condition(self, spec :Optional[Dict[str, Any]], where :str) -> Optional[Callable[[], bool]]:
+        """Compile a condition into a function, None stays None."""
+        if spec is None:
+            return None
+        if "not" in spec:
+            cond = self.__condition(spec["not"], f"{where}.not")
+            return lambda: not cond()
+        if "all" in spec or "any" in spec:
+            key = "all" if "all" in spec else "any"
+            conds = [self.__condition(c, f"{where}.{key}[{i}]") for i, c in enumerate(spec[key])]
+            combine = all if key == "all" else any
+            return lambda: combine(cond() for cond in conds)
+        if "pixel" in spec:
+            if not hasattr(coords, spec["pixel"]):
+                raise ValueError(f"{self.name}: {where}: unknown color check {spec['pixel']}")
+            check = getattr(coords, spec["pixel"])
+            return lambda: Inputs.check_pixel_color(*check)
+        if "value" in spec:
+            ops = [(OPERATORS[op], self.__expression(rhs, f"{where}.{op}"))
+                   for op, rhs in spec.items() if op in OPERATORS]
+            if not ops:
+                raise ValueError(f"{self.name}: {where}: condition has no comparison")
+            lhs = self.__expression(spec["value"], f"{where}.value")
+            def compare() -> bool:
+                value = lhs()
+                return all(op(value, rhs()) for op, rhs in ops)
+            return compare
+        raise ValueError(f"{self.name}: {where}: unknown condition {spec}")
+
+    def __action(self, spec :Dict[str, Any], where :str) -> Action:
+        when = self.__condition(spec.get("when"), f"{where}.when")
+        if "sleep" in spec:
+            return Action("sleep", None, None, None, self.__expression(spec["sleep"], f"{where}.sleep"), when)
+        if "call" not in spec:
+            raise ValueError(f"{self.name}: {where}: an action needs call or sleep")
+        return Action(spec["call"], self.__resolve(spec["call"], where),
+                      self.__expression(spec.get("args", []), f"{where}.args"),
+                      self.__expression(spec.get("kwargs", {}), f"{where}.kwargs"), None, when)
+
+    def __phase(self, spec :Dict[str, Any], where :str) -> Phase:
+        name = spec.get("name", where)
+        where = f"phase {name}"
+        actions = [self.__action(a, f"{where}.do[{i}]") for i, a in enumerate(spec.get("do", []))]
+        tasks = []
+        for i, task in enumerate(spec.get("repeat", [])):
+            tasks.append(Task(task.get("every", 0),
+                              [self.__action(a, f"{where}.repeat[{i}].do[{j}]") for j, a in enumerate(task["do"])]))
+        until = self.__condition(spec.get("until"), f"{where}.until")
+        if tasks and until is None and spec.get("max_time") is None:
+            raise ValueError(f"{self.name}: {where}: repeat needs until or max_time")
+        return Phase(name, self.__condition(spec.get("if"), f"{where}.if"), actions, tasks,
+                     until, spec.get("max_time"), spec.get("next"))
+
+    def __run_actions(self, actions :List[Action]) -> Generator:
+        for action in actions:
+            if action.when is not None and not (yield action.when):
+                continue
+            if action.fn is None:
+                yield float(action.sleep())
+                continue
+            start = time.monotonic()
+            yield lambda: action.fn(*action.args(), **action.kwargs())
+            stats = self.action_stats.setdefault(action.name, {"calls": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["seconds"] += time.monotonic() - start
+
+    def __steps(self) -> Generator:
+        """Walk the graph once. Yields functions to call, whose results are
+        sent back, and seconds to sleep."""
+        i = 0
+        while 0 <= i < len(self.phases):
+            phase = self.phases[i]
+            i += 1
+            if phase.enter is not None and not (yield phase.enter):
+                continue
+            start = time.monotonic()
+            stats = self.phase_stats[phase.name]
+            stats["runs"] += 1
+            yield from self.__run_actions(phase.actions)
+            last_run = {}
+            while phase.tasks:
+                if phase.until is not None and (yield phase.until):
+                    break
+                now = time.monotonic()
+                for n, task in enumerate(phase.tasks):
+                    if now - last_run.get(n, -task.every) >= task.every:
+                        last_run[n] = now
+                        yield from self.__run_actions(task.actions)
+                stats["passes"] += 1
+                if phase.max_time is not None and time.monotonic() - start >= phase.max_time:
+                    break
+            stats["seconds"] += time.monotonic() - start
+            if phase.next == "end":
+                break
+            if phase.next is not None:
+                i = self.index[phase.next]
+
+    def __finished(self, started :float) -> None:
+        self.runs += 1
+        print(f"Completed {self.name} run #{self.runs} in {time.strftime('%H:%M:%S', time.gmtime(time.monotonic() - started))}")
+
+    def run(self, times :int =None) -> None:
+        """Run the plan, once or times times, forever if the plan repeats."""
+        count = 0
+        while times is None or count < times:
+            started = time.monotonic()
+            steps = self.__steps()
+            result = None
+            try:
+                while True:
+                    step = steps.send(result)
+                    if callable(step):
+                        result = step()
+                    else:
+                        time.sleep(step)
+                        result = None
+            except StopIteration:
+                pass
+            self.__finished(started)
+            count += 1
+            if times is None and not self.repeat:
+                break
+
+    async def run_async(self, rt :Runtime, times :int =None) -> None:
+        """Run the plan on the asyncio runtime, see run().
+
+        Actions and conditions run on the input channel and sleeps hand the
+        game to other sessions of a Scheduler.
+        """
+        count = 0
+        while times is None or count < times:
+            started = time.monotonic()
+            steps = self.__steps()
+            result = None
+            try:
+                while True:
+                    step = steps.send(result)
+                    if callable(step):
+                        result = await rt.call(step)
+                    else:
+                        await rt.sleep(step)
+                        result = None
+            except StopIteration:
+                pass
+            self.__finished(started)
+            count += 1
+            if times is None and not self.repeat:
+                break
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return the runs, passes and seconds of every phase and the calls and seconds of every action."""
+        return {"phases": self.phase_stats, "actions": self.action_stats}
+
+    def print_report(self) -> None:
+        """Print the time spent in every phase and action."""
+        print(f"{'phase':<20}{'runs':>6}{'passes':>8}{'seconds':>10}{'per run':>10}")
+        for name, s in self.phase_stats.items():
+            per_run = s["seconds"] / s["runs"] if s["runs"] else 0
+            print(f"{name:<20}{s['runs']:>6}{s['passes']:>8}{s['seconds']:>10.1f}{per_run:>10.1f}")
+        print(f"{'action':<36}{'calls':>6}{'seconds':>10}")
+        for name, s in sorted(self.action_stats.items(), key=lambda item: -item[1]["seconds"]):
+            print(f"{name:<36}{s['calls']:>6}{s['seconds']:>10.1f}")
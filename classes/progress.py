@@ -0,0 +1,312 @@
+"""Offline model of rebirth progress for tuning script settings."""
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import time
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+import constants as const
+
+from classes.lazy import LazyModule
+
+numpy = LazyModule("numpy")
+
+
+class ProgressModel:
+    """Predicts the boss a rebirth reaches from its duration and allocation.
+
+    Boss HP grows geometrically, so the boss a rebirth reaches grows with
+    the log of the player's power, and the power comes from the levels
+    bought during the rebirth. Giving a feature a larger share of the idle
+    energy levels it faster, like running it longer, so the model is
+        boss = c0 + c1 * log(duration * rate)
+    where rate is the product of the share of every allocation raised to
+    its weight. That is linear in log(duration) and the log of every
+    share, so c0, c1 and the weights are fitted to the runs a script
+    recorded, see record() and fit(). The time every rebirth loses to
+    setting up is the median gap between recorded runs.
+
+    Every boss killed gives EXP, the model ranks settings by the bosses
+    killed per hour of play. A session of a few hours fits a whole number
+    of rebirths, so the best duration depends on how long you play.
+
+    The runs only say something about the settings they varied, and only
+    within the range they recorded. sweep() stays within that range, and
+    a setting the runs didn't vary is kept at its last recorded value,
+    see unconstrained().
+
+    Usage: model = ProgressModel.load("guffin_runs.jsonl")
+           model.print_recommendations()
+    """
+
+    SETTINGS = ("duration", "aug_split", "aug_energy", "tm_energy")
+    DEFAULTS = {"duration": 1800, "aug_split": 0.66, "aug_energy": 0.5, "tm_energy": 0.1}
+    # how much a share of the idle energy counts towards the rate, until fitted
+    WEIGHTS = {"augment": 0.4, "upgrade": 0.2, "time machine": 0.1, "ngu": 0.3}
+    GRID = {"duration": list(range(120, 7201, 60)),
+            "aug_split": [round(0.05 * i, 2) for i in range(1, 20)],
+            "aug_energy": [round(0.05 * i, 2) for i in range(2, 17)],
+            "tm_energy": [round(0.05 * i, 2) for i in range(1, 9)]}
+    TICKS = 50  # game ticks per second
+
+    def __init__(self, c0 :float =0, c1 :float =10, overhead :float =60,
+                 weights :Dict[str, float] =None) -> None:
+        """Keyword arguments
+        c0, c1   -- Coefficients of the boss curve, see fit().
+        overhead -- Seconds every rebirth spends on anything but progress.
+        weights  -- Weight of every allocation, see WEIGHTS.
+        """
+        self.c0 = c0
+        self.c1 = c1
+        self.overhead = overhead
+        self.weights = weights or dict(ProgressModel.WEIGHTS)
+        self.runs = 0
+        self.ranges = {}  # setting -> (lowest, highest) value recorded
+        self.current = {}  # setting -> value of the last recorded run
+        self.fitted = set()  # settings whose effect was fitted to the runs
+        self.wish_stats = None  # the last wish stats recorded, see rank_wishes()
+
+    @staticmethod
+    def record(path :str, **run) -> None:
+        """Append a run to a run log.
+
+        Keyword arguments
+        path -- The run log, one JSON object per line.
+        run  -- duration, boss and the settings in SETTINGS, optionally the
+                wish stats as wishes, see rank_wishes().
+        """
+        run["time"] = time.time()
+        with open(path, "a") as f:
+            f.write(json.dumps(run) + "\n")
+
+    @staticmethod
+    def load(path :str) -> "ProgressModel":
+        """Fit a model to the runs in a run log, the default model if there are none."""
+        if not os.path.exists(path):
+            print(f"No runs recorded in {path}, using the default model.")
+            return ProgressModel()
+        with open(path) as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+        return ProgressModel.fit(runs)
+
+    @staticmethod
+    def fit(runs :Iterable[Dict[str, Any]]) -> "ProgressModel":
+        """Fit c0, c1, the weights and the overhead to recorded runs.
+
+        c1 is fitted if the runs have different durations, the weight of
+        an allocation if the runs gave it different shares. The others
+        keep their defaults, and so do all of them if there are too few
+        runs to tell the effects apart.
+        """
+        model = ProgressModel()
+        runs = [run for run in runs if run.get("duration", 0) > 0 and run.get("boss")]
+        wishes = [run["wishes"] for run in runs if run.get("wishes")]
+        model.wish_stats = wishes[-1] if wishes else None
+        model.runs = len(runs)
+        if not runs:
+            return model
+
+        settings = {name: numpy.array([run.get(name, default) for run in runs], float)
+                    for name, default in ProgressModel.DEFAULTS.items()}
+        model.ranges = {name: (float(values.min()), float(values.max())) for name, values in settings.items()}
+        model.current = {name: float(values[-1]) for name, values in settings.items()}
+        boss = numpy.array([run["boss"] for run in runs], float)
+
+        shares = ProgressModel.shares(settings["aug_split"], settings["aug_energy"], settings["tm_energy"])
+        valid = numpy.all([share > 0 for share in shares.values()], 0)
+        if not valid.any():
+            return model
+        settings = {name: values[valid] for name, values in settings.items()}
+        columns = {"duration": numpy.log(settings["duration"])}
+        columns.update((name, numpy.log(share[valid])) for name, share in shares.items())
+        columns = {name: column for name, column in columns.items() if numpy.ptp(column) > 1e-9}
+        x = numpy.stack([numpy.ones(len(boss[valid]))] + list(columns.values()), 1)
+        if columns and len(x) > x.shape[1] and numpy.linalg.matrix_rank(x) == x.shape[1]:
+            coefficients = dict(zip(columns, numpy.linalg.lstsq(x, boss[valid], rcond=None)[0][1:]))
+            c1 = coefficients.pop("duration", 0)
+            if c1 > 0:
+                model.c1 = float(c1)
+                model.fitted.add("duration")
+            for name, coefficient in coefficients.items():
+                model.weights[name] = float(coefficient) / model.c1
+            model.fitted.update(name for name in ProgressModel.SETTINGS[1:] if numpy.ptp(settings[name]) > 0)
+        model.c0 = float(numpy.mean(boss[valid] - model.c1 * model.progress(**settings)))
+
+        ended = sorted((run["time"], run["duration"]) for run in runs if "time" in run)
+        gaps = [end - last - duration for (last, _), (end, duration) in zip(ended, ended[1:])]
+        gaps = [gap for gap in gaps if 0 <= gap < 3600]  # longer gaps are breaks
+        if gaps:
+            model.overhead = float(numpy.median(gaps))
+        return model
+
+    @staticmethod
+    def shares(aug_split :Any, aug_energy :Any, tm_energy :Any) -> Dict[str, numpy.ndarray]:
+        """Return the share of the idle energy every allocation gets, see rate() for the settings."""
+        aug_split, aug_energy, tm_energy = (numpy.asarray(v, float) for v in (aug_split, aug_energy, tm_energy))
+        return {"augment": aug_energy * aug_split,
+                "upgrade": aug_energy * (1 - aug_split),
+                "time machine": tm_energy,
+                "ngu": 1 - aug_energy - tm_energy}
+
+    def rate(self, aug_split :Any =0.66, aug_energy :Any =0.5, tm_energy :Any =0.1) -> numpy.ndarray:
+        """Return how fast an allocation progresses, nan if it isn't possible.
+
+        Keyword arguments
+        aug_split  -- Share of the augment energy put in the augment, the
+                      rest goes to its upgrade.
+        aug_energy -- Share of the idle energy put in augments.
+        tm_energy  -- Share of the idle energy put in the time machine,
+                      what's left goes to NGUs.
+        """
+        shares = ProgressModel.shares(aug_split, aug_energy, tm_energy)
+        rate = numpy.ones(numpy.broadcast(*shares.values()).shape)
+        for name, weight in self.weights.items():
+            share = numpy.where(shares[name] > 0, shares[name], numpy.nan)
+            rate = rate * share ** weight
+        return rate
+
+    def progress(self, duration :Any, **settings) -> numpy.ndarray:
+        """Return log(duration * rate), see rate() for the settings."""
+        return numpy.log(numpy.maximum(duration, 1) * self.rate(**settings))
+
+    def boss(self, duration :Any, **settings) -> numpy.ndarray:
+        """Return the boss a rebirth of duration seconds reaches, see rate() for the settings."""
+        return numpy.maximum(self.c0 + self.c1 * self.progress(duration, **settings), 1)
+
+    def per_hour(self, hours :float, duration :Any, **settings) -> numpy.ndarray:
+        """Return the bosses killed per hour over a session of hours.
+
+        The session holds as many whole rebirths as fit, the time left is
+        one more, shorter rebirth. See rate() for the settings.
+        """
+        session = hours * 3600
+        cycle = numpy.asarray(duration, float) + self.overhead
+        runs = numpy.floor(session / cycle)
+        rest = session - runs * cycle - self.overhead
+        killed = runs * (self.boss(duration, **settings) - 1)
+        killed = killed + numpy.where(rest > 0, self.boss(numpy.maximum(rest, 1), **settings) - 1, 0)
+        return killed / hours
+
+    def unconstrained(self) -> List[str]:
+        """Return the settings whose effect wasn't fitted, the runs say nothing about other values."""
+        return [name for name in ProgressModel.SETTINGS if name not in self.fitted]
+
+    def grid(self, name :str) -> numpy.ndarray:
+        """Return the values of GRID for a setting within the range the runs recorded.
+
+        A setting whose effect wasn't fitted is kept at its last recorded
+        value, or the default without runs.
+        """
+        if name not in self.fitted:
+            return numpy.asarray([self.current.get(name, ProgressModel.DEFAULTS[name])], float)
+        low, high = self.ranges[name]
+        values = numpy.asarray(ProgressModel.GRID[name], float)
+        return numpy.unique(numpy.concatenate([[low, high], values[(values >= low) & (values <= high)]]))
+
+    def sweep(self, hours :float, top :int =10, **grid) -> List[Dict[str, float]]:
+        """Evaluate every combination of settings, return the top ones best first.
+
+        Keyword arguments
+        hours -- The length of the session.
+        top   -- How many combinations to return.
+        grid  -- Values to try for any of SETTINGS, defaults to the ones
+                 the recorded runs cover, see grid().
+        """
+        axes = [numpy.asarray(grid[name] if name in grid else self.grid(name), float)
+                for name in ProgressModel.SETTINGS]
+        values = numpy.meshgrid(*axes, indexing="ij")
+        settings = dict(zip(ProgressModel.SETTINGS[1:], values[1:]))
+        per_hour = numpy.nan_to_num(self.per_hour(hours, values[0], **settings), nan=-numpy.inf).ravel()
+        best = numpy.argsort(-per_hour)[:top]
+        return [dict({name: float(v.ravel()[i]) for name, v in zip(ProgressModel.SETTINGS, values)},
+                     bosses_per_hour=float(per_hour[i]))
+                for i in best if numpy.isfinite(per_hour[i])]
+
+    def recommend(self, hours :Sequence[float] =(1, 2, 4, 8, 24), **grid) -> Dict[float, Dict[str, float]]:
+        """Return the best settings for sessions of every length in hours, see sweep()."""
+        return {h: self.sweep(h, top=1, **grid)[0] for h in hours}
+
+    @staticmethod
+    def wish_seconds(divider :float, levels :int, speed :Any, min_time :float) -> numpy.ndarray:
+        """Return the seconds a wish takes from level 0, see Wishes.get_eta().
+
+        Keyword arguments
+        divider  -- The divider of the wish, see constants.WISH_ORDER.
+        levels   -- The levels of the wish.
+        speed    -- Wish speed times the EMR power and allocation product ** 0.17.
+        min_time -- The minimum wish time in minutes.
+        """
+        speed = numpy.asarray(speed, float)[..., None]
+        level = numpy.arange(1, levels + 1)
+        with numpy.errstate(divide="ignore"):
+            ticks = numpy.maximum(min_time * 60 * ProgressModel.TICKS, divider * level / speed)
+        return ticks.sum(-1) / ProgressModel.TICKS
+
+    def rank_wishes(self, hours :float, orders :Dict[str, List[int]] =None,
+                    stats :Dict[str, Any] =None) -> List[Dict[str, Any]]:
+        """Return the wishes every priority order completes in a session, most first.
+
+        Every slot gets an even share of the idle caps and the next wish
+        in the order starts when a slot frees up.
+
+        Keyword arguments
+        hours  -- The length of the session.
+        orders -- Wish ids by priority, by name. Defaults to the order of
+                  constants.WISH_ORDER and the same wishes fastest first.
+        stats  -- epow, mpow, rpow, ecap, mcap, rcap, wish_speed, slots,
+                  min_time and completed, defaults to the last recorded.
+        """
+        stats = stats or self.wish_stats
+        if not stats:
+            return []
+        completed = set(stats.get("completed", [])) | set(const.WISH_BLACKLIST)
+        wishes = [wish for wish in const.WISH_ORDER if wish.id not in completed]
+        slots = max(stats["slots"], 1)
+        emr = numpy.array([stats["ecap"], stats["mcap"], stats["rcap"]], float) / slots
+        speed = stats["wish_speed"] * (stats["epow"] * stats["mpow"] * stats["rpow"] * emr.prod()) ** 0.17
+        eta = {wish.id: float(ProgressModel.wish_seconds(wish.divider, wish.levels, speed, stats["min_time"]))
+               for wish in wishes}
+        if orders is None:
+            priority = [wish.id for wish in wishes]
+            orders = {"priority": priority, "fastest first": sorted(priority, key=eta.get)}
+
+        session = hours * 3600
+        ranking = []
+        for name, order in orders.items():
+            free = [0.0] * slots
+            done = []
+            for wish_id in order:
+                start = heapq.heappop(free)
+                end = start + eta.get(wish_id, numpy.inf)
+                heapq.heappush(free, end)
+                if end <= session:
+                    done.append(wish_id)
+            ranking.append({"order": name, "completed": done})
+        return sorted(ranking, key=lambda r: -len(r["completed"]))
+
+    def print_recommendations(self, hours :Sequence[float] =(1, 2, 4, 8, 24)) -> None:
+        """Print the best settings for every session length, and the best wish order if wishes were recorded."""
+        print(f"Fitted to {self.runs} runs: boss = {self.c0:.1f} + {self.c1:.2f} * log(duration * rate), "
+              f"{self.overhead:.0f}s per rebirth")
+        tuned = [name for name in ProgressModel.SETTINGS if name in self.fitted]
+        if not self.runs:
+            print("Not tuned, no runs recorded.")
+        elif not tuned:
+            print("Not tuned, the recorded runs don't vary the settings enough to tell their effects apart.")
+        else:
+            print(f"{'hours':>6}" + "".join(f"{name:>12}" for name in tuned) + f"{'bosses/h':>10}")
+            for h, best in self.recommend(hours).items():
+                print(f"{h:>6}" + "".join(f"{best[name]:>12.{0 if name == 'duration' else 2}f}" for name in tuned)
+                      + f"{best['bosses_per_hour']:>10.1f}")
+        kept = [f"{name} {self.current[name]:g}" for name in self.unconstrained() if name in self.current]
+        if kept and tuned:
+            print(f"Not tuned, kept at the last recorded value: {', '.join(kept)}. "
+                  "Record runs with other values to tune them.")
+        for h in hours:
+            ranking = self.rank_wishes(h)
+            if ranking and ranking[0]["completed"]:
+                names = ", ".join(const.WISH_BY_ID[i].name for i in ranking[0]["completed"])
+                print(f"{h}h: wish order {ranking[0]['order']} completes {names}")
@@ -0,0 +1,205 @@
+"""Record the frames and inputs of a run and replay them offline."""
+import hashlib
+import json
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing             import Any, Dict, Optional
+
+from PIL import Image as image
+
+from classes.backend import Backend
+from classes.inputs  import Inputs
+from classes.window  import Window
+
+
+class Recorder(Backend):
+    """Records every capture and input of a run to a session folder.
+
+    Captured bitmaps are stored once per distinct image as compressed PNG
+    files named after their hash, so a static screen costs one file. Every
+    capture, pixel read and input is appended to events.jsonl with the
+    time.monotonic() offset it happened at, the file is flushed as it's
+    written so a crashed run still leaves a usable recording.
+
+    Usage: with Recorder("recordings/slow_quest"):
+               Questing.questing()
+    """
+
+    def __init__(self, path :str) -> None:
+        os.makedirs(os.path.join(path, "frames"), exist_ok=True)
+        self.path = path
+        self.saved = set(name[:-4] for name in os.listdir(os.path.join(path, "frames")))
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="recorder")
+        self.events = open(os.path.join(path, "events.jsonl"), "w")
+        self.start = time.monotonic()
+        self.frames = 0
+        self.record("start", x=Window.x, y=Window.y, time=time.time())
+
+    def record(self, kind :str, **data) -> None:
+        """Append an event to the recording."""
+        data.update(t=round(time.monotonic() - self.start, 4), type=kind)
+        self.events.write(json.dumps(data) + "\n")
+        self.events.flush()
+
+    def get_bitmap(self) -> image:
+        bmp = Backend.window["get_bitmap"]()
+        digest = hashlib.blake2b(bmp.tobytes(), digest_size=12).hexdigest()
+        if digest not in self.saved:
+            self.saved.add(digest)
+            # PNG encoding is slow, keep it off the input thread
+            self.writer.submit(bmp.save, os.path.join(self.path, "frames", digest + ".png"))
+        self.frames += 1
+        self.record("frame", hash=digest)
+        return bmp
+
+    def get_pixel_color(self, x :int, y :int, debug :bool =False) -> str:
+        color = Backend.window["get_pixel_color"](x, y, debug)
+        self.record("pixel", x=x, y=y, color=color)
+        return color
+
+    def click(self, x :int, y :int, button :str ="left", fast :bool =False) -> None:
+        self.record("click", x=x, y=y, button=button)
+        Backend.window["click"](x, y, button, fast)
+
+    def click_drag(self, x :int, y :int, x2 :int, y2 :int) -> None:
+        self.record("drag", x=x, y=y, x2=x2, y2=y2)
+        Backend.window["click_drag"](x, y, x2, y2)
+
+    def ctrl_click(self, x :int, y :int) -> None:
+        self.record("ctrl_click", x=x, y=y)
+        Backend.window["ctrl_click"](x, y)
+
+    def send_arrow_press(self, left :bool) -> None:
+        self.record("arrow", left=left)
+        Backend.window["send_arrow_press"](left)
+
+    def send_string(self, string :str) -> None:
+        self.record("keys", string=str(int(string) if isinstance(string, float) else string))
+        Backend.window["send_string"](string)
+
+    def report(self) -> Dict[str, int]:
+        """Return the captures recorded and the distinct frames stored."""
+        return {"frames": self.frames, "distinct frames": len(self.saved)}
+
+    def close(self) -> None:
+        """Finish writing the frames and stop recording."""
+        self.uninstall()
+        self.writer.shutdown(wait=True)
+        self.events.close()
+
+
+class Replay(Backend):
+    """Feeds a recording back to Inputs, no game window needed.
+
+    Every capture returns the next recorded frame and every pixel read the
+    next recorded color, so recognition and decision logic run on exactly
+    what the recorded run saw. Inputs are checked against the recorded
+    ones, a run that does something else than the recording diverged from
+    it. With virtual_time the clock follows the recorded one and sleeps
+    return at once, see Backend, so runs replay as fast as the logic
+    allows and the rebirth clock and other timers behave as recorded.
+    Runtime.start() runs its event loop on the recorded clock too, install
+    the replay before it starts.
+
+    Usage: with Replay("recordings/slow_quest") as replay:
+               Questing.questing()  # until the recording runs out
+           print(replay.report())
+    """
+
+    INPUTS = ("click", "drag", "ctrl_click", "arrow", "keys")
+
+    def __init__(self, path :str, strict :bool =False, virtual_time :bool =True) -> None:
+        """Keyword arguments
+        path         -- The session folder written by Recorder.
+        strict       -- Raise RuntimeError on the first diverging input
+                        instead of counting it.
+        virtual_time -- Follow the recorded clock instead of the real one
+                        while the replay is installed.
+        """
+        self.path = path
+        self.strict = strict
+        with open(os.path.join(path, "events.jsonl")) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        self.start = events[0] if events and events[0]["type"] == "start" else {"x": 0, "y": 0}
+        self.streams = {
+            "frame": [e for e in events if e["type"] == "frame"],
+            "pixel": [e for e in events if e["type"] == "pixel"],
+            "input": [e for e in events if e["type"] in Replay.INPUTS],
+        }
+        self.cursors = {stream: 0 for stream in self.streams}
+        self.cached = (None, None)  # (hash, bitmap) of the last frame served
+        self.clock = 0.0 if virtual_time else None
+        self.recorded = 0.0  # recorded time of the last event replayed
+        self.divergences = []
+
+    def install(self) -> None:
+        super().install()
+        Window.setPos(self.start["x"], self.start["y"])
+
+    def __next(self, stream :str) -> Dict[str, Any]:
+        """Return the next event of a stream and move the clock to it."""
+        events = self.streams[stream]
+        i = self.cursors[stream]
+        if i >= len(events):
+            raise EOFError(f"Replay of {self.path} ran out of {stream} events.")
+        self.cursors[stream] = i + 1
+        self.recorded = events[i]["t"]
+        if self.clock is not None:
+            self.advance(self.recorded - self.clock)
+        return events[i]
+
+    def __diverged(self, expected :Optional[Dict[str, Any]], actual :Dict[str, Any]) -> None:
+        self.divergences.append((expected, actual))
+        if self.strict:
+            raise RuntimeError(f"Replay diverged: recorded {expected}, got {actual}")
+
+    def __input(self, kind :str, **data) -> None:
+        """Check an input against the next recorded one."""
+        actual = dict(data, type=kind)
+        try:
+            expected = self.__next("input")
+        except EOFError:
+            self.__diverged(None, actual)
+            return
+        if any(expected.get(key) != value for key, value in actual.items()):
+            self.__diverged(expected, actual)
+
+    def get_bitmap(self) -> image:
+        digest = self.__next("frame")["hash"]
+        if self.cached[0] != digest:
+            with image.open(os.path.join(self.path, "frames", digest + ".png")) as bmp:
+                self.cached = (digest, bmp.convert("RGB"))
+        return self.cached[1].copy()
+
+    def get_pixel_color(self, x :int, y :int, debug :bool =False) -> str:
+        event = self.__next("pixel")
+        if (event["x"], event["y"]) != (x, y):
+            self.__diverged(event, {"type": "pixel", "x": x, "y": y})
+        if debug: print(event["color"])
+        return event["color"]
+
+    def click(self, x :int, y :int, button :str ="left", fast :bool =False) -> None:
+        self.__input("click", x=x, y=y, button=button)
+
+    def click_drag(self, x :int, y :int, x2 :int, y2 :int) -> None:
+        self.__input("drag", x=x, y=y, x2=x2, y2=y2)
+
+    def ctrl_click(self, x :int, y :int) -> None:
+        self.__input("ctrl_click", x=x, y=y)
+
+    def send_arrow_press(self, left :bool) -> None:
+        self.__input("arrow", left=left)
+
+    def send_string(self, string :str) -> None:
+        Inputs.keys_sent += 1
+        self.__input("keys", string=str(int(string) if isinstance(string, float) else string))
+
+    def report(self) -> Dict[str, Any]:
+        """Return how much of the recording was replayed and the divergences."""
+        report = {f"{stream}s": f"{self.cursors[stream]}/{len(events)}" for stream, events in self.streams.items()}
+        report["divergences"] = len(self.divergences)
+        report["recorded seconds"] = self.recorded
+        return report
+
@@ -0,0 +1,209 @@
+"""Asyncio runtime that overlaps OCR, network I/O and UI input."""
+from __future__ import annotations
+
+import asyncio
+import functools
+import selectors
+import time
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor
+from typing             import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Set, Tuple
+
+from classes.backend import Backend
+from classes.inputs  import Inputs
+from classes.window  import Window
+
+if TYPE_CHECKING:
+    import numpy
+    from PIL.Image import Image as PILImage
+
+
+class Runtime:
+    """Runs scripts as coroutines on three executors.
+
+    Everything that touches the game window, clicks, key presses, pixel
+    probes, captures and whole synchronous feature calls, goes through the
+    input channel. It's a single worker thread, so UI actions run in the
+    order they were submitted and never interleave. OCR and recognition run
+    on frames that were captured through the channel, in a separate pool,
+    and network I/O in a third one. Both overlap with the next UI action
+    and the event loop stays free for timers and background tasks.
+
+    With a backend on virtual time installed, see Backend, the event loop
+    runs on its clock, see VirtualTimeLoop.
+
+    Usage: async def main(rt):
+               boss = rt.spawn(rt.ocr_digits(*coords.OCR_BOSS))  # read in the background
+               await rt.call(Adventure.adventure, itopodauto=True)  # while this runs
+               print(await boss)
+           Runtime.start(main)
+    """
+
+    def __init__(self, cpu_workers :int =2, io_workers :int =4) -> None:
+        """Keyword arguments
+        cpu_workers -- Threads for OCR and recognition. Tesseract runs in its own
+                       process and numpy releases the GIL, so threads are enough.
+        io_workers  -- Threads for network requests.
+        """
+        self.input_pool = ThreadPoolExecutor(1, thread_name_prefix="input", initializer=Backend.follow_clock)
+        self.cpu_pool = ThreadPoolExecutor(cpu_workers, thread_name_prefix="cpu", initializer=Backend.follow_clock)
+        self.io_pool = ThreadPoolExecutor(io_workers, thread_name_prefix="io")
+        self.tasks :Set[asyncio.Task] = set()
+
+    async def __run(self, pool :ThreadPoolExecutor, fn :Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    async def call(self, fn :Callable, *args, **kwargs) -> Any:
+        """Run a synchronous function on the input channel, after every action queued before it."""
+        return await self.__run(self.input_pool, fn, *args, **kwargs)
+
+    async def cpu(self, fn :Callable, *args, **kwargs) -> Any:
+        """Run a CPU-bound function, like OCR on a captured image, off the input channel."""
+        return await self.__run(self.cpu_pool, fn, *args, **kwargs)
+
+    async def io(self, fn :Callable, *args, **kwargs) -> Any:
+        """Run a blocking network call off the input channel."""
+        return await self.__run(self.io_pool, fn, *args, **kwargs)
+
+    def spawn(self, coro :Awaitable) -> asyncio.Task:
+        """Run a coroutine in the background, close() waits for it."""
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.__done)
+        return task
+
+    def __done(self, task :asyncio.Task) -> None:
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            traceback.print_exception(type(task.exception()), task.exception(), task.exception().__traceback__)
+
+    async def sleep(self, seconds :float) -> None:
+        """Wait without blocking the input channel or background tasks."""
+        await asyncio.sleep(max(seconds, 0))
+
+    async def click(self, x :int, y :int, button :str ="left", fast :bool =False) -> None:
+        """Click at pixel xy."""
+        await self.call(Inputs.click, x, y, button=button, fast=fast)
+
+    async def send_string(self, string :str) -> None:
+        """Send one or multiple characters to the window."""
+        await self.call(Inputs.send_string, string)
+
+    async def probe(self, x :int, y :int, checks :Iterable[str]) -> bool:
+        """Check if coordinate matches with one or more colors."""
+        return await self.call(Inputs.check_pixel_color, x, y, checks)
+
+    async def capture(self, area :Tuple[int, int, int, int] =None) -> Tuple[PILImage, float]:
+        """Capture the window, returns the bitmap and the time.monotonic() it was taken.
+
+        Keyword arguments
+        area -- (x_start, y_start, x_end, y_end) in game coordinates to crop
+                the bitmap to. Cropping happens on the input channel so it
+                uses the position of the window that was captured.
+        """
+        def grab() -> Tuple[PILImage, float]:
+            bmp = Inputs.get_bitmap()
+            if area is not None:
+                x_start, y_start, x_end, y_end = Window.gameCoords(*area)
+                # Bitmaps are created with a 8px border
+                bmp = bmp.crop((x_start + 8, y_start + 8, x_end + 8, y_end + 8))
+            return bmp, time.monotonic()
+        return await self.call(grab)
+
+    async def frame(self) -> numpy.ndarray:
+        """Capture the game area as an RGB array, see Inputs.get_frame()."""
+        return await self.call(Inputs.get_frame)
+
+    async def ocr(self, x_start :int, y_start :int, x_end :int, y_end :int, **kwargs) -> str:
+        """Capture the area through the input channel and OCR it in the CPU pool.
+
+        Keyword arguments are passed to Inputs.ocr().
+        """
+        bmp, _ = await self.capture((x_start, y_start, x_end, y_end))
+        return await self.cpu(Inputs.ocr, x_start, y_start, x_end, y_end, bmp=bmp, **kwargs)
+
+    async def ocr_digits(self, x_1 :int, y_1 :int, x_2 :int, y_2 :int) -> str:
+        """Read the digits in a single line of text, see Inputs.ocr_digits()."""
+        frame = await self.frame()
+        return await self.cpu(Inputs.ocr_digits, x_1, y_1, x_2, y_2, frame=frame)
+
+    async def close(self) -> None:
+        """Wait for the background tasks and stop the executors."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        for pool in (self.input_pool, self.cpu_pool, self.io_pool):
+            pool.shutdown(wait=True)
+
+    @staticmethod
+    def start(main :Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Run main(runtime, *args, **kwargs) on a new event loop until it returns.
+
+        The loop runs on the clock of the installed backend if it has one.
+        """
+        async def run() -> Any:
+            runtime = Runtime()
+            try:
+                return await main(runtime, *args, **kwargs)
+            finally:
+                await runtime.close()
+        backend = Backend.active
+        if backend is not None and backend.clock is not None:
+            loop = VirtualTimeLoop(backend)
+        else:
+            loop = asyncio.new_event_loop()
+        Backend.loops += 1
+        try:
+            asyncio.set_event_loop(loop)
+            return loop.run_until_complete(run())
+        finally:
+            Backend.loops -= 1
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                asyncio.set_event_loop(None)
+                loop.close()
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop on the virtual clock of a backend, see Backend.
+
+    loop.time() is the backend's clock. When no callback is ready and no
+    executor call is in flight, the loop moves the clock to the next timer
+    instead of waiting for it, so asyncio.sleep() returns at once like
+    time.sleep() does. While an executor call runs the loop waits for it,
+    the call may move the clock itself.
+    """
+
+    class Selector(selectors.DefaultSelector):
+        def __init__(self, loop :VirtualTimeLoop) -> None:
+            super().__init__()
+            self.loop = loop
+
+        def select(self, timeout :float =None) -> list:
+            if timeout is None or timeout <= 0:
+                return super().select(timeout)
+            if self.loop.pending:
+                return super().select()  # the executor call wakes the loop when it's done
+            events = super().select(0)
+            if not events:
+                self.loop.backend.advance(timeout)
+            return events
+
+    def __init__(self, backend :Backend) -> None:
+        self.backend = backend
+        self.pending = 0  # executor calls in flight
+        super().__init__(VirtualTimeLoop.Selector(self))
+
+    def time(self) -> float:
+        return self.backend.clock
+
+    def run_in_executor(self, executor :Any, func :Callable, *args) -> asyncio.Future:
+        future = super().run_in_executor(executor, func, *args)
+        self.pending += 1
+        future.add_done_callback(self.__finished)
+        return future
+
+    def __finished(self, future :asyncio.Future) -> None:
+        self.pending -= 1
@@ -0,0 +1,197 @@
+"""Per-window state and a scheduler that drives several game windows."""
+import asyncio
+import copy
+import time
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from classes.features   import Adventure, BloodMagic, FightBoss, Questing, Rebirth
+from classes.helper     import Helper
+from classes.inputs     import Inputs
+from classes.inventory  import InventoryModel
+from classes.navigation import Navigation
+from classes.runtime    import Runtime
+from classes.stats      import Stats
+from classes.window     import Window
+
+import coordinates as coords
+
+
+class Session:
+    """The state of one game window.
+
+    Features keep their state on class attributes. A session holds its own
+    copy of the attributes that belong to a window and swaps them in when
+    it's activated, so the features run unchanged against whichever
+    session is active. State that's the same for every window, like
+    recognizer catalogs and settings, stays shared.
+
+    Every session stores its ITOPOD counters in its own file,
+    itopod_ap_<name>.json, so windows don't overwrite each other's
+    counters. Give sessions a name that stays the same across restarts
+    to resume from them, window handles change.
+
+    Usage: sessions = Session.find()
+           with sessions[1]:
+               FightBoss.nuke()
+    """
+
+    state = {
+        Window: ["id", "x", "y", "dc"],
+        Inputs: ["keys_sent"],
+        Navigation: ["current_menu", "input_value"],
+        FightBoss: ["boss", "boss_max", "boss_read_at"],
+        Adventure: ["current_adventure_zone", "itopod_tier_counts", "itopod_ap_gained", "itopod_kills",
+                    "combat", "abilities", "itopod_planner", "titan_schedule", "titan_synced_at",
+                    "itopod_ap_file", "mega_buff_unlocked", "oh_shit_unlocked"],
+        BloodMagic: ["spell_ready_at", "spell_queue", "spell_cast_at"],
+        Questing: ["inventory_cleaned"],
+        Rebirth: ["clock_seconds", "clock_synced_at", "clock_interval"],
+        InventoryModel: ["current_page", "pages", "handled",
+                         "clicks_avoided", "slots_rescanned", "slots_skipped"],
+        Stats: ["total_xp", "xp", "pp", "start_time", "OCR_failures", "OCR_failed"],
+    }
+    defaults = {cls: copy.deepcopy({name: getattr(cls, name) for name in names})
+                for cls, names in state.items()}
+    active = None
+
+    def __init__(self, window_id :int, x :int =0, y :int =0, name :str =None) -> None:
+        """Keyword arguments
+        window_id -- The window handle, see Window.init().
+        x, y      -- The top left of the game inside the window.
+        name      -- Name used in reports and file names, defaults to the window handle.
+        """
+        self.name = name or str(window_id)
+        self.values = copy.deepcopy(Session.defaults)
+        self.values[Window].update(id=window_id, x=x, y=y)
+        self.values[Adventure]["itopod_ap_file"] = f"itopod_ap_{self.name}.json"
+        self.busy = 0  # seconds this session held the game in a Scheduler
+        self.turns = 0
+
+    def __enter__(self) -> "Session":
+        self.activate()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.save()
+
+    @staticmethod
+    def track(cls :type, names :Iterable[str]) -> None:
+        """Keep attributes of another class per window, like the state of a script."""
+        Session.state[cls] = list(names)
+        Session.defaults[cls] = copy.deepcopy({name: getattr(cls, name) for name in names})
+
+    def activate(self) -> None:
+        """Store the state of the active session and swap in this one."""
+        if Session.active is self:
+            return
+        if Session.active is not None:
+            Session.active.save()
+        for cls, names in Session.state.items():
+            values = self.values.setdefault(cls, copy.deepcopy(Session.defaults[cls]))
+            for name in names:
+                setattr(cls, name, values[name])
+        Session.active = self
+
+    def save(self) -> None:
+        """Store the class attributes in this session, it must be the active one."""
+        for cls, names in Session.state.items():
+            self.values[cls] = {name: getattr(cls, name) for name in names}
+
+    @staticmethod
+    def find(printCoords :bool =False) -> List["Session"]:
+        """Return a session for every window that shows the game."""
+        sessions = []
+        for window_id, rect in Window.init().items():
+            if printCoords: print(f"Scanning window id: {window_id}")
+            session = Session(window_id)
+            with session:
+                cds = Helper.locate(window_id, rect)
+                if cds is None:
+                    continue
+                Window.setPos(*cds)
+                # Sometimes the very first click is ignored, this makes sure the first click is unimportant.
+                Inputs.click(*coords.WASTE_CLICK)
+            if printCoords: print(f"Top left found at: {Window.x}, {Window.y}")
+            sessions.append(session)
+        if not sessions:
+            raise RuntimeError("Game window not found. Maybe it's minimized or the game is not fully visible?")
+        return sessions
+
+
+class SessionRuntime(Runtime):
+    """A Runtime bound to one session of a Scheduler.
+
+    It shares the executors of the Runtime it was made from. sleep()
+    hands the game to the next session, after the background tasks of this
+    session finished, so nothing runs against a window that isn't active.
+    """
+
+    def __init__(self, runtime :Runtime, session :Session, lock :asyncio.Lock) -> None:
+        self.input_pool = runtime.input_pool
+        self.cpu_pool = runtime.cpu_pool
+        self.io_pool = runtime.io_pool
+        self.tasks = set()
+        self.session = session
+        self.lock = lock
+        self.held_since = 0
+
+    async def acquire(self) -> None:
+        """Wait for the game and activate the session."""
+        await self.lock.acquire()
+        self.session.activate()
+        self.session.turns += 1
+        self.held_since = time.monotonic()
+
+    async def release(self) -> None:
+        """Finish the background tasks and hand the game over."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.session.busy += time.monotonic() - self.held_since
+        self.lock.release()
+
+    async def sleep(self, seconds :float) -> None:
+        """Let other sessions use the game while this one waits."""
+        await self.release()
+        try:
+            await asyncio.sleep(max(seconds, 0))
+        finally:
+            await self.acquire()
+
+
+class Scheduler:
+    """Runs a script for several sessions, interleaving them on one Runtime.
+
+    One session holds the game at a time, until its script awaits
+    rt.sleep(). The other sessions click and read while it waits, so the
+    throughput grows with the windows as long as the script spends its
+    time sleeping. Scripts are coroutines taking a Runtime, like
+    Helper.loop_async and GuffinRun.run_async.
+
+    Usage: Scheduler(Session.find()).start(GuffinRun.run_async)
+    """
+
+    def __init__(self, sessions :Iterable[Session]) -> None:
+        self.sessions = list(sessions)
+
+    async def run(self, rt :Runtime, script :Callable[..., Awaitable], *args, **kwargs) -> List[Any]:
+        """Run script(session_rt, *args, **kwargs) for every session, returns the results."""
+        lock = asyncio.Lock()
+        async def run_session(session :Session) -> Any:
+            srt = SessionRuntime(rt, session, lock)
+            await srt.acquire()
+            try:
+                return await script(srt, *args, **kwargs)
+            finally:
+                await srt.release()
+                session.save()
+        return await asyncio.gather(*(run_session(session) for session in self.sessions))
+
+    def start(self, script :Callable[..., Awaitable], *args, **kwargs) -> List[Any]:
+        """Run the script for every session on a new Runtime until they all return."""
+        return Runtime.start(self.run, script, *args, **kwargs)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Return the turns and seconds every session held the game."""
+        return {session.name: {"turns": session.turns, "busy": round(session.busy, 2)}
+                for session in self.sessions}
@@ -0,0 +1,241 @@
+"""Headless model of the game screens for running scripts without the game."""
+from collections import Counter
+from typing      import Dict, Tuple
+
+import numpy
+from PIL import Image as image
+
+from classes.backend import Backend
+from classes.inputs  import Inputs
+from classes.window  import Window
+
+import coordinates as coords
+
+
+class Simulator(Backend):
+    """Models the game screens so scripts run headless, on virtual time.
+
+    The simulator keeps the state scripts look at: the open menu, the
+    input box, the rebirth clock, the boss, quests, idle resources, a few
+    toggles and unlocks. It draws the state into the frames and pixels the
+    scripts read, and clicks on the menus, fight, rebirth, quest and toggle
+    buttons change it. Sleeps return at once and every click or capture
+    costs a fixed amount of virtual time, so an hour of a run passes in
+    seconds and report() shows the clicks and time it took.
+
+    OCR of the fields the simulator models returns their text without
+    running Tesseract, other fields read as empty. Helper.init() finds the
+    simulated window like a real one.
+
+    Usage: with Simulator() as sim:
+               Helper.init()
+               GuffinRun.run()
+           print(sim.report())
+    """
+
+    WIDTH = 960
+    HEIGHT = 600
+    BORDER = 8  # bitmaps are created with a 8px border
+    BACKGROUND = (255, 255, 255)
+    WINDOW_ID = 1
+
+    # ColorPixels toggled by clicking them, shown when on
+    TOGGLES = ("COLOR_QUESTING_USE_MAJOR", "COLOR_BM_AUTO_NUMBER", "COLOR_BM_AUTO_DROP", "COLOR_BM_AUTO_GOLD")
+
+    def __init__(self, boss_rate :float =0.05, adv_training_unlock :float =600, majors :int =0,
+                 quest_time :float =600, idle :Tuple[int, int, int] =(10 ** 9, 10 ** 9, 10 ** 6),
+                 click_time :float =0.1, capture_time :float =0.05) -> None:
+        """Keyword arguments
+        boss_rate           -- Bosses per second of rebirth time the player can beat.
+        adv_training_unlock -- Seconds into a rebirth when advanced training unlocks.
+        majors              -- Major quests available.
+        quest_time          -- Seconds it takes to finish a quest.
+        idle                -- Idle energy, magic and resource 3.
+        click_time          -- Virtual seconds a click or key press takes.
+        capture_time        -- Virtual seconds a capture or pixel read takes.
+        """
+        self.clock = 0.0
+        self.boss_rate = boss_rate
+        self.adv_training_unlock = adv_training_unlock
+        self.majors = majors
+        self.quest_time = quest_time
+        self.idle = list(idle)
+        self.click_time = click_time
+        self.capture_time = capture_time
+
+        self.menu = "fight"
+        self.menu_at = {pixel: name for name, pixel in coords.MENU_ITEMS.items()}
+        self.input = ""
+        self.boss = 1
+        self.rebirth_at = 0.0
+        self.quest = None  # zone of the active quest
+        self.quest_at = 0.0
+        self.quests = 0
+        self.qp = 0
+        self.toggles = {name: False for name in Simulator.TOGGLES}
+        self.last_click = None
+        self.counters = Counter()
+        self.cached = (None, None)  # (state, bitmap) of the last frame drawn
+        self.saved = None  # (Window.init, Inputs.ocr, Inputs.ocr_digits) while installed
+
+    def install(self) -> None:
+        super().install()
+        self.saved = (Window.init, Inputs.ocr, Inputs.ocr_digits)
+        rect = (0, 0, Simulator.WIDTH + 2 * Simulator.BORDER, Simulator.HEIGHT + 2 * Simulator.BORDER)
+        Window.init = staticmethod(lambda debug=False: {Simulator.WINDOW_ID: rect})
+        Inputs.ocr = staticmethod(self.ocr)
+        Inputs.ocr_digits = staticmethod(self.ocr_digits)
+        Window.id = Simulator.WINDOW_ID
+        Window.setPos(0, 0)
+
+    def uninstall(self) -> None:
+        if self.saved is not None:
+            Window.init, Inputs.ocr, Inputs.ocr_digits = (staticmethod(fn) for fn in self.saved)
+            self.saved = None
+        super().uninstall()
+
+    def rebirth_time(self) -> float:
+        """Return the seconds since the last rebirth."""
+        return self.clock - self.rebirth_at
+
+    def boss_limit(self) -> int:
+        """Return the highest boss the player can beat now."""
+        return 1 + int(self.rebirth_time() * self.boss_rate)
+
+    def rebirth(self) -> None:
+        self.rebirth_at = self.clock
+        self.boss = 1
+        self.counters["rebirths"] += 1
+
+    def flags(self) -> Dict[Tuple[int, int], str]:
+        """Return the color of every modeled pixel that differs from the background."""
+        flags = {}
+        if self.rebirth_time() < self.adv_training_unlock:
+            flags[coords.COLOR_ADV_TRAINING_LOCKED[:2]] = coords.COLOR_LOCKED[0]
+        for name, on in self.toggles.items():
+            check = getattr(coords, name)
+            if on:
+                flags[check[:2]] = check.color if isinstance(check.color, str) else check.color[0]
+        return flags
+
+    def fields(self) -> Dict[Tuple[int, int, int, int], str]:
+        """Return the text of every modeled OCR field."""
+        seconds = int(self.rebirth_time())
+        days, seconds = divmod(seconds, 86400)
+        text = f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        if days:
+            text = f"{days} day{'s' if days > 1 else ''} {text}"
+        fields = {
+            coords.OCR_REBIRTH_TIME: text,
+            coords.OCR_ENERGY: f"Idle: {self.idle[0]:,}",
+            coords.OCR_MAGIC: f"Idle: {self.idle[1]:,}",
+            coords.OCR_R3: f"Idle: {self.idle[2]:,}",
+        }
+        if self.menu == "fight":
+            fields[coords.OCR_BOSS] = str(self.boss)
+        if self.menu == "questing":
+            # the features match these lowercase
+            if self.quest is None:
+                quest = coords.QUESTING_NO_QUEST_ACTIVE
+            elif self.clock - self.quest_at >= self.quest_time:
+                quest = f"{coords.QUESTING_QUEST_COMPLETE}."
+            else:
+                quest = f"{coords.QUESTING_MINOR_QUEST}. get items in {self.quest}."
+            fields[coords.OCR_QUESTING_LEFT_TEXT] = quest
+            fields[coords.OCR_QUESTING_MAJORS] = f"{self.majors}/5"
+            fields[coords.OCR_QUESTING_QP] = f"{self.qp:,} QP"
+        return fields
+
+    def frame(self) -> numpy.ndarray:
+        """Return the game area as drawn for the current state, see Inputs.get_frame()."""
+        return numpy.asarray(self.get_bitmap(cost=False))[Simulator.BORDER:Simulator.BORDER + Simulator.HEIGHT,
+                                                          Simulator.BORDER:Simulator.BORDER + Simulator.WIDTH]
+
+    def get_bitmap(self, cost :bool =True) -> image:
+        if cost:
+            self.advance(self.capture_time)
+            self.counters["captures"] += 1
+        flags = self.flags()
+        state = (self.menu, tuple(sorted(flags.items())))
+        if self.cached[0] != state:
+            pixels = numpy.empty((Simulator.HEIGHT + 2 * Simulator.BORDER, Simulator.WIDTH + 2 * Simulator.BORDER, 3),
+                                 numpy.uint8)
+            pixels[:] = Simulator.BACKGROUND
+            for (x, y), color in list(flags.items()) + [((0, 0), coords.TOP_LEFT_COLOR)]:
+                pixels[y + Simulator.BORDER, x + Simulator.BORDER] = Inputs.hex_to_rgb(color)
+            self.cached = (state, image.fromarray(pixels))
+        return self.cached[1].copy()
+
+    def get_pixel_color(self, x :int, y :int, debug :bool =False) -> str:
+        self.advance(self.capture_time)
+        self.counters["pixel reads"] += 1
+        color = self.flags().get((x, y), Inputs.rgb_to_hex(Simulator.BACKGROUND))
+        if debug: print(color)
+        return color
+
+    def ocr(self, x_start :int, y_start :int, x_end :int, y_end :int, *args, **kwargs) -> str:
+        self.advance(self.capture_time)
+        self.counters["ocr reads"] += 1
+        return self.fields().get((x_start, y_start, x_end, y_end), "")
+
+    def ocr_digits(self, x_1 :int, y_1 :int, x_2 :int, y_2 :int, frame :numpy.ndarray =None) -> str:
+        return Inputs.remove_letters(self.ocr(x_1, y_1, x_2, y_2))
+
+    def click(self, x :int, y :int, button :str ="left", fast :bool =False) -> None:
+        self.advance(self.click_time)
+        self.counters["clicks"] += 1
+        self.counters[f"clicks in {self.menu}"] += 1
+        pixel = (x, y)
+        if pixel in self.menu_at:
+            self.menu = self.menu_at[pixel]
+        elif pixel == coords.REBIRTH:
+            self.menu = "rebirth"
+        elif pixel == coords.NUMBER_INPUT_BOX:
+            self.input = ""
+        elif pixel == coords.NUKE and self.menu == "fight":
+            self.boss = max(self.boss, self.boss_limit())
+        elif pixel == coords.FIGHT and self.menu == "fight":
+            self.boss = max(self.boss, min(self.boss + 1, self.boss_limit()))
+        elif pixel == coords.CONFIRM and self.last_click == coords.REBIRTH_BUTTON:
+            self.rebirth()
+        elif pixel == coords.QUESTING_START_QUEST and self.menu == "questing":
+            if self.quest is None:
+                self.quest = coords.QUESTING_ZONES[self.quests % len(coords.QUESTING_ZONES)]
+                self.quest_at = self.clock
+                self.quests += 1
+            elif self.clock - self.quest_at >= self.quest_time:
+                self.quest = None
+                self.qp += 10
+        elif pixel == coords.CONFIRM and self.last_click == coords.QUESTING_SKIP_QUEST:
+            self.quest = None
+        else:
+            for name in self.toggles:
+                if pixel == getattr(coords, name)[:2]:
+                    self.toggles[name] = not self.toggles[name]
+        self.last_click = pixel
+
+    def click_drag(self, x :int, y :int, x2 :int, y2 :int) -> None:
+        self.advance(self.click_time)
+        self.counters["drags"] += 1
+
+    def ctrl_click(self, x :int, y :int) -> None:
+        self.advance(self.click_time)
+        self.counters["clicks"] += 1
+
+    def send_arrow_press(self, left :bool) -> None:
+        self.advance(self.click_time)
+        self.counters["keys"] += 1
+
+    def send_string(self, string :str) -> None:
+        Inputs.keys_sent += 1
+        if isinstance(string, float):
+            string = int(string)
+        self.input += str(string)
+        self.advance(self.click_time * len(str(string)))
+        self.counters["keys"] += len(str(string))
+
+    def report(self) -> Dict[str, float]:
+        """Return the virtual seconds, rebirths, clicks, keys and reads of the simulated run."""
+        report = {"virtual seconds": round(self.clock, 1)}
+        report.update(sorted(self.counters.items()))
+        return report
@@ -77,10 +77,6 @@ class EstimateRate:
         self.__keep_runs = userset.E_RATE_KEEP_RUNS // duration
         self.__iteration = 0
         self.__elapsed = 0
-        self.__alg = {
-            'moving_average': self.__moving_average,
-            'average': self.__average
-        }
 
     def __average(self :EstimateRate) -> Tuple[float, float]:
         """Returns the average rates"""
@@ -102,7 +98,12 @@ class EstimateRate:
 
     def rates(self :EstimateRate) -> Tuple[float, float]:
         try:
-            xpr, ppr = self.__alg[self.mode]()
+            # looked up here rather than stored, so trackers can be checkpointed
+            alg = {
+                'moving_average': self.__moving_average,
+                'average': self.__average
+            }
+            xpr, ppr = alg[self.mode]()
             return round(3600 * xpr), round(3600 * ppr)
         except ZeroDivisionError:
             return 0, 0
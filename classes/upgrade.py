@@ -2,6 +2,8 @@
 import time
 import math
 
+from typing import Dict, List, Tuple
+
 from classes.stats  import Stats
 from classes.helper import Helper
 from classes.features import Navigation
@@ -11,9 +13,15 @@ import coordinates  as coords
 import usersettings as userset
 
 
+# An input box, its buy button and the value to type into the box.
+Field = Tuple[coords.Pixel, coords.Pixel, int]
+
+
 class UpgradeEM:
     """Buys things for exp."""
 
+    min_xp = 0
+
     def __init__(self, ecap, mcap, ebar, mbar, e2m_ratio, report=False):
         """Example: Upgrade(37500, 37500, 2, 1).
 
@@ -39,111 +47,76 @@ class UpgradeEM:
         self.e2m_ratio = e2m_ratio
         self.report = report
 
-    def buy(self):
-        """Buy upgrades for both energy and magic.
-
-        Requires the confirmation popup button for EXP purchases in settings
-        to be turned OFF.
-
-        This uses all available exp, so use with caution.
-        """
+    def valid(self) -> bool:
+        """Return True if the ratio can be bought."""
         if self.ecap < 10000 or self.ecap % 250 != 0:
             print("Ecap value not divisible by 250 or lower than 10000, not" +
                   " spending exp.")
-            return
+            return False
         if self.mcap < 10000 or self.mcap % 250 != 0:
             print("Mcap value not divisible by 250 or lower than 10000, not" +
                   " spending exp.")
-            return
-
-        Stats.set_value_with_ocr("XP")
-        if Stats.OCR_failed:
-            print('OCR failed, exiting upgrade routine.')
-            return
-
-        current_exp = Stats.xp
+            return False
+        return True
 
+    def cost(self) -> float:
+        """Return the XP cost of one complete set of upgrades."""
         e_cost = coords.EPOWER_COST + coords.ECAP_COST * self.ecap + (
             coords.EBAR_COST * self.ebar)
 
         m_cost = coords.MPOWER_COST + coords.MCAP_COST * self.mcap + (
             coords.MBAR_COST * self.mbar)
 
-        total_price = m_cost + self.e2m_ratio * e_cost
-
-        # Skip upgrading if we don't have enough exp to buy at least one
-        # complete set of upgrades, in order to maintain our perfect ratios :)
-
-        if total_price > current_exp:
-            if self.report:
-                print("No XP Upgrade :{:^8} of {:^8}".format(Helper.human_format(current_exp), Helper.human_format(total_price)))
-            return
-
-        amount = int(current_exp // total_price)
-
-        e_power = amount * self.e2m_ratio
-        e_cap   = amount * self.ecap * self.e2m_ratio
-        e_bars  = amount * self.ebar * self.e2m_ratio
-        m_power = amount
-        m_cap   = amount * self.mcap
-        m_bars  = amount * self.mbar
-
-        Navigation.exp()
-
-        Inputs.click(*coords.EM_POW_BOX)
-        Inputs.send_string(str(e_power))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_CAP_BOX)
-        Inputs.send_string(str(e_cap))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_BAR_BOX)
-        Inputs.send_string(str(e_bars))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_POW_BUY)
-        Inputs.click(*coords.EM_CAP_BUY)
-        Inputs.click(*coords.EM_BAR_BUY)
-
-        Navigation.exp_magic()
-
-        Inputs.click(*coords.EM_POW_BOX)
-        Inputs.send_string(str(m_power))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_CAP_BOX)
-        Inputs.send_string(str(m_cap))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_BAR_BOX)
-        Inputs.send_string(str(m_bars))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_POW_BUY)
-        Inputs.click(*coords.EM_CAP_BUY)
-        Inputs.click(*coords.EM_BAR_BUY)
-
-        Stats.set_value_with_ocr("XP")
-
+        return m_cost + self.e2m_ratio * e_cost
+
+    def fields(self, amount :int) -> Dict[str, List[Field]]:
+        """Return the fields to fill for amount sets, by Navigation method of their tab."""
+        return {
+            "exp": [(coords.EM_POW_BOX, coords.EM_POW_BUY, amount * self.e2m_ratio),
+                    (coords.EM_CAP_BOX, coords.EM_CAP_BUY, amount * self.ecap * self.e2m_ratio),
+                    (coords.EM_BAR_BOX, coords.EM_BAR_BUY, amount * self.ebar * self.e2m_ratio)],
+            "exp_magic": [(coords.EM_POW_BOX, coords.EM_POW_BUY, amount),
+                          (coords.EM_CAP_BOX, coords.EM_CAP_BUY, amount * self.mcap),
+                          (coords.EM_BAR_BOX, coords.EM_BAR_BUY, amount * self.mbar)],
+        }
+
+    def price(self, amount :int) -> float:
+        """Return the XP spent on amount sets."""
+        (_, _, e_power), (_, _, e_cap), (_, _, e_bars) = self.fields(amount)["exp"]
+        (_, _, m_power), (_, _, m_cap), (_, _, m_bars) = self.fields(amount)["exp_magic"]
         total_spent  = coords.EPOWER_COST * e_power + coords.ECAP_COST * e_cap + coords.EBAR_COST * e_bars
         total_spent += coords.MPOWER_COST * m_power + coords.MCAP_COST * m_cap + coords.MBAR_COST * m_bars
+        return total_spent
+
+    def describe(self, amount :int) -> str:
+        """Return a report line for amount sets."""
+        (_, _, e_power), (_, _, e_cap), (_, _, e_bars) = self.fields(amount)["exp"]
+        (_, _, m_power), (_, _, m_cap), (_, _, m_bars) = self.fields(amount)["exp_magic"]
+        return "Energy | Pow:{:^8}{:^3}Cap:{:^8}{:^3}Bar:{:^8}{:^3}Magic | Pow:{:^8}{:^3}Cap:{:^8}{:^3}Bar:{:^8}".format(
+            Helper.human_format(e_power), "|",
+            Helper.human_format(e_cap),   "|",
+            Helper.human_format(e_bars),  "|",
+            Helper.human_format(m_power), "|",
+            Helper.human_format(m_cap),   "|",
+            Helper.human_format(m_bars)
+        )
 
-        if self.report:
-            print("Spent XP:{:^8}".format(Helper.human_format(total_spent)))
-            print("Energy | Pow:{:^8}{:^3}Cap:{:^8}{:^3}Bar:{:^8}{:^3}Magic | Pow:{:^8}{:^3}Cap:{:^8}{:^3}Bar:{:^8}".format(
-                Helper.human_format(e_power), "|",
-                Helper.human_format(e_cap),   "|",
-                Helper.human_format(e_bars),  "|",
-                Helper.human_format(m_power), "|",
-                Helper.human_format(m_cap),   "|",
-                Helper.human_format(m_bars)
-            ))
+    def buy(self):
+        """Buy upgrades for both energy and magic.
+
+        Requires the confirmation popup button for EXP purchases in settings
+        to be turned OFF.
+
+        This uses all available exp, so use with caution.
+        """
+        UpgradePlanner([(self, 1)], self.report).buy()
 
 
 class UpgradeAdventure(Stats):
     """Buys things for exp."""
 
+    min_xp = 0
+
     def __init__(self, power, toughness, health, regen, ratio, report=False):
         self.power = power
         self.toughness = toughness
@@ -152,153 +125,111 @@ class UpgradeAdventure(Stats):
         self.ratio = ratio
         self.report = report
 
-    def buy(self):
-        """Buy upgrades for power, toughness, health and regen
-
-        Requires the confirmation popup button for EXP purchases in settings
-        to be turned OFF.
-
-        This uses all available exp, so use with caution.
-        """
-        Stats.set_value_with_ocr("XP")
-
-        if Stats.OCR_failed:
-            print('OCR failed, exiting upgrade routine.')
-            return
-
-        current_exp = Stats.xp
+    def valid(self) -> bool:
+        """Return True if the ratio can be bought."""
+        return True
 
+    def cost(self) -> float:
+        """Return the XP cost of one complete set of upgrades."""
         total_price = (coords.APOWER_COST * self.power * self.ratio)
         total_price += (coords.ATOUGHNESS_COST * self.toughness * self.ratio)
         total_price += (coords.AHEALTH_COST * self.health * 10)
         total_price += math.floor(coords.AREGEN_COST * self.regen / 10)
-
-        # Skip upgrading if we don't have enough exp to buy at least one
-        # complete set of upgrades, in order to maintain our perfect ratios :)
-
-        if total_price > current_exp:
-            if self.report:
-                print("No XP Upgrade :{:^8} of {:^8}".format(Helper.human_format(current_exp), Helper.human_format(total_price)))
-            return
-
-        amount = int(current_exp // total_price)
-
-        a_power     = amount * self.ratio
-        a_toughness = amount * self.ratio
-        a_health    = amount * 10
-        a_regen     = math.floor(amount / 10)
-        if a_regen < 1: a_regen = 1.0
-
-        Navigation.exp_adventure()
-
-        Inputs.click(*coords.EM_ADV_BOX)
-        Inputs.send_string(str(a_power))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_POW_BOX)
-        Inputs.send_string(str(a_toughness))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_CAP_BOX)
-        Inputs.send_string(str(a_health))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_BAR_BOX)
-        Inputs.send_string(str(a_regen))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_ADV_BUT)
-        Inputs.click(*coords.EM_POW_BUY)
-        Inputs.click(*coords.EM_CAP_BUY)
-        Inputs.click(*coords.EM_BAR_BUY)
-
-        Stats.set_value_with_ocr("XP")
-
+        return total_price
+
+    def fields(self, amount :int) -> Dict[str, List[Field]]:
+        """Return the fields to fill for amount sets, by Navigation method of their tab."""
+        a_regen = math.floor(amount / 10)
+        if a_regen < 1: a_regen = 1
+        return {
+            "exp_adventure": [(coords.EM_ADV_BOX, coords.EM_ADV_BUT, amount * self.ratio),
+                              (coords.EM_POW_BOX, coords.EM_POW_BUY, amount * self.ratio),
+                              (coords.EM_CAP_BOX, coords.EM_CAP_BUY, amount * 10),
+                              (coords.EM_BAR_BOX, coords.EM_BAR_BUY, a_regen)],
+        }
+
+    def price(self, amount :int) -> float:
+        """Return the XP spent on amount sets."""
+        (_, _, a_power), (_, _, a_toughness), (_, _, a_health), (_, _, a_regen) = self.fields(amount)["exp_adventure"]
         total_spent = coords.APOWER_COST * a_power
         total_spent += coords.ATOUGHNESS_COST * a_toughness
         total_spent += coords.AHEALTH_COST * a_health
         total_spent += coords.AREGEN_COST * a_regen
+        return total_spent
 
-        if self.report:
-            print("Spent XP:{:^8}".format(Helper.human_format(total_spent)))
-            print("Power:{:^8}{:^3} Defense:{:^8}{:^3} Health:{:^8}{:^3} Regen:{:^8}".format(
-                Helper.human_format(a_power), "|",
-                Helper.human_format(a_toughness), "|",
-                Helper.human_format(a_health), "|",
-                Helper.human_format(a_regen)))
-
-
-class UpgradeRich(Stats):
-    """Buys things for exp."""
-
-    def __init__(self, attack, defense, report=False):
-        self.attack = attack
-        self.defense = defense
-        self.report = report
+    def describe(self, amount :int) -> str:
+        """Return a report line for amount sets."""
+        (_, _, a_power), (_, _, a_toughness), (_, _, a_health), (_, _, a_regen) = self.fields(amount)["exp_adventure"]
+        return "Power:{:^8}{:^3} Defense:{:^8}{:^3} Health:{:^8}{:^3} Regen:{:^8}".format(
+            Helper.human_format(a_power), "|",
+            Helper.human_format(a_toughness), "|",
+            Helper.human_format(a_health), "|",
+            Helper.human_format(a_regen))
 
     def buy(self):
-        """Buy upgrades for both attack and defense
+        """Buy upgrades for power, toughness, health and regen
 
         Requires the confirmation popup button for EXP purchases in settings
         to be turned OFF.
 
         This uses all available exp, so use with caution.
         """
-        Stats.set_value_with_ocr("XP")
-
-        if Stats.OCR_failed:
-            print('OCR failed, exiting upgrade routine.')
-            return
-
-        current_exp = Stats.xp
-
-        if current_exp < 1000:
-            return
+        UpgradePlanner([(self, 1)], self.report).buy()
 
-        total_price = (coords.RATTACK_COST * self.attack)
-        total_price += (coords.RDEFENSE_COST * self.defense)
 
-        # Skip upgrading if we don't have enough exp to buy at least one
-        # complete set of upgrades, in order to maintain our perfect ratios :)
+class UpgradeRich(Stats):
+    """Buys things for exp."""
 
-        if total_price > current_exp:
-            if self.report:
-                print("No XP Upgrade :{:^8} of {:^8}".format(Helper.human_format(current_exp), Helper.human_format(total_price)))
-            return
+    min_xp = 1000
 
-        amount = int(current_exp // total_price)
+    def __init__(self, attack, defense, report=False):
+        self.attack = attack
+        self.defense = defense
+        self.report = report
 
-        a_attack = amount * self.attack
-        a_defense = amount * self.defense
+    def valid(self) -> bool:
+        """Return True if the ratio can be bought."""
+        return True
 
-        Navigation.exp_rich()
+    def cost(self) -> float:
+        """Return the XP cost of one complete set of upgrades."""
+        total_price = (coords.RATTACK_COST * self.attack)
+        total_price += (coords.RDEFENSE_COST * self.defense)
+        return total_price
 
-        Inputs.click(*coords.EM_ADV_BOX)
-        Inputs.send_string(str(a_attack))
-        time.sleep(userset.MEDIUM_SLEEP)
+    def fields(self, amount :int) -> Dict[str, List[Field]]:
+        """Return the fields to fill for amount sets, by Navigation method of their tab."""
+        return {
+            "exp_rich": [(coords.EM_ADV_BOX, coords.EM_ADV_BOX, amount * self.attack),
+                         (coords.EM_ADV_BOX, coords.EM_ADV_BOX, amount * self.defense)],
+        }
 
-        Inputs.click(*coords.EM_ADV_BOX)
-        Inputs.send_string(str(a_defense))
-        time.sleep(userset.MEDIUM_SLEEP)
+    def price(self, amount :int) -> float:
+        """Return the XP spent on amount sets."""
+        return coords.RATTACK_COST * amount * self.attack + coords.RDEFENSE_COST * amount * self.defense
 
-        Inputs.click(*coords.EM_ADV_BOX)
-        Inputs.click(*coords.EM_ADV_BOX)
+    def describe(self, amount :int) -> str:
+        """Return a report line for amount sets."""
+        return "Attack:{:^8}{:^3}Defense:{:^8}".format(
+            Helper.human_format(amount * self.attack), "|",
+            Helper.human_format(amount * self.defense))
 
-        Stats.set_value_with_ocr("XP")
+    def buy(self):
+        """Buy upgrades for both attack and defense
 
-        total_spent = coords.RATTACK_COST * a_attack
-        total_spent += coords.RDEFENSE_COST * a_defense
+        Requires the confirmation popup button for EXP purchases in settings
+        to be turned OFF.
 
-        if self.report:
-            print("Spent XP:{:^8}{:^3}Attack:{:^8}{:^3}Defense:{:^8}".format(
-                Helper.human_format(total_spent), "|",
-                Helper.human_format(a_attack), "|",
-                Helper.human_format(a_defense)))
+        This uses all available exp, so use with caution.
+        """
+        UpgradePlanner([(self, 1)], self.report).buy()
 
 
 class UpgradeHackPower(Stats):
     """Buys things for exp."""
 
+    min_xp = 0
+
     def __init__(self, hcap, hbar, hpower, report=False):
         """Example: UpgradeHackPower(10000, 1, 1).
 
@@ -314,6 +245,37 @@ class UpgradeHackPower(Stats):
         self.hpower = hpower
         self.report = report
 
+    def valid(self) -> bool:
+        """Return True if the ratio can be bought."""
+        if (self.hcap < 10000 or self.hcap % 250 != 0) and self.hcap != 0:
+            print("Ecap value not divisible by 250 or lower than 10000, not" +
+                  " spending exp.")
+            return False
+        return True
+
+    def cost(self) -> float:
+        """Return the XP cost of one complete set of upgrades."""
+        return coords.HPOWER_COST * self.hpower + coords.HCAP_COST * self.hcap + coords.HBAR_COST * self.hbar
+
+    def fields(self, amount :int) -> Dict[str, List[Field]]:
+        """Return the fields to fill for amount sets, by Navigation method of their tab."""
+        return {
+            "exp_hack": [(coords.EM_POW_BOX, coords.EM_POW_BUY, amount * self.hpower),
+                         (coords.EM_CAP_BOX, coords.EM_CAP_BUY, amount * self.hcap),
+                         (coords.EM_BAR_BOX, coords.EM_BAR_BUY, amount * self.hbar)],
+        }
+
+    def price(self, amount :int) -> float:
+        """Return the XP spent on amount sets."""
+        return amount * self.cost()
+
+    def describe(self, amount :int) -> str:
+        """Return a report line for amount sets."""
+        return "New | Pow:{:^8}{:^3}Cap:{:^8}{:^3}Bar:{:^8}".format(
+            Helper.human_format(amount * self.hpower), "|",
+            Helper.human_format(amount * self.hcap), "|",
+            Helper.human_format(amount * self.hbar))
+
     def buy(self):
         """Buy upgrades for hack energy
 
@@ -322,9 +284,59 @@ class UpgradeHackPower(Stats):
 
         This uses all available exp, so use with caution.
         """
-        if (self.hcap < 10000 or self.hcap % 250 != 0) and self.hcap != 0:
-            print("Ecap value not divisible by 250 or lower than 10000, not" +
-                  " spending exp.")
+        UpgradePlanner([(self, 1)], self.report).buy()
+
+
+class UpgradePlanner:
+    """Spends XP on several upgrade ratios at once.
+
+    XP is read once and split between the upgrades by weight. The XP left
+    over after rounding down to complete sets goes to the upgrades with
+    the highest weight that can still afford a set. Every EXP tab is
+    filled and bought in one pass and the spend is verified with one
+    final read.
+
+    Usage: UpgradePlanner([(UpgradeEM(37500, 37500, 2, 1, 5), 3),
+                           (UpgradeAdventure(1, 1, 1, 1, 1), 1)]).buy()
+    """
+
+    def __init__(self, upgrades :List[Tuple[object, float]], report :bool =False) -> None:
+        """Keyword arguments
+        upgrades -- List of (upgrade, weight), upgrades are the Upgrade* classes.
+        report   -- Print what was bought.
+        """
+        self.upgrades = upgrades
+        self.report = report
+
+    @staticmethod
+    def plan(upgrades :List[Tuple[object, float]], xp :float) -> List[int]:
+        """Return the amount of sets to buy of every upgrade."""
+        total_weight = sum(weight for _, weight in upgrades)
+        amounts = [int(xp * weight / total_weight // upgrade.cost()) for upgrade, weight in upgrades]
+        left = xp - sum(amount * upgrade.cost() for amount, (upgrade, _) in zip(amounts, upgrades))
+        for i in sorted(range(len(upgrades)), key=lambda i: -upgrades[i][1]):
+            extra = int(left // upgrades[i][0].cost())
+            amounts[i] += extra
+            left -= extra * upgrades[i][0].cost()
+        return amounts
+
+    @staticmethod
+    def idle_sequential(upgrades :List[Tuple[object, float]], xp :float) -> float:
+        """Return the XP buying every upgrade with all XP, one after another, leaves idle."""
+        for upgrade, _ in upgrades:
+            xp -= xp // upgrade.cost() * upgrade.cost()
+        return xp
+
+    def buy(self) -> None:
+        """Buy all upgrades.
+
+        Requires the confirmation popup button for EXP purchases in settings
+        to be turned OFF.
+
+        This uses all available exp, so use with caution.
+        """
+        upgrades = [(upgrade, weight) for upgrade, weight in self.upgrades if weight > 0 and upgrade.valid()]
+        if not upgrades:
             return
 
         Stats.set_value_with_ocr("XP")
@@ -333,52 +345,48 @@ class UpgradeHackPower(Stats):
             return
 
         current_exp = Stats.xp
-
-        total_price = coords.HPOWER_COST * self.hpower + coords.HCAP_COST * self.hcap + coords.HBAR_COST * self.hbar
+        upgrades = [(upgrade, weight) for upgrade, weight in upgrades if current_exp >= upgrade.min_xp]
+        amounts = UpgradePlanner.plan(upgrades, current_exp) if upgrades else []
 
         # Skip upgrading if we don't have enough exp to buy at least one
         # complete set of upgrades, in order to maintain our perfect ratios :)
-
-        if total_price > current_exp:
-            if self.report:
-                print("No XP Upgrade :{:^8} of {:^8}".format(Helper.human_format(current_exp),
-                                                             Helper.human_format(total_price)))
+        if not any(amounts):
+            if self.report and upgrades:
+                total_price = min(upgrade.cost() for upgrade, _ in upgrades)
+                print("No XP Upgrade :{:^8} of {:^8}".format(Helper.human_format(current_exp), Helper.human_format(total_price)))
             return
 
-        amount = int(current_exp // total_price)
-
-        h_power = amount * self.hpower
-        h_cap = amount * self.hcap
-        h_bars = amount * self.hbar
-
-        Navigation.exp_hack()
-
-        Inputs.click(*coords.EM_POW_BOX)
-        Inputs.send_string(str(h_power))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_CAP_BOX)
-        Inputs.send_string(str(h_cap))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_BAR_BOX)
-        Inputs.send_string(str(h_bars))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        if h_power > 0:
-            Inputs.click(*coords.EM_POW_BUY)
-        if h_cap > 0:
-            Inputs.click(*coords.EM_CAP_BUY)
-        if h_bars > 0:
-            Inputs.click(*coords.EM_BAR_BUY)
+        # Upgrades sharing a tab have the same fields, add their values up.
+        tabs = {}
+        for (upgrade, _), amount in zip(upgrades, amounts):
+            if not amount:
+                continue
+            for tab, fields in upgrade.fields(amount).items():
+                if tab in tabs:
+                    fields = [(box, button, value + old[2]) for (box, button, value), old in zip(fields, tabs[tab])]
+                tabs[tab] = fields
+
+        for tab, fields in tabs.items():
+            getattr(Navigation, tab)()
+            for box, _, value in fields:
+                Inputs.click(*box)
+                Inputs.send_string(str(int(value)))
+                time.sleep(userset.MEDIUM_SLEEP)
+            for _, button, value in fields:
+                if value > 0:
+                    Inputs.click(*button)
 
         Stats.set_value_with_ocr("XP")
 
-        total_spent = coords.HPOWER_COST * h_power + coords.HCAP_COST * h_cap + coords.HBAR_COST * h_bars
-
         if self.report:
+            total_spent = sum(upgrade.price(amount) for (upgrade, _), amount in zip(upgrades, amounts))
             print("Spent XP:{:^8}".format(Helper.human_format(total_spent)))
-            print("New | Pow:{:^8}{:^3}Cap:{:^8}{:^3}Bar:{:^8}".format(
-                Helper.human_format(h_power), "|",
-                Helper.human_format(h_cap), "|",
-                Helper.human_format(h_bars)))
+            for (upgrade, _), amount in zip(upgrades, amounts):
+                if amount:
+                    print(upgrade.describe(amount))
+            if not Stats.OCR_failed:
+                idle = UpgradePlanner.idle_sequential(upgrades, current_exp)
+                print("Verified XP spent:{:^8}| Idle XP:{:^8}| Idle XP buying one by one:{:^8}".format(
+                    Helper.human_format(current_exp - Stats.xp),
+                    Helper.human_format(Stats.xp),
+                    Helper.human_format(idle)))
@@ -2,11 +2,12 @@
 import ctypes
 import platform
 
-import win32gui
-
-from deprecated import deprecated
 from typing import Dict, Tuple
 
+from classes.lazy import LazyModule, deprecated
+
+win32gui = LazyModule("win32gui")  # imported on first use, not available off Windows
+
 
 class Window:
     """This class contains game window coordinates."""
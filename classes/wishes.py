@@ -1,4 +1,5 @@
 """Class that handles wish allocation."""
+import datetime
 from decimal import Decimal
 from functools import reduce
 import math
@@ -7,12 +8,16 @@ import time
 
 from classes.features   import Misc
 from classes.inputs     import Inputs
+from classes.lazy       import LazyModule
 from classes.navigation import Navigation
+from classes.progress   import ProgressModel
 
 import coordinates  as coords
 import constants    as const
 import usersettings as userset
 
+numpy = LazyModule("numpy")
+
 
 class Wishes:
     """Class that handles wishes."""
@@ -34,6 +39,9 @@ class Wishes:
         self.wishes_completed = []  # completed wishes
         self.wishes_in_progress = []  # wishes above level 0
         self.wishes_active = []  # wishes that currently are progressing
+        self.capreq_cache = {}  # (epow, mpow, rpow, wish_speed) bucket -> {wish id: capreq}
+        self.plan = {}  # wish id -> [e, m, r]
+        self.plan_key = None
         self.get_breakdowns()
         self.get_wish_status()
         # self.allocate_wishes()
@@ -164,25 +172,26 @@ class Wishes:
 
         for i, page in enumerate(coords.WISH_PAGE):
             Inputs.click(*page)
-            for y in range(3):
-                for x in range(7):
-                    border_color = Inputs.get_pixel_color(coords.WISH_BORDER.x + x * 92,
-                                                          coords.WISH_BORDER.y + y * 106)
-                    if border_color == coords.COLOR_WISH_COMPLETED:
-                        self.wishes_completed.append(1 + x + y + y * 6 + i * 21)
-
-                    if border_color == coords.COLOR_WISH_STARTED:
-                        self.wishes_in_progress.append(1 + x + y + y * 6 + i * 21)
-
-                    active_color = Inputs.get_pixel_color(coords.WISH_SELECTION.x + x * 92,
-                                                          coords.WISH_SELECTION.y + y * 106)
-                    if active_color == coords.COLOR_WISH_ACTIVE:
-                        self.wishes_active.append(1 + x + y + y * 6 + i * 21)
-                    if active_color == coords.COLOR_WISH_INACTIVE:
-                        Inputs.click(coords.WISH_SELECTION.x + x * 92,
-                                     coords.WISH_SELECTION.y + y * 106)
-                        Inputs.click(*coords.WISH_CLEAR_WISH)
-                        self.wishes_in_progress.append(1 + x + y + y * 6 + i * 21)
+            # Read the whole 7x3 grid from a single frame instead of two pixel reads per wish.
+            frame = Inputs.get_frame()
+            borders = Inputs.sample_grid(frame, coords.WISH_BORDER, coords.WISH_SELECTION_OFFSET, 7, 3)
+            selections = Inputs.sample_grid(frame, coords.WISH_SELECTION, coords.WISH_SELECTION_OFFSET, 7, 3)
+            ids = 1 + numpy.arange(21).reshape(3, 7) + i * 21
+
+            completed = Inputs.color_mask(borders, coords.COLOR_WISH_COMPLETED)
+            started = Inputs.color_mask(borders, coords.COLOR_WISH_STARTED)
+            active = Inputs.color_mask(selections, coords.COLOR_WISH_ACTIVE)
+            inactive = Inputs.color_mask(selections, coords.COLOR_WISH_INACTIVE)
+
+            self.wishes_completed.extend(ids[completed].tolist())
+            self.wishes_in_progress.extend(ids[started].tolist())
+            self.wishes_active.extend(ids[active].tolist())
+            # Only inactive wishes need clicks, to clear them.
+            for y, x in zip(*numpy.nonzero(inactive)):
+                Inputs.click(coords.WISH_SELECTION.x + int(x) * coords.WISH_SELECTION_OFFSET.x,
+                             coords.WISH_SELECTION.y + int(y) * coords.WISH_SELECTION_OFFSET.y)
+                Inputs.click(*coords.WISH_CLEAR_WISH)
+                self.wishes_in_progress.append(int(ids[y, x]))
 
             if i == 0:  # after page 1 is scanned, select first wish
                 Inputs.click(*coords.WISH_PORTRAIT)
@@ -191,28 +200,66 @@ class Wishes:
         if used_slots > 0:
             print(f"{used_slots} wish slots are already in use and will be ignored.")
 
-    def allocate_wishes(self):
-        """Use the order defined in constants.py to determine which wish to run."""
-        available_wishes = const.WISH_ORDER.copy()
-        costs = {}
-        tmp = []
+    @staticmethod
+    def bucket(*values):
+        """Round values to 3 significant digits so OCR jitter doesn't invalidate caches."""
+        return tuple(float('%.3g' % v) for v in values)
 
-        # Find and remove wishes that are completed or are currently active.
-        for wish in available_wishes:
-            if wish.id in self.wishes_completed or wish.id in self.wishes_active:
-                tmp.append(wish)
-        for t in tmp:
-            available_wishes.remove(t)
+    def get_capreq(self, wish):
+        """Return the EMR cap product required to run wish at full speed at the last level.
 
-        # Calculate the required EMR to run the wishes at full speed at the last level.
-        for wish in available_wishes:
+        Results are cached per (epow, mpow, rpow, wish_speed) bucket.
+        """
+        key = self.bucket(self.epow, self.mpow, self.rpow, self.wish_speed)
+        cache = self.capreq_cache.setdefault(key, {})
+        if wish.id not in cache:
             powproduct = (self.epow * self.mpow * self.rpow) ** 0.17
             wish_cap_ticks = self.wish_min_time * 60 * 50
             # TODO: fetch current wish level instead of using max(?).
-            capreq = wish.divider * wish.levels / wish_cap_ticks / self.wish_speed / powproduct
+            cache[wish.id] = wish.divider * wish.levels / wish_cap_ticks / self.wish_speed / powproduct
+        return cache[wish.id]
+
+    def get_eta(self, wish_id, emr=None):
+        """Return the estimated seconds to complete a wish from level 0.
+
+        Keyword arguments
+        wish_id -- The id of the wish.
+        emr     -- The [e, m, r] allocated to the wish. If omitted, the
+                   allocation from the current plan is used.
+        """
+        if emr is None:
+            emr = self.plan.get(wish_id)
+        if not emr or min(emr) <= 0:
+            return math.inf
+        wish = const.WISH_BY_ID[wish_id]
+        speed = self.wish_speed * ((self.epow * self.mpow * self.rpow) * (emr[0] * emr[1] * emr[2])) ** 0.17
+        return float(ProgressModel.wish_seconds(wish.divider, wish.levels, speed, self.wish_min_time))
+
+    def plan_wishes(self):
+        """Use the order defined in constants.py to determine which wishes to run.
+
+        Returns a dictionary of wish id to [e, m, r]. The plan is only
+        recomputed when powers, wish speed, idle caps, slots or the
+        completed/active wishes change.
+        """
+        plan_key = (self.bucket(self.epow, self.mpow, self.rpow, self.wish_speed),
+                    self.bucket(self.ecap, self.mcap, self.rcap),
+                    frozenset(self.wishes_completed),
+                    frozenset(self.wishes_active),
+                    self.available_slots)
+        if plan_key == self.plan_key:
+            return self.plan
 
-            ratio = [self.ecap / self.rcap, self.mcap / self.rcap, 1]
-            capproduct = reduce((lambda x, y: x * y), ratio, 1)
+        # Find and remove wishes that are completed or are currently active.
+        excluded = set(self.wishes_completed) | set(self.wishes_active)
+        available_wishes = [wish for wish in const.WISH_ORDER if wish.id not in excluded]
+        costs = {}
+
+        # Calculate the required EMR to run the wishes at full speed at the last level.
+        ratio = [self.ecap / self.rcap, self.mcap / self.rcap, 1]
+        capproduct = reduce((lambda x, y: x * y), ratio, 1)
+        for wish in available_wishes:
+            capreq = self.get_capreq(wish)
             factor = (capreq / capproduct ** 0.17) ** (1 / .17 / 3)
             vals = []
             for x in ratio:
@@ -267,14 +314,22 @@ class Wishes:
                                  math.ceil(self.rcap / self.wish_slots)]
                 best = tmp
 
-        for k in best:
-            for w in const.WISH_ORDER:
-                if w.id == k:
-                    e = '%.2E' % Decimal(best[k][0])
-                    m = '%.2E' % Decimal(best[k][1])
-                    r = '%.2E' % Decimal(best[k][2])
-                    print(f"Allocating {e} E | {m} M | {r} R to {w.name}")
-                    self.add_emr(w, best[k])
+        self.plan = best
+        self.plan_key = plan_key
+        return best
+
+    def allocate_wishes(self):
+        """Allocate EMR to the wishes in the current plan."""
+        plan = self.plan_wishes()
+        for k in plan:
+            w = const.WISH_BY_ID[k]
+            e = '%.2E' % Decimal(plan[k][0])
+            m = '%.2E' % Decimal(plan[k][1])
+            r = '%.2E' % Decimal(plan[k][2])
+            eta = self.get_eta(k)
+            eta = datetime.timedelta(seconds=round(eta)) if eta != math.inf else "never"
+            print(f"Allocating {e} E | {m} M | {r} R to {w.name} (ETA {eta})")
+            self.add_emr(w, plan[k])
 
     def add_emr(self, wish, emr):
         """Add EMR to wish."""
@@ -145,3 +145,25 @@ ZONE_MAP = {"safe zone: awakening site": 0, "tutorial zone": 1, "sewers": 2, "fo
             "the fad-lands": 29, "jrpgville": 30, "the exile": 31, "the rad-lands": 32,
             "back to school": 33, "the west world": 34, "it hungers": 35,
             }
+WISH_BY_ID = {wish.id: wish for wish in WISH_ORDER}
+
+# Approximate base ability cooldowns in seconds, before cooldown reduction.
+# classes.combat.AbilityModel lowers these when it sees an ability ready earlier.
+ABILITY_GLOBAL_COOLDOWN = 0.8
+ABILITY_COOLDOWNS = {0: 0.8,  # Regular
+                     1: 3,  # Strong
+                     2: 5,  # Parry
+                     3: 7,  # Piercing
+                     4: 30,  # Ultimate
+                     5: 8,  # Block
+                     6: 20,  # Defensive
+                     7: 10,  # Heal
+                     8: 40,  # Offensive buff
+                     9: 20,  # Charge
+                     10: 60,  # Ultimate buff
+                     11: 20,  # Paralyze
+                     12: 30,  # Hyper regen
+                     13: 30,  # Beast mode
+                     14: 60,  # Mega buff
+                     15: 60,  # Oh shit
+                     }
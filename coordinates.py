@@ -4,6 +4,7 @@ from collections import namedtuple
 Pixel = namedtuple('Pixel', 'x y')
 ColorPixel = namedtuple('ColorPixel', Pixel._fields + ('color',))
 OCRBox = namedtuple('OCRBox', 'x1 y1 x2 y2')
+Bar = namedtuple('Bar', 'x1 x2 y')  # horizontal progress bar, x2 is exclusive
 
 # USELESSFUL
 WASTE_CLICK = Pixel(900, 590)
@@ -238,6 +239,7 @@ NGU_EVIL = ColorPixel(778, 146, "323232")
 NGU_BAR_MIN = Pixel(306, 215)
 NGU_BAR_MAX = Pixel(503, 215)
 NGU_BAR_OFFSET_Y = 35
+NGU_BAR = Bar(NGU_BAR_MIN.x, NGU_BAR_MAX.x + 1, NGU_BAR_MIN.y)
 
 # ADV TRAINING OFFSETS
 ADV_TRAINING_TOUGHNESS = Pixel(890, 230)
@@ -304,6 +306,9 @@ SPIN = Pixel(713, 562)
 WANDOOS_ENERGY = Pixel(626, 252)
 WANDOOS_MAGIC = Pixel(626, 350)
 WANDOOS_VERSION = [Pixel(325, 420), Pixel(325, 445), Pixel(325, 470)]
+# The bars end at the BB color checks, the start is approximate.
+WANDOOS_ENERGY_BAR = Bar(326, 527, 250)
+WANDOOS_MAGIC_BAR = Bar(326, 527, 350)
 
 # OCR OFFSETS
 OCR_BOSS = OCRBox(765, 308, 890, 323)
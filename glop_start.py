@@ -1,11 +1,13 @@
 """Glop startup script."""
 import scripts.glop
+from classes.checkpoint import Checkpoint
 from classes.helper import Helper
 
 print("How many glops do you wish to farm? The script will farm UP TO this amount:")
 target_glops = int(input())
 Helper.init(True)
 Helper.requirements()
+Checkpoint.restore("glop.checkpoint")
 scripts.glop.Glop.init(target_glops)
 scripts.glop.Glop.loop()
 Helper.loop()
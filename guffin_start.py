@@ -1,5 +1,6 @@
 """Guffin startup script."""
 from scripts.guffin import GuffinRun
+from classes.checkpoint import Checkpoint
 from classes.helper import Helper
 from typing import NamedTuple, List
 import constants as const
@@ -22,6 +23,14 @@ class Settings(NamedTuple):
     butter: bool = True
     # Which augments to use, see classes.features.Augments.augments() for naming convention.
     aug: List[str] = ["SS", "DS"]
+    # Share of the augment energy that goes to the first augment, the rest goes to the second.
+    aug_split: float = 0.66
+    # Share of the idle energy that goes to augments.
+    aug_energy: float = 0.5
+    # Share of the idle energy (and the same amount of magic) that goes to the time machine.
+    tm_energy: float = 0.1
+    # File every run is recorded to for tune.py, None to disable.
+    run_log: str = "guffin_runs.jsonl"
     # Assign resources to wishes?
     allocate_wishes: bool = False
     # Which wandoos version to use (0-2).
@@ -34,6 +43,7 @@ class Settings(NamedTuple):
 
 Helper.init(True)
 Helper.requirements()
+Checkpoint.restore("guffin.checkpoint")
 GuffinRun.init(Settings())
 while True:
     GuffinRun.run()
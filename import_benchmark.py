@@ -0,0 +1,85 @@
+"""Import time benchmark of the entry points, catches slow startups.
+
+Imports every module in a fresh interpreter with -X importtime. It fails
+if a module takes longer than its budget, or imports one of the heavy
+modules that should only load on first use, see classes.lazy, and that
+isn't an accepted exception, see ACCEPTED.
+
+Usage: python import_benchmark.py [--runs 5] [--verbose]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from typing import Dict, Tuple
+
+# module -> import time budget in milliseconds, about twice the measured time
+# with a floor of 10, small modules vary more than that between machines
+BUDGETS = {
+    "constants": 10,
+    "coordinates": 10,
+    "classes.helper": 65,
+    "classes.challenge": 70,
+    "classes.features": 65,
+    "scripts.guffin": 160,
+}
+# Loaded on first use, importing them at startup is a regression.
+HEAVY = ("cv2", "numpy", "PIL", "pytesseract", "requests", "asyncio", "deprecated",
+         "win32api", "win32con", "win32gui", "win32ui")
+# module -> heavy imports it's allowed. scripts.guffin registers its state
+# with Session, whose SessionRuntime subclasses the asyncio Runtime.
+ACCEPTED = {
+    "scripts.guffin": ("asyncio",),
+}
+
+
+def measure(module :str) -> Dict[str, Tuple[int, int]]:
+    """Import module in a fresh interpreter, return the self and cumulative microseconds of
+    every import it caused, the interpreter's own startup imports are left out."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # a top level import, the ones before it belong to another
+            if name.strip() != module:
+                imports = {}
+                continue
+        imports[name.strip()] = (int(self_us), int(cumulative))
+    return imports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-r", "--runs", default=5, type=int, help="imports per module, the fastest one counts")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the slowest imports of every module")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<24}{'ms':>8}{'budget':>8}  heavy imports")
+    for module, budget in BUDGETS.items():
+        try:
+            runs = [measure(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(e)
+            failed = True
+            continue
+        imports = min(runs, key=lambda r: r[module][1])
+        ms = imports[module][1] / 1000
+        heavy = sorted({name.split(".")[0] for name in imports} & set(HEAVY) - set(ACCEPTED.get(module, ())))
+        failed |= ms > budget or bool(heavy)
+        print(f"{module:<24}{ms:>8.1f}{budget:>8}  {', '.join(heavy) or '-'}")
+        if args.verbose:
+            slowest = sorted(imports.items(), key=lambda item: -item[1][0])[:10]
+            for name, (self_us, _) in slowest:
+                print(f"    {name:<40}{self_us / 1000:>8.1f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
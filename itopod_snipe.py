@@ -1,6 +1,7 @@
 """ITOPOD Sniping script."""
 import time
 # Helper classes
+from classes.checkpoint import Checkpoint
 from classes.features import Adventure, GoldDiggers, MoneyPit, Inventory
 from classes.helper   import Helper
 from classes.stats    import Tracker
@@ -10,7 +11,8 @@ import constants as const
 Helper.init(True)
 Helper.requirements()
 
-tracker = Tracker(5)
+Checkpoint.restore("itopod_snipe.checkpoint")
+tracker = Checkpoint.keep("tracker", lambda: Tracker(5))
 
 while True:  # main loop
     titans = Adventure.check_titan_status()
@@ -22,4 +24,5 @@ while True:  # main loop
     tracker.progress()
     GoldDiggers.gold_diggers(const.DEFAULT_DIGGER_ORDER)
     Inventory.boost_equipment(boost_cube=True)
+    Checkpoint.save()
     time.sleep(3)  # Need to wait for tooltip to disappear
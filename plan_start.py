@@ -0,0 +1,16 @@
+"""Run plan startup script."""
+import sys
+
+from classes.helper import Helper
+from classes.plan   import Plan
+
+
+# Edit the plan file to change the strategy, the timing report shows what it costs.
+plan = Plan.load(sys.argv[1] if len(sys.argv) > 1 else "plans/guffin.json")
+
+Helper.init(True)
+Helper.requirements()
+try:
+    plan.run()
+finally:
+    plan.print_report()
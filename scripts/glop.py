@@ -3,13 +3,13 @@ import datetime
 import time
 from typing import NamedTuple
 # Helper classes
+from classes.checkpoint import Checkpoint
 from classes.features import Adventure
 from classes.helper   import Helper
 from classes.inputs import Inputs
+from classes.inventory import InventoryModel
 from classes.navigation import Navigation
-from classes.window import Window
 import coordinates as coords
-import usersettings as userset
 
 
 class Reagent(NamedTuple):
@@ -44,24 +44,24 @@ class Glop:
 
     @staticmethod
     def update_inventory() -> None:
-        """Scan all inventory pages for glop related items."""
+        """Scan all inventory pages for glop related items.
+        
+        Only slots that changed since the last scan are identified again.
+        """
         Navigation.menu("inventory")
         for item in coords.GLOP_FILENAMES: Glop.reagents[item] = []
 
-        for page in range(Glop.inv_pages_unlocked):
-            Inputs.click(*coords.INVENTORY_PAGE[page])
-            time.sleep(userset.LONG_SLEEP)
-            bmp = Inputs.get_bitmap()
-            
-            for item in coords.GLOP_FILENAMES:
-                path = Inputs.get_file_path("images", item)
-                # Using the whole window instead of cropping out just the inventory yields higher accuracy
-                rect = (Window.x, Window.y, Window.x + 960, Window.y + 600)
-                res = Inputs.find_all(*rect, path, threshold=0.9, bmp=bmp)
-                reagents = list(map(lambda x: Reagent(x[0], x[1], item, page), res))
-                if reagents: Glop.reagents[item].extend(reagents)
+        pages = range(Glop.inv_pages_unlocked)
+        changed = 0
+        for page in pages:
+            InventoryModel.open_page(page)
+            changed += len(InventoryModel.update(page))
+
+        for page, slot, item in InventoryModel.find(coords.GLOP_FILENAMES, pages):
+            x, y = InventoryModel.slot_coords(slot)
+            Glop.reagents[item].append(Reagent(x, y, item, page))
         
-        print("\nScan found these glop reagents\n")
+        print(f"\nScan found these glop reagents ({changed} slots changed)\n")
         for item in coords.GLOP_FILENAMES:
             print(f"{item}: {len(Glop.reagents[item])}")
 
@@ -71,19 +71,24 @@ class Glop:
             Navigation.menu("inventory")
             # Find the glop reagent we have the fewest of
             target = min(Glop.reagents, key=lambda x: len(Glop.reagents[x]) if x != "glop.png" else float('Inf'))
+            page = None
             for reagent in Glop.reagents[target]:
-                Inputs.click(*coords.INVENTORY_PAGE[reagent.page])
+                if reagent.page != page:
+                    InventoryModel.open_page(reagent.page)
+                    page = reagent.page
                 Inputs.click(reagent.x, reagent.y, button="right")
                 Inputs.ctrl_click(reagent.x, reagent.y)
             print(f"converted {len(Glop.reagents[target])} glops")
             Adventure.snipe(Glop.GLOP_ZONE_MAP[target], 2)
             Glop.update_inventory()
+            Checkpoint.save()
         elapsed = round(time.time() - Glop.start)
         print(f"Finished collecting {Glop.target} glops in {datetime.timedelta(seconds=elapsed)}")
 
 if __name__ == "__main__":
     Helper.init(True)
     Helper.requirements()
+    Checkpoint.restore("glop.checkpoint")
     print("How many glops do you wish to farm? The script will farm UP TO this amount:")
     target = int(input())
     Glop.init(target)
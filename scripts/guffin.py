@@ -3,6 +3,7 @@
 import time
 
 # Helper classes
+from classes.checkpoint import Checkpoint
 from classes.features import (
     AdvancedTraining,
     Adventure,
@@ -20,11 +21,15 @@ from classes.features import (
     NGU,
     Wandoos,
 )
+from classes.navigation import Navigation
+from classes.progress import ProgressModel
+from classes.runtime import Runtime
+from classes.session import Session
 from classes.wishes import Wishes
 
 import coordinates as coords
 import constants as const
-from typing import NamedTuple, List, ClassVar
+from typing import Any, ClassVar, Dict, List, NamedTuple, Optional
 
 
 class GuffinRun:
@@ -42,6 +47,10 @@ class GuffinRun:
     diggers: ClassVar[List[int]]
     butter: ClassVar[bool]
     aug: ClassVar[List[str]]
+    aug_split: ClassVar[float]
+    aug_energy: ClassVar[float]
+    tm_energy: ClassVar[float]
+    run_log: ClassVar[str]
     allocate_wishes: ClassVar[bool]
     wandoos_version: ClassVar[int]
     wish_min_time: ClassVar[int]
@@ -57,12 +66,21 @@ class GuffinRun:
         GuffinRun.diggers = settings.diggers
         GuffinRun.butter = settings.butter
         GuffinRun.aug = settings.aug
+        GuffinRun.aug_split = settings.aug_split
+        GuffinRun.aug_energy = settings.aug_energy
+        GuffinRun.tm_energy = settings.tm_energy
+        GuffinRun.run_log = settings.run_log
         GuffinRun.allocate_wishes = settings.allocate_wishes
         GuffinRun.wandoos_version = settings.wandoos_version
         GuffinRun.wish_min_time = settings.wish_min_time
         GuffinRun.wish_slots = settings.wish_slots
 
-        if GuffinRun.allocate_wishes:
+        wishes = GuffinRun.wishes  # restored from a checkpoint of this rebirth
+        if not GuffinRun.allocate_wishes:
+            GuffinRun.wishes = None
+        elif wishes and (wishes.wish_slots, wishes.wish_min_time) == (GuffinRun.wish_slots, GuffinRun.wish_min_time):
+            print("Using the stat breakdowns from the checkpoint.")
+        else:
             GuffinRun.wishes = Wishes(GuffinRun.wish_slots, GuffinRun.wish_min_time)
             lst = [GuffinRun.wishes.epow, GuffinRun.wishes.mpow, GuffinRun.wishes.rpow]
             i = 0
@@ -79,42 +97,54 @@ class GuffinRun:
     def __update_gamestate() -> None:
         """Update relevant state information."""
         GuffinRun.rb_time = Rebirth.rt_to_seconds()
-        try:
-            GuffinRun.current_boss = int(FightBoss.get_current_boss())
-        except ValueError:
-            GuffinRun.current_boss = 1
-            print("couldn't get current boss")
+        GuffinRun.current_boss = FightBoss.current_boss()
 
         if GuffinRun.advanced_training_locked:
             GuffinRun.advanced_training_locked = Inputs.check_pixel_color(
                 *coords.COLOR_ADV_TRAINING_LOCKED
             )
+        Checkpoint.save()
+
+    @staticmethod
+    async def __update_gamestate_async(rt: Runtime) -> None:
+        """Update relevant state information, OCR runs while the next read is set up."""
+        clock = None
+        if Rebirth.clock_due():
+            bmp, read_at = await rt.capture(coords.OCR_REBIRTH_TIME)
+            clock = rt.spawn(rt.cpu(Inputs.ocr, *coords.OCR_REBIRTH_TIME, bmp=bmp))
+        boss = None
+        if FightBoss.boss_stale():
+            await rt.call(Navigation.menu, "fight")
+            boss = rt.spawn(rt.cpu(Inputs.ocr_digits, *coords.OCR_BOSS, frame=await rt.frame()))
+        if GuffinRun.advanced_training_locked:
+            GuffinRun.advanced_training_locked = await rt.probe(*coords.COLOR_ADV_TRAINING_LOCKED)
+
+        if clock is not None:
+            Rebirth.sync_clock(Rebirth.parse_rebirth_time(await clock), read_at)
+        if boss is not None:
+            digits = await boss
+            if digits:
+                FightBoss.record_boss(int(digits))
+        GuffinRun.rb_time = Rebirth.rt_to_seconds()
+        GuffinRun.current_boss = FightBoss.boss or 1
+        Checkpoint.save()
 
     @staticmethod
     def __do_quest() -> None:
-        """Get the amount of available major quests."""
-        text = Questing.get_quest_text().lower()
-        majors = Questing.get_available_majors()
-        if majors == 0 and (
-            coords.QUESTING_MINOR_QUEST in text
-            or coords.QUESTING_NO_QUEST_ACTIVE in text
-        ):
-            Questing.questing(duration=2, force=const.QUEST_ZONE_MAP[GuffinRun.zone])
-        else:
-            if not Inputs.check_pixel_color(*coords.COLOR_QUESTING_USE_MAJOR):
-                Inputs.click(*coords.QUESTING_USE_MAJOR)
-            Questing.questing(duration=2, butter=GuffinRun.butter)
+        """Quest majors if there are any, otherwise quest in the configured zone."""
+        Questing.majors_or_force(const.QUEST_ZONE_MAP[GuffinRun.zone], butter=GuffinRun.butter)
 
     @staticmethod
-    def run() -> None:
-        """Rebirth procedure."""
-        GuffinRun.advanced_training_locked = True
-        GuffinRun.current_boss = 0
-        GuffinRun.rb_time = 0
-        GuffinRun.__update_gamestate()
-        if GuffinRun.rb_time > GuffinRun.max_rb_duration:
-            Rebirth.do_rebirth()
-            return
+    def __augments() -> None:
+        """Split the augment share of the idle energy between the augment and its upgrade."""
+        Augmentation.augments(
+            {GuffinRun.aug[0]: GuffinRun.aug_split, GuffinRun.aug[1]: 1 - GuffinRun.aug_split},
+            Misc.get_idle_cap(1) * GuffinRun.aug_energy,
+        )
+
+    @staticmethod
+    def __start() -> None:
+        """Set up the rebirth."""
         FightBoss.nuke()
         time.sleep(2)
         Adventure.adventure(const.ZONE_MAP[GuffinRun.gold_zone])
@@ -125,57 +155,82 @@ class GuffinRun:
         NGU.cap_ngu(magic=True)
         Wandoos.set_wandoos(0)
         Wandoos.wandoos(True, True)
-        Augmentation.augments(
-            {GuffinRun.aug[0]: 0.66, GuffinRun.aug[1]: 0.34}, Misc.get_idle_cap(1) * 0.5
-        )
-        TimeMachine.time_machine(Misc.get_idle_cap(1) * 0.1, magic=True)
-        GuffinRun.__update_gamestate()
+        GuffinRun.__augments()
+        TimeMachine.time_machine(Misc.get_idle_cap(1) * GuffinRun.tm_energy, magic=True)
+
+    @staticmethod
+    def __allocate() -> None:
+        """Enable spells and allocate wishes."""
         BloodMagic.toggle_auto_spells(drop=False, gold=False)
         if GuffinRun.wishes:
             GuffinRun.wishes.get_caps()
             GuffinRun.wishes.get_wish_status()
             GuffinRun.wishes.allocate_wishes()
 
-        while GuffinRun.advanced_training_locked:
-            GuffinRun.__do_quest()
-            FightBoss.nuke()
-            GoldDiggers.gold_diggers(GuffinRun.diggers)
-            NGU.cap_ngu()
-            NGU.cap_ngu(magic=True)
-            Hacks.hacks(GuffinRun.hacks, coords.INPUT_MAX)
-            Augmentation.augments(
-                {GuffinRun.aug[0]: 0.66, GuffinRun.aug[1]: 0.34},
-                Misc.get_idle_cap(1) * 0.5,
-            )
-            TimeMachine.time_machine(coords.INPUT_MAX, magic=True)
-            GuffinRun.__update_gamestate()
+    @staticmethod
+    def __unlock_step() -> None:
+        """Push towards unlocking advanced training."""
+        GuffinRun.__do_quest()
+        FightBoss.nuke()
+        GoldDiggers.gold_diggers(GuffinRun.diggers)
+        NGU.cap_ngu()
+        NGU.cap_ngu(magic=True)
+        Hacks.hacks(GuffinRun.hacks, coords.INPUT_MAX)
+        GuffinRun.__augments()
+        TimeMachine.time_machine(coords.INPUT_MAX, magic=True)
 
+    @staticmethod
+    def __unlocked() -> None:
+        """Reallocate once advanced training is unlocked."""
         Misc.reclaim_tm(energy=True, magic=True)
         Misc.reclaim_aug()
         AdvancedTraining.advanced_training(1e12)
         Wandoos.set_wandoos(GuffinRun.wandoos_version)
         Wandoos.wandoos(True, True)
-        Augmentation.augments(
-            {GuffinRun.aug[0]: 0.66, GuffinRun.aug[1]: 0.34}, Misc.get_idle_cap(1) * 0.5
-        )
-        TimeMachine.time_machine(Misc.get_idle_cap(1) * 0.1, magic=True)
-        while GuffinRun.rb_time < GuffinRun.max_rb_duration - 140:
-            GoldDiggers.gold_diggers(GuffinRun.diggers)
-            FightBoss.nuke()
-            Hacks.hacks(GuffinRun.hacks, coords.INPUT_MAX)
-            GuffinRun.__do_quest()
-            GuffinRun.__update_gamestate()
+        GuffinRun.__augments()
+        TimeMachine.time_machine(Misc.get_idle_cap(1) * GuffinRun.tm_energy, magic=True)
 
+    @staticmethod
+    def __farm_step() -> None:
+        """Keep progressing until the end of the rebirth."""
+        GoldDiggers.gold_diggers(GuffinRun.diggers)
+        FightBoss.nuke()
+        Hacks.hacks(GuffinRun.hacks, coords.INPUT_MAX)
+        GuffinRun.__do_quest()
+
+    @staticmethod
+    def __finish() -> None:
+        """Prepare for the rebirth."""
         FightBoss.fight()
         Adventure.adventure(itopodauto=True)
         MoneyPit.pit()
         MoneyPit.spin()
         Misc.save_check()
-        while GuffinRun.rb_time < GuffinRun.max_rb_duration:
-            time.sleep(1)
-            GuffinRun.__update_gamestate()
 
+    @staticmethod
+    def __wish_stats() -> Optional[Dict[str, Any]]:
+        """Return the wish stats for the run log, see ProgressModel.rank_wishes()."""
+        w = GuffinRun.wishes
+        if w is None:
+            return None
+        return {"epow": w.epow, "mpow": w.mpow, "rpow": w.rpow, "ecap": w.ecap, "mcap": w.mcap,
+                "rcap": w.rcap, "wish_speed": w.wish_speed, "slots": w.wish_slots,
+                "min_time": w.wish_min_time, "completed": w.wishes_completed}
+
+    @staticmethod
+    def __rebirth() -> None:
+        """Rebirth and report the run."""
         FightBoss.nuke()
+        if GuffinRun.run_log:
+            ProgressModel.record(
+                GuffinRun.run_log,
+                duration=Rebirth.rt_to_seconds(),
+                boss=FightBoss.current_boss(),
+                aug_split=GuffinRun.aug_split,
+                aug_energy=GuffinRun.aug_energy,
+                tm_energy=GuffinRun.tm_energy,
+                wishes=GuffinRun.__wish_stats(),
+            )
         Rebirth.do_rebirth()
         # Must wait for game to fully redraw all elements after rebirthing
         time.sleep(1)
@@ -183,3 +238,71 @@ class GuffinRun:
         print(
             f"Completed guffin run #{GuffinRun.runs} in {time.strftime('%H:%M:%S', time.gmtime(GuffinRun.rb_time))}"
         )
+
+    @staticmethod
+    def run() -> None:
+        """Rebirth procedure."""
+        GuffinRun.advanced_training_locked = True
+        GuffinRun.current_boss = 0
+        GuffinRun.rb_time = 0
+        GuffinRun.__update_gamestate()
+        if GuffinRun.rb_time > GuffinRun.max_rb_duration:
+            Rebirth.do_rebirth()
+            return
+        GuffinRun.__start()
+        GuffinRun.__update_gamestate()
+        GuffinRun.__allocate()
+
+        while GuffinRun.advanced_training_locked:
+            GuffinRun.__unlock_step()
+            GuffinRun.__update_gamestate()
+
+        GuffinRun.__unlocked()
+        while GuffinRun.rb_time < GuffinRun.max_rb_duration - 140:
+            GuffinRun.__farm_step()
+            GuffinRun.__update_gamestate()
+
+        GuffinRun.__finish()
+        while GuffinRun.rb_time < GuffinRun.max_rb_duration:
+            time.sleep(GuffinRun.max_rb_duration - GuffinRun.rb_time)
+            GuffinRun.rb_time = Rebirth.rt_to_seconds(sync=True)
+
+        GuffinRun.__rebirth()
+
+    @staticmethod
+    async def run_async(rt: Runtime) -> None:
+        """Rebirth procedure on the asyncio runtime, see run().
+
+        Usage: Runtime.start(GuffinRun.run_async)
+        """
+        GuffinRun.advanced_training_locked = True
+        GuffinRun.current_boss = 0
+        GuffinRun.rb_time = 0
+        await GuffinRun.__update_gamestate_async(rt)
+        if GuffinRun.rb_time > GuffinRun.max_rb_duration:
+            await rt.call(Rebirth.do_rebirth)
+            return
+        await rt.call(GuffinRun.__start)
+        await GuffinRun.__update_gamestate_async(rt)
+        await rt.call(GuffinRun.__allocate)
+
+        while GuffinRun.advanced_training_locked:
+            await rt.call(GuffinRun.__unlock_step)
+            await GuffinRun.__update_gamestate_async(rt)
+
+        await rt.call(GuffinRun.__unlocked)
+        while GuffinRun.rb_time < GuffinRun.max_rb_duration - 140:
+            await rt.call(GuffinRun.__farm_step)
+            await GuffinRun.__update_gamestate_async(rt)
+
+        await rt.call(GuffinRun.__finish)
+        while GuffinRun.rb_time < GuffinRun.max_rb_duration:
+            await rt.sleep(GuffinRun.max_rb_duration - GuffinRun.rb_time)
+            GuffinRun.rb_time = await rt.call(Rebirth.rt_to_seconds, sync=True)
+
+        await rt.call(GuffinRun.__rebirth)
+
+
+Session.track(GuffinRun, ["wishes", "advanced_training_locked", "current_boss", "rb_time", "runs"])
+Checkpoint.track(GuffinRun, ["runs"])
+Checkpoint.track(GuffinRun, ["wishes"], volatile=True)
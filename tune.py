@@ -0,0 +1,9 @@
+"""Recommend guffin settings from the recorded runs."""
+import sys
+
+from classes.progress import ProgressModel
+
+
+# Runs are recorded by guffin_start.py, see run_log in its settings.
+model = ProgressModel.load(sys.argv[1] if len(sys.argv) > 1 else "guffin_runs.jsonl")
+model.print_recommendations()